@@ -6,7 +6,7 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_db, get_read_db
 try:
     from app.api.v1.dependencies_jwt import get_current_user_jwt
 except Exception:
@@ -69,3 +69,9 @@ async def get_db_session() -> AsyncGenerator[AsyncSession, None]:
     """Get database session."""
     async for session in get_db():
         yield session
+
+
+async def get_read_db_session() -> AsyncGenerator[AsyncSession, None]:
+    """Get read-only database session (replica when configured)."""
+    async for session in get_read_db():
+        yield session
@@ -7,7 +7,7 @@ from typing import Dict, Any
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_db, pool_metrics
 
 router = APIRouter()
 
@@ -76,6 +76,9 @@ async def health_check(db: AsyncSession = Depends(get_db)) -> Any:
             "message": str(e)
         })
     
+    # Connection pool checkout wait and saturation
+    health_status["database_pool"] = pool_metrics()
+    
     if health_status["status"] == "unhealthy":
         # Return health payload with 503 status but as a normal JSON body
         return JSONResponse(status_code=503, content=health_status)
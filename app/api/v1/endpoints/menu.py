@@ -1,45 +1,108 @@
 """Menu API endpoints."""
 
+import hashlib
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1.schemas import (
     CategoryResponse, CategoryCreate, CategoryUpdate,
-    ProductResponse, ProductCreate, ProductUpdate
+    ProductResponse, ProductCreate, ProductUpdate,
+    ProductListItem, PRODUCT_LIST_FIELDS
 )
 from app.api.v1.dependencies import get_db_session, get_current_admin
+from app.config import settings
+from app.services.import_progress import ImportProgress, import_progress
+from app.services.import_service import ImportService
+from app.services.menu_cache import menu_cache
 from app.services.menu_service import MenuService
+from app.utils.exceptions import ValidationException
 
 router = APIRouter()
 
 
+def _menu_etag(request: Request, tag: str) -> str:
+    """Strong ETag for a menu response: menu version plus path and query.
+    
+    The version belongs to the primary, so ETagged responses are read from the
+    primary too; a lagging replica could pin stale rows to the new tag.
+    Requests answered with 304 (or by nginx) never touch the database.
+    """
+    key = f"{request.url.path}?{sorted(request.query_params.multi_items())}"
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return f'"menu-{tag}-{digest}"'
+
+
+def _cache_headers(etag: str) -> dict:
+    return {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.menu_http_max_age}, must-revalidate",
+    }
+
+
+def _not_modified(request: Request) -> Optional[Response]:
+    """304 response when If-None-Match matches the current menu version."""
+    tag = menu_cache.current_tag()
+    if tag is None:
+        return None
+    etag = _menu_etag(request, tag)
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (t.strip() for t in if_none_match.split(",")) or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=_cache_headers(etag))
+    return None
+
+
+def _set_cache_headers(request: Request, response: Response, tag_before: Optional[str]) -> None:
+    """Attach ETag when the menu did not change while the response was built."""
+    tag = menu_cache.current_tag()
+    if tag is None or tag != tag_before:
+        response.headers["Cache-Control"] = "no-cache"
+        return
+    response.headers.update(_cache_headers(_menu_etag(request, tag)))
+
+
 @router.get("/categories", response_model=List[CategoryResponse])
 async def get_categories(
+    request: Request,
+    response: Response,
     parent_id: Optional[int] = None,
     include_inactive: bool = False,
     session: AsyncSession = Depends(get_db_session)
 ):
     """Get categories."""
+    not_modified = _not_modified(request)
+    if not_modified:
+        return not_modified
+    tag_before = menu_cache.current_tag()
+    
     menu_service = MenuService(session)
     categories = await menu_service.get_category_tree(
         parent_id=parent_id,
         include_inactive=include_inactive,
         include_archived=False
     )
+    _set_cache_headers(request, response, tag_before)
     return categories
 
 
 @router.get("/categories/{category_id}", response_model=CategoryResponse)
 async def get_category(
     category_id: int,
+    request: Request,
+    response: Response,
     session: AsyncSession = Depends(get_db_session)
 ):
     """Get category by ID."""
+    not_modified = _not_modified(request)
+    if not_modified:
+        return not_modified
+    tag_before = menu_cache.current_tag()
+    
     menu_service = MenuService(session)
     try:
         category = await menu_service.get_category_by_id(category_id)
+        _set_cache_headers(request, response, tag_before)
         return category
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -65,37 +128,79 @@ async def create_category(
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.get("/products", response_model=List[ProductResponse])
+@router.get(
+    "/products",
+    response_model=List[ProductListItem],
+    response_model_exclude_unset=True
+)
 async def get_products(
+    request: Request,
+    response: Response,
     category_id: Optional[int] = None,
     include_inactive: bool = False,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from X-Next-Cursor"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. id,name,price"),
     session: AsyncSession = Depends(get_db_session)
 ):
-    """Get products."""
-    menu_service = MenuService(session)
+    """Get products.
+    
+    Total count and next page cursor are returned in X-Total-Count and X-Next-Cursor headers.
+    """
+    field_list = None
+    if fields:
+        field_list = [f.strip() for f in fields.split(",") if f.strip()]
+        unknown = set(field_list) - PRODUCT_LIST_FIELDS
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
     
-    if category_id:
-        products = await menu_service.get_products_by_category(
+    not_modified = _not_modified(request)
+    if not_modified:
+        return not_modified
+    tag_before = menu_cache.current_tag()
+    
+    menu_service = MenuService(session)
+    try:
+        products, next_cursor = await menu_service.list_products(
             category_id=category_id,
-            include_inactive=include_inactive
+            include_inactive=include_inactive,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            fields=field_list
         )
-    else:
-        products = await menu_service.get_available_products()
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=e.message)
+    
+    total = await menu_service.count_products(category_id, include_inactive)
+    response.headers["X-Total-Count"] = str(total)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    _set_cache_headers(request, response, tag_before)
     
-    return products[skip:skip + limit]
+    if field_list:
+        return [ProductListItem(**product) for product in products]
+    return [ProductListItem.model_validate(product) for product in products]
 
 
 @router.get("/products/{product_id}", response_model=ProductResponse)
 async def get_product(
     product_id: int,
+    request: Request,
+    response: Response,
     session: AsyncSession = Depends(get_db_session)
 ):
     """Get product by ID."""
+    not_modified = _not_modified(request)
+    if not_modified:
+        return not_modified
+    tag_before = menu_cache.current_tag()
+    
     menu_service = MenuService(session)
     try:
         product = await menu_service.get_product_by_id(product_id)
+        _set_cache_headers(request, response, tag_before)
         return product
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -120,3 +225,44 @@ async def create_product(
         return new_product
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/import/products")
+async def import_products(
+    request: Request,
+    dry_run: bool = False,
+    batch_size: Optional[int] = Query(None, ge=1, le=10000),
+    job_id: Optional[str] = Query(None, max_length=64, description="Id to poll progress with"),
+    session: AsyncSession = Depends(get_db_session),
+    current_user: dict = Depends(get_current_admin)
+):
+    """Import products from a CSV request body, streamed in batches (admin only).
+    
+    Progress can be polled at /import/{job_id} while the upload is processed.
+    """
+    progress = ImportProgress(job_id=job_id) if job_id else ImportProgress()
+    await import_progress.put(progress)
+    try:
+        progress = await ImportService(session).import_products_from_stream(
+            request.stream(),
+            actor_user_id=current_user["id"],
+            batch_size=batch_size,
+            dry_run=dry_run,
+            progress=progress,
+            on_progress=import_progress.put
+        )
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8 encoded")
+    return progress.as_dict()
+
+
+@router.get("/import/{job_id}")
+async def get_import_progress(
+    job_id: str,
+    current_user: dict = Depends(get_current_admin)
+):
+    """Progress of a running or recently finished import (admin only)."""
+    progress = await import_progress.get(job_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return progress
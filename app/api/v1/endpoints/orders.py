@@ -1,15 +1,18 @@
 """Orders API endpoints."""
 
 import logging
+from datetime import date
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 logger = logging.getLogger(__name__)
 
-from app.api.v1.schemas import OrderCreate, OrderResponse, OrderUpdate
-from app.api.v1.dependencies import get_db_session, get_current_admin
+from app.api.v1.schemas import OrderBulkResult, OrderBulkUpdate, OrderCreate, OrderResponse, OrderUpdate
+from app.api.v1.dependencies import get_db_session, get_read_db_session, get_current_admin
+from app.services.export_service import CSV, EXPORT_FORMATS, PARQUET, parquet_available, stream_orders_export
 from app.services.order_service import OrderService
 from app.utils.enums import OrderStatus
 from app.utils.validators import Validators
@@ -23,7 +26,7 @@ async def get_orders(
     user_id: Optional[int] = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_read_db_session),
     current_user: dict = Depends(get_current_admin)
 ):
     """Get orders (admin only)."""
@@ -45,10 +48,34 @@ async def get_orders(
     return orders
 
 
+@router.get("/export")
+async def export_orders(
+    start_date: date,
+    end_date: date,
+    format: str = Query(CSV, description="csv or parquet"),
+    current_user: dict = Depends(get_current_admin)
+):
+    """Stream orders and their items created on local days start_date..end_date (admin only)."""
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end_date is before start_date")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Invalid format")
+    if format == PARQUET and not parquet_available():
+        raise HTTPException(status_code=400, detail="Parquet export requires pyarrow")
+    
+    filename = f"orders_{start_date.isoformat()}_{end_date.isoformat()}.{format}"
+    media_type = "text/csv; charset=utf-8" if format == CSV else "application/vnd.apache.parquet"
+    return StreamingResponse(
+        stream_orders_export(start_date, end_date, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
 @router.get("/{order_id}", response_model=OrderResponse)
 async def get_order(
     order_id: int,
-    session: AsyncSession = Depends(get_db_session),
+    session: AsyncSession = Depends(get_read_db_session),
     current_user: dict = Depends(get_current_admin)
 ):
     """Get order by ID (admin only)."""
@@ -94,6 +121,41 @@ async def create_order(
         raise HTTPException(status_code=400, detail="Failed to create order")
 
 
+@router.patch("/bulk", response_model=List[OrderBulkResult])
+async def bulk_update_orders(
+    bulk_update: OrderBulkUpdate,
+    session: AsyncSession = Depends(get_db_session),
+    current_user: dict = Depends(get_current_admin)
+):
+    """Transition several orders to the same status (admin only)."""
+    try:
+        new_status = OrderStatus(bulk_update.status)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid status")
+    
+    order_service = OrderService(session)
+    try:
+        results = await order_service.transition_many(
+            bulk_update.order_ids,
+            new_status,
+            changed_by_id=current_user["id"]
+        )
+    except Exception:
+        logger.exception("Failed to bulk update orders")
+        raise HTTPException(status_code=400, detail="Failed to update orders")
+    
+    return [
+        OrderBulkResult(
+            order_id=r.order_id,
+            success=r.success,
+            old_status=r.transition.old_status if r.transition else None,
+            new_status=r.transition.new_status if r.transition else None,
+            error=r.error
+        )
+        for r in results
+    ]
+
+
 @router.patch("/{order_id}", response_model=OrderResponse)
 async def update_order(
     order_id: int,
@@ -59,6 +59,24 @@ class ProductResponse(ProductBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ProductListItem(BaseModel):
+    """Product in list views; only requested fields are set when projecting."""
+    id: int
+    name: Optional[str] = None
+    description: Optional[str] = None
+    price: Optional[Decimal] = None
+    category_id: Optional[int] = None
+    sort_order: Optional[int] = None
+    is_active: Optional[bool] = None
+    is_archived: Optional[bool] = None
+    image_url: Optional[str] = None
+    created_at: Optional[datetime] = None
+    model_config = ConfigDict(from_attributes=True)
+
+
+PRODUCT_LIST_FIELDS = frozenset(ProductListItem.model_fields)
+
+
 # Order Item Schemas
 class OrderItemCreate(BaseModel):
     product_id: int
@@ -93,6 +111,19 @@ class OrderUpdate(BaseModel):
     courier_id: Optional[int] = None
 
 
+class OrderBulkUpdate(BaseModel):
+    order_ids: List[int] = Field(..., min_length=1, max_length=100)
+    status: str
+
+
+class OrderBulkResult(BaseModel):
+    order_id: int
+    success: bool
+    old_status: Optional[str] = None
+    new_status: Optional[str] = None
+    error: Optional[str] = None
+
+
 class OrderResponse(BaseModel):
     id: int
     order_number: str
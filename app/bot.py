@@ -6,6 +6,7 @@ import signal
 import sys
 
 from aiogram import Bot, Dispatcher
+from aiohttp import web
 
 from app.config import settings
 from app.database import close_db, init_db
@@ -33,6 +34,21 @@ async def main():
     await init_db()
     logger.info("Database initialized")
     
+    # Shared Redis pool (None when Redis is not configured or unreachable)
+    from app.redis_pool import close_redis, init_redis
+    redis_client = await init_redis()
+    if redis_client is None:
+        logger.warning("Running without Redis: carts and dialog states are kept in process memory")
+    
+    # Keep the menu snapshot in sync with other processes
+    from app.services.menu_cache import menu_cache
+    if redis_client is not None:
+        menu_cache.start(redis_client)
+    
+    # Cached identities for AuthMiddleware with write-behind of profile changes
+    from app.services.user_cache import user_cache
+    user_cache.start(redis_client)
+    
     # Register signal handlers using asyncio (cross-platform)
     loop = asyncio.get_event_loop()
     for sig in (signal.SIGTERM, signal.SIGINT):
@@ -46,35 +62,138 @@ async def main():
     if not settings.bot_token:
         raise RuntimeError("BOT_TOKEN is not set in environment")
     bot = Bot(token=settings.bot_token)
-    dp = Dispatcher()
+    dp = setup_dispatcher(redis_client)
+    
+    # Order notifications written by OrderService are sent from here, off the handler path
+    from app.services.outbox_dispatcher import outbox_dispatcher
+    outbox_dispatcher.start(bot)
+    
+    from app.middlewares.db import db_session_stats
+    stats_logger = None
+    if settings.db_session_stats_log_seconds > 0:
+        stats_logger = asyncio.create_task(_log_db_session_stats(settings.db_session_stats_log_seconds))
+    
+    try:
+        if settings.bot_mode == "webhook":
+            await run_webhook(bot, dp)
+        else:
+            await run_polling(bot, dp)
+    except Exception as e:
+        logger.error(f"Bot error: {e}")
+    finally:
+        # Cleanup
+        if stats_logger is not None:
+            stats_logger.cancel()
+        await outbox_dispatcher.stop()
+        await bot.session.close()
+        await menu_cache.stop()
+        await user_cache.stop()
+        logger.info("DB session usage: %s", db_session_stats.as_dict())
+        await close_redis()
+        await close_db()
+        logger.info("Bot shutdown complete")
+
+
+def setup_dispatcher(redis_client=None) -> Dispatcher:
+    """Dispatcher with all middlewares and routers, shared by polling and webhook mode."""
+    from app.services.fsm_storage import create_fsm_storage
+    
+    # Dialog states live in Redis so a checkout survives restarts and can move between replicas
+    dp = Dispatcher(storage=create_fsm_storage(redis_client))
     
     # Register all handlers
     from app.handlers import get_all_routers
     from app.middlewares.db import DBSessionMiddleware
     from app.middlewares.auth import AuthMiddleware
+    from app.middlewares.ordering import ChatOrderingMiddleware
+    from app.middlewares.redis import RedisMiddleware
+    from app.middlewares.throttling import ThrottlingMiddleware
+    from app.services.chat_lock import ChatLock
+    from app.services.rate_limiter import TokenBucketLimiter
     
     # Register middlewares
-    dp.update.middleware(DBSessionMiddleware())
-    dp.update.middleware(AuthMiddleware())
+    # Outermost: updates of one chat wait for each other, also across replicas
+    dp.update.outer_middleware(ChatOrderingMiddleware(ChatLock(redis_client)))
+    dp.update.middleware(RedisMiddleware(redis_client))
+    # Mounted per event type so handler flags (db=False, throttle) are visible
+    db_middleware = DBSessionMiddleware()
+    auth_middleware = AuthMiddleware()
+    # Buckets live in Redis so limits hold across bot replicas
+    throttling_middleware = ThrottlingMiddleware(TokenBucketLimiter(redis_client))
+    for observer in (dp.message, dp.callback_query):
+        observer.middleware(db_middleware)
+        observer.middleware(auth_middleware)
+        observer.middleware(throttling_middleware)
     
     # Register all routers
-    for router in get_all_routers():
+    routers = get_all_routers()
+    for router in routers:
         dp.include_router(router)
     
-    logger.info("Registered %d routers", len(get_all_routers()))
-    
+    logger.info("Registered %d routers", len(routers))
+    return dp
+
+
+async def run_polling(bot: Bot, dp: Dispatcher) -> None:
+    """Long polling; Telegram allows only one polling process per token."""
+    # A webhook left over from webhook mode would make getUpdates fail
+    await bot.delete_webhook()
     logger.info("Bot starting polling...")
+    await dp.start_polling(bot)
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher) -> None:
+    """Serve Telegram webhook requests until shutdown; any number of replicas may run this."""
+    from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+    
+    if not settings.webhook_secret:
+        raise RuntimeError("WEBHOOK_SECRET is not set in environment")
+    
+    app = web.Application()
+    # Requests without the secret token header are rejected with 401
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=settings.webhook_secret,
+        handle_in_background=settings.webhook_handle_in_background
+    ).register(app, path=settings.webhook_path)
+    app.router.add_get("/health", _health)
+    setup_application(app, dp, bot=bot)
+    
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, settings.webhook_host, settings.webhook_port)
+    await site.start()
+    logger.info(f"Bot webhook listening on {settings.webhook_host}:{settings.webhook_port}{settings.webhook_path}")
     
     try:
-        # Start polling
-        await dp.start_polling(bot)
-    except Exception as e:
-        logger.error(f"Bot error: {e}")
+        # Every replica registers the same URL, so this is idempotent; the webhook is
+        # left in place on shutdown because the other replicas keep serving it
+        if settings.webhook_base_url:
+            await bot.set_webhook(
+                url=settings.webhook_base_url.rstrip("/") + settings.webhook_path,
+                secret_token=settings.webhook_secret,
+                allowed_updates=dp.resolve_used_update_types(),
+                max_connections=settings.webhook_max_connections
+            )
+        await shutdown_event.wait()
     finally:
-        # Cleanup
-        await bot.session.close()
-        await close_db()
-        logger.info("Bot shutdown complete")
+        await runner.cleanup()
+
+
+async def _health(request: web.Request) -> web.Response:
+    from app.middlewares.db import db_session_stats
+    
+    return web.json_response({"status": "ok", "db_sessions": db_session_stats.as_dict()})
+
+
+async def _log_db_session_stats(interval: float) -> None:
+    """Log DB session usage every interval seconds while the bot runs."""
+    from app.middlewares.db import db_session_stats
+    
+    while True:
+        await asyncio.sleep(interval)
+        logger.info("DB session usage: %s", db_session_stats.as_dict())
 
 
 if __name__ == "__main__":
@@ -1,6 +1,6 @@
 """Application configuration using Pydantic Settings."""
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 import json
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -20,9 +20,24 @@ class Settings(BaseSettings):
 
     # Database Configuration
     database_url: Optional[str] = Field(default=None, description="PostgreSQL connection URL")
+    database_read_url: Optional[str] = Field(
+        default=None,
+        description="Optional read replica URL for read-only services, menu reads and order lists"
+    )
+    db_pool_size: int = Field(default=10, description="Connections kept open per engine and process")
+    db_max_overflow: int = Field(default=20, description="Extra connections allowed above db_pool_size")
+    db_pool_timeout: float = Field(default=30.0, description="Seconds to wait for a free connection")
+    db_pool_recycle: int = Field(default=1800, description="Reconnect connections older than this many seconds (-1 disables)")
+    db_pool_pre_ping: bool = Field(default=True, description="Check connections on checkout")
+    db_statement_cache_size: Optional[int] = Field(
+        default=None,
+        description="asyncpg prepared statement cache size (0 behind PgBouncer; None keeps the driver default)"
+    )
 
     # Redis Configuration
     redis_url: Optional[str] = Field(default=None, description="Redis connection URL")
+    redis_max_connections: int = Field(default=50, description="Max connections in the shared Redis pool")
+    redis_pool_timeout: float = Field(default=5.0, description="Seconds to wait for a free pooled Redis connection")
 
     # Security
     secret_key: Optional[str] = Field(default=None, min_length=32, description="Secret key for JWT and encryption")
@@ -38,6 +53,128 @@ class Settings(BaseSettings):
     # Timezone
     timezone: str = Field(default="Europe/Moscow", description="Application timezone")
 
+    # Order numbers
+    order_number_backend: str = Field(
+        default="upsert",
+        description="Order number allocator: upsert, sequence or redis"
+    )
+
+    # Cart storage
+    cart_ttl_seconds: int = Field(default=86400, description="Cart lifetime since last change")
+    cart_memory_max_users: int = Field(
+        default=10000,
+        description="Max carts kept by the in-process store used when Redis is unavailable"
+    )
+
+    # Bot dialog (FSM) state: checkout and staff forms
+    fsm_state_ttl_seconds: int = Field(
+        default=6 * 3600,
+        description="Lifetime of a dialog state since its last change; abandoned checkouts expire"
+    )
+
+    # Menu cache
+    menu_cache_ttl_seconds: int = Field(
+        default=300,
+        description="Max age of the in-process menu snapshot (safety net for missed invalidations)"
+    )
+    menu_http_max_age: int = Field(
+        default=30,
+        description="Cache-Control max-age for public menu endpoints"
+    )
+
+    # User identity cache (AuthMiddleware)
+    user_cache_ttl_seconds: int = Field(
+        default=60,
+        description="How long a cached role/active flag may be served before re-reading the user"
+    )
+    user_cache_max_size: int = Field(default=10000, description="Max identities kept in process memory")
+    user_profile_flush_seconds: float = Field(
+        default=5.0,
+        description="Interval of the background write of changed Telegram profile fields"
+    )
+
+    # Bot update delivery: "polling" (single process) or "webhook" (any number of replicas)
+    bot_mode: str = Field(default="polling", description="How the bot receives updates: polling or webhook")
+    webhook_base_url: Optional[str] = Field(
+        default=None,
+        description="Public HTTPS origin Telegram posts updates to; registered on startup when set"
+    )
+    webhook_path: str = Field(default="/telegram/webhook", description="Path of the webhook receiver")
+    webhook_secret: Optional[str] = Field(
+        default=None,
+        description="X-Telegram-Bot-Api-Secret-Token expected on webhook requests (A-Z, a-z, 0-9, _ and -)"
+    )
+    webhook_host: str = Field(default="0.0.0.0", description="Interface the webhook receiver listens on")
+    webhook_port: int = Field(default=8080, description="Port the webhook receiver listens on")
+    webhook_max_connections: int = Field(
+        default=40,
+        description="Concurrent connections Telegram opens to the webhook, shared by all replicas"
+    )
+    webhook_handle_in_background: bool = Field(
+        default=True,
+        description="Answer Telegram before processing; disable to make responses wait for handlers"
+    )
+    chat_lock_ttl_seconds: float = Field(
+        default=30.0,
+        description="Longest time one update may keep its chat locked"
+    )
+    chat_lock_wait_seconds: float = Field(
+        default=30.0,
+        description="Longest wait for earlier updates of a chat before processing out of order"
+    )
+    db_session_stats_log_seconds: float = Field(
+        default=300.0,
+        description="Interval of the bot's DB session usage log line; 0 disables it"
+    )
+
+    # Bot throttling: "rate/burst" per "<role>:<action>", "<role>", "<action>" or "default"; "off" disables
+    throttle_limits: Dict[str, str] = Field(
+        default_factory=lambda: {
+            "default": "2/10",
+            "checkout": "0.5/3",
+            "admin": "off",
+            "manager": "off",
+            "kitchen": "off",
+            "packer": "off",
+            "courier": "off",
+        },
+        description="Token-bucket limits for bot updates (JSON object in the environment)"
+    )
+    throttle_max_local_keys: int = Field(
+        default=10000,
+        description="Buckets kept in process memory when Redis is unavailable"
+    )
+
+    # Notification outbox (drained by the bot process)
+    outbox_batch_size: int = Field(default=100, description="Outbox rows claimed and sent per batch")
+    outbox_poll_seconds: float = Field(default=1.0, description="Pause between outbox polls when it is drained")
+    outbox_max_attempts: int = Field(default=8, description="Sends of one notification before it is marked failed")
+    outbox_retry_base_seconds: float = Field(
+        default=5.0,
+        description="Delay before the first retry; doubles with every further attempt"
+    )
+    outbox_retry_max_seconds: float = Field(default=900.0, description="Upper bound of the retry delay")
+    outbox_lease_seconds: float = Field(
+        default=60.0,
+        description="How long a claimed batch is hidden from other dispatchers"
+    )
+
+    # Menu import
+    import_batch_size: int = Field(
+        default=1000,
+        description="Rows validated and inserted per batch by streaming CSV imports"
+    )
+
+    # Reports (Celery)
+    report_cache_ttl_seconds: int = Field(
+        default=35 * 86400,
+        description="How long rendered daily and weekly reports stay in Redis"
+    )
+    report_backfill_chunk_days: int = Field(
+        default=7,
+        description="Days rebuilt by one backfill task; chunks run in parallel across workers"
+    )
+
     # Backup Configuration
     backup_enabled: bool = Field(default=True)
     backup_cron: str = Field(default="0 2 * * *")
@@ -1,55 +1,125 @@
 """Database configuration and session management."""
 
-from typing import AsyncGenerator, cast
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncGenerator
 import logging
+import time
 
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 import os
 from app.config import settings
 
+
+@dataclass
+class PoolStats:
+    """Connection checkout counters of one engine."""
+
+    checkouts: int = 0
+    timeouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+    def record(self, waited: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += waited
+        self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that measures how long checkouts wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            self.stats.timeouts += 1
+            raise
+        self.stats.record(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+def _create_engine(url: str):
+    """Engine with pool settings taken from Settings."""
+    connect_args = {}
+    if settings.db_statement_cache_size is not None and "+asyncpg" in url:
+        # 0 is required behind PgBouncer in transaction pooling mode
+        connect_args["statement_cache_size"] = settings.db_statement_cache_size
+    return create_async_engine(
+        url,
+        echo=False,
+        future=True,
+        poolclass=TimedQueuePool,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        connect_args=connect_args
+    )
+
+
+def _session_factory(bind):
+    return async_sessionmaker(
+        bind,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autoflush=False
+    )
+
+
 # Create async engine with safe fallback for test environments without optional DB adapters
-if os.environ.get("TESTING", "0") == "1":
-    engine = None
-    AsyncSessionLocal = None  # type: ignore
-else:
+engine = None
+read_engine = None
+AsyncSessionLocal = None  # type: ignore
+ReadSessionLocal = None  # type: ignore
+if os.environ.get("TESTING", "0") != "1":
     try:
         # Create async engine
         db_url = settings.database_url
         if not db_url:
             raise RuntimeError("DATABASE_URL is not set")
-        engine = create_async_engine(
-            db_url,
-            echo=False,
-            future=True,
-            pool_pre_ping=True,
-            pool_size=10,
-            max_overflow=20
-        )
+        engine = _create_engine(db_url)
+        AsyncSessionLocal = _session_factory(engine)
 
-        # Create async session factory
-        AsyncSessionLocal = async_sessionmaker(
-            engine,
-            class_=AsyncSession,
-            expire_on_commit=False,
-            autoflush=False
-        )
+        # Read-only traffic goes to the replica when one is configured
+        if settings.database_read_url:
+            read_engine = _create_engine(settings.database_read_url)
+            ReadSessionLocal = _session_factory(read_engine)
+        else:
+            read_engine = engine
+            ReadSessionLocal = AsyncSessionLocal
     except Exception:
         engine = None
+        read_engine = None
         AsyncSessionLocal = None  # type: ignore
+        ReadSessionLocal = None  # type: ignore
 
 # Base class for models
 Base = declarative_base()
 logger = logging.getLogger(__name__)
 
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    """Dependency for getting database session."""
-    if AsyncSessionLocal is None:
+async def _yield_session(factory) -> AsyncGenerator[AsyncSession, None]:
+    if factory is None:
         class _DummyResult:
             def scalar(self):
                 return None
+            def all(self):
+                return []
             def scalars(self):
                 class _Scalar:
                     def all(self):
@@ -76,12 +146,59 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
         dummy = _DummySession()
         yield dummy  # type: ignore[no-redef]
         return
-    async with AsyncSessionLocal() as session:
+    async with factory() as session:
         try:
             yield session
         finally:
             await session.close()
 
+
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency for getting database session."""
+    async for session in _yield_session(AsyncSessionLocal):
+        yield session
+
+
+async def get_read_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency for a read-only session (replica when configured, otherwise primary)."""
+    async for session in _yield_session(ReadSessionLocal):
+        yield session
+
+
+@asynccontextmanager
+async def read_session() -> AsyncGenerator[AsyncSession, None]:
+    """Read-only session for services and tasks outside request handling."""
+    if ReadSessionLocal is None:
+        raise RuntimeError("Database is not configured")
+    async with ReadSessionLocal() as session:
+        yield session
+
+
+def pool_metrics() -> dict:
+    """Checkout wait time and saturation of the connection pools."""
+    metrics = {}
+    engines = [("primary", engine)]
+    if read_engine is not None and read_engine is not engine:
+        engines.append(("replica", read_engine))
+    for name, eng in engines:
+        if eng is None:
+            continue
+        pool = eng.pool
+        stats = getattr(pool, "stats", PoolStats())
+        capacity = settings.db_pool_size + max(settings.db_max_overflow, 0)
+        checked_out = pool.checkedout()
+        metrics[name] = {
+            "size": pool.size(),
+            "checked_out": checked_out,
+            "overflow": pool.overflow(),
+            "saturation": round(checked_out / capacity, 4) if capacity else 0.0,
+            "checkouts": stats.checkouts,
+            "timeouts": stats.timeouts,
+            "wait_seconds_avg": round(stats.wait_seconds_total / stats.checkouts, 6) if stats.checkouts else 0.0,
+            "wait_seconds_max": round(stats.wait_seconds_max, 6)
+        }
+    return metrics
+
 async def init_db():
     """Initialize database tables and seed initial data if needed."""
     if engine is None:
@@ -91,7 +208,8 @@ async def init_db():
         from app.models import (
             user, category, product, modifier, 
             order, order_item, settings as settings_model,
-            promo_code, delivery_zone, review, daily_counter
+            promo_code, delivery_zone, review, daily_counter, daily_stats,
+            notification_outbox
         )
         await conn.run_sync(Base.metadata.create_all)
 
@@ -114,6 +232,8 @@ async def init_db():
 
 async def close_db():
     """Close database connections."""
+    if read_engine is not None and read_engine is not engine:
+        await read_engine.dispose()
     if engine is None:
         return
     await engine.dispose()
@@ -1,14 +1,37 @@
 """Admin handlers for admin workflow."""
 
+import os
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Optional
+
 from aiogram import Router, F
-from aiogram.types import CallbackQuery
+from aiogram.filters import Command, CommandObject
+from aiogram.types import CallbackQuery, FSInputFile, Message
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.models.category import Category
+from app.services.import_progress import ImportProgress
+from app.services.import_service import ImportService
+from app.services.user_cache import UserIdentity
+from app.services.export_service import CSV, EXPORT_FORMATS, PARQUET, parquet_available, stream_orders_export
+from app.services.report_cache import BUILDERS, DAILY, WEEKLY, ReportCache
+from app.utils.time import today
 
 router = Router()
 
+# Telegram rejects bot uploads above 50 MB
+MAX_EXPORT_UPLOAD_BYTES = 50 * 1024 * 1024
+
+# Telegram limits how often a message may be edited
+IMPORT_PROGRESS_INTERVAL = 3.0
+
+EXPORT_USAGE = "Использование: /export_orders ГГГГ-ММ-ДД ГГГГ-ММ-ДД [csv|parquet]"
+
+REPORT_USAGE = "Использование: /report [daily|weekly] [ГГГГ-ММ-ДД]"
+
 
 @router.callback_query(F.data.startswith("edit_category:"))
 async def edit_category(callback: CallbackQuery, session: AsyncSession) -> None:
@@ -39,3 +62,148 @@ async def edit_category(callback: CallbackQuery, session: AsyncSession) -> None:
         InlineKeyboardButton(text="◀️ Назад", callback_data="admin:menu")
     ]])
     await callback.message.edit_text(text, reply_markup=kb)
+
+
+@router.message(Command("export_orders"))
+async def export_orders(message: Message, command: CommandObject, is_admin: bool = False) -> None:
+    """Send orders of a date range as a CSV or Parquet document."""
+    if not is_admin:
+        await message.answer("Недостаточно прав")
+        return
+
+    args = (command.args or "").split()
+    try:
+        start_date = date.fromisoformat(args[0])
+        end_date = date.fromisoformat(args[1])
+    except (IndexError, ValueError):
+        await message.answer(EXPORT_USAGE)
+        return
+    export_format = args[2].lower() if len(args) > 2 else CSV
+    if export_format not in EXPORT_FORMATS or end_date < start_date:
+        await message.answer(EXPORT_USAGE)
+        return
+    if export_format == PARQUET and not parquet_available():
+        await message.answer("Экспорт в Parquet недоступен: не установлен pyarrow")
+        return
+
+    await message.answer("⏳ Формирую выгрузку...")
+    # Stream to disk so memory stays flat regardless of the number of rows
+    fd, path = tempfile.mkstemp(suffix=f".{export_format}")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            async for chunk in stream_orders_export(start_date, end_date, export_format):
+                file.write(chunk)
+        if os.path.getsize(path) > MAX_EXPORT_UPLOAD_BYTES:
+            await message.answer(
+                "Выгрузка больше 50 МБ. Сократите период или используйте /api/v1/orders/export"
+            )
+            return
+        filename = f"orders_{start_date.isoformat()}_{end_date.isoformat()}.{export_format}"
+        await message.answer_document(FSInputFile(path, filename=filename))
+    finally:
+        os.unlink(path)
+
+
+def _report_text(kind: str, day: date, report: dict) -> str:
+    if kind == WEEKLY:
+        start = day - timedelta(days=6)
+        lines = [f"📊 Отчёт за {start:%d.%m.%Y} – {day:%d.%m.%Y}"]
+    else:
+        lines = [f"📊 Отчёт за {day:%d.%m.%Y}"]
+    lines.append(f"Заказов: {report['total_orders']}")
+    lines.append(f"Выручка: {report['total_revenue']:.2f} ₽")
+    if kind == DAILY:
+        lines.append(f"Средний чек: {report['average_order_value']:.2f} ₽")
+        lines.append(f"Отменено: {report['cancelled_orders']}")
+    if report["top_products"]:
+        lines.append("")
+        lines.append("Топ товаров:")
+        for i, product in enumerate(report["top_products"], 1):
+            lines.append(f"{i}. {product['product_name']} — {product['total_quantity']} шт.")
+    return "\n".join(lines)
+
+
+@router.message(Command("report"))
+async def stats_report(
+    message: Message,
+    command: CommandObject,
+    session: AsyncSession,
+    redis=None,
+    is_admin: bool = False
+) -> None:
+    """Send a daily or weekly report (defaults to yesterday), from the cache when precomputed."""
+    if not is_admin:
+        await message.answer("Недостаточно прав")
+        return
+
+    args = (command.args or "").split()
+    kind = args[0].lower() if args else DAILY
+    try:
+        day = date.fromisoformat(args[1]) if len(args) > 1 else today() - timedelta(days=1)
+    except ValueError:
+        await message.answer(REPORT_USAGE)
+        return
+    if kind not in BUILDERS:
+        await message.answer(REPORT_USAGE)
+        return
+
+    report = await ReportCache(redis).get_or_build(session, kind, day)
+    await message.answer(_report_text(kind, day, report))
+
+
+def _import_progress_text(progress: ImportProgress) -> str:
+    mode = " (проверка)" if progress.dry_run else ""
+    if not progress.done:
+        return f"⏳ Импорт товаров{mode}: обработано строк {progress.rows}, ошибок {progress.error_count}"
+    if not progress.success:
+        errors = "\n".join(progress.errors[:20])
+        more = progress.error_count - min(len(progress.errors), 20)
+        tail = f"\n...и ещё {more}" if more > 0 else ""
+        return f"❌ Импорт отменён{mode}: строк {progress.rows}, ошибок {progress.error_count}\n{errors}{tail}"
+    if progress.dry_run:
+        return f"✅ Проверка пройдена: строк {progress.rows}, готово к импорту {progress.valid}"
+    return f"✅ Импортировано товаров: {progress.imported}"
+
+
+@router.message(F.document, F.caption.startswith("/import_products"))
+async def import_products(
+    message: Message,
+    session: AsyncSession,
+    user: Optional[UserIdentity] = None,
+    is_admin: bool = False
+) -> None:
+    """Import products from an attached CSV, streaming the download.
+
+    Add "dry" to the caption to validate without writing.
+    """
+    if not is_admin or user is None:
+        await message.answer("Недостаточно прав")
+        return
+
+    dry_run = "dry" in message.caption.split()[1:]
+    status = await message.answer("⏳ Импорт товаров...")
+    last_update = time.monotonic()
+
+    async def on_progress(progress: ImportProgress) -> None:
+        nonlocal last_update
+        if not progress.done and time.monotonic() - last_update < IMPORT_PROGRESS_INTERVAL:
+            return
+        last_update = time.monotonic()
+        try:
+            await status.edit_text(_import_progress_text(progress))
+        except Exception:
+            # Unchanged text or rate limits must not abort the import
+            pass
+
+    bot = message.bot
+    file = await bot.get_file(message.document.file_id)
+    url = bot.session.api.file_url(bot.token, file.file_path)
+    try:
+        await ImportService(session).import_products_from_stream(
+            bot.session.stream_content(url, chunk_size=65536, raise_for_status=True),
+            actor_user_id=user.id,
+            dry_run=dry_run,
+            on_progress=on_progress
+        )
+    except UnicodeDecodeError:
+        await status.edit_text("❌ Файл должен быть в кодировке UTF-8")
@@ -20,6 +20,7 @@ from app.keyboards.client import (
     get_categories_keyboard,
     get_products_keyboard,
     get_product_detail_keyboard,
+    get_modifier_options_keyboard,
     get_cart_keyboard,
     get_checkout_keyboard,
     get_payment_methods_keyboard,
@@ -112,7 +113,7 @@ async def show_product(callback: CallbackQuery, session: AsyncSession):
     menu_service = MenuService(session)
     
     try:
-        product = await menu_service.get_product_by_id(product_id)
+        product = await menu_service.get_menu_product(product_id)
         
         text = Templates.product_details(
             name=product.name,
@@ -148,18 +149,79 @@ async def back_to_category(callback: CallbackQuery, session: AsyncSession):
         await callback.answer("В этой категории пока ничего нет", show_alert=True)
 
 @router.callback_query(F.data.startswith("add_to_cart:"))
-async def add_to_cart(callback: CallbackQuery, session: AsyncSession, user: User):
-    """Add product to cart."""
+async def add_to_cart(callback: CallbackQuery, state: FSMContext, session: AsyncSession, user: User, redis=None):
+    """Add product to cart, first asking for an option of each required modifier.
+    
+    Callback data is add_to_cart:<product id>; options chosen on the way are kept
+    in FSM data, since Telegram limits callback data to 64 bytes.
+    """
     data = callback.data or ""
     parts = data.split(":")
-    if len(parts) < 2:
+    if len(parts) != 2:
+        await callback.answer("Неверные данные", show_alert=True)
+        return
+    try:
+        product_id = int(parts[1])
+    except ValueError:
+        await callback.answer("Неверные данные", show_alert=True)
+        return
+    
+    await state.update_data(modifier_selection={"product_id": product_id, "option_ids": []})
+    await _continue_add_to_cart(callback, state, session, user, redis, product_id, [])
+
+
+@router.callback_query(F.data.startswith("modifier_option:"))
+async def choose_modifier_option(callback: CallbackQuery, state: FSMContext, session: AsyncSession, user: User, redis=None):
+    """Remember a chosen modifier option and ask for the next required modifier.
+    
+    Callback data is modifier_option:<product id>:<option id>.
+    """
+    data = callback.data or ""
+    parts = data.split(":")
+    if len(parts) != 3:
+        await callback.answer("Неверные данные", show_alert=True)
+        return
+    try:
+        product_id = int(parts[1])
+        option_id = int(parts[2])
+    except ValueError:
         await callback.answer("Неверные данные", show_alert=True)
         return
-    product_id = int(parts[1])
-    cart_service = CartService(session)
     
+    # A keyboard left over from another product starts a fresh selection
+    selection = (await state.get_data()).get("modifier_selection") or {}
+    option_ids = list(selection.get("option_ids") or []) if selection.get("product_id") == product_id else []
+    if option_id not in option_ids:
+        option_ids.append(option_id)
+    await state.update_data(modifier_selection={"product_id": product_id, "option_ids": option_ids})
+    await _continue_add_to_cart(callback, state, session, user, redis, product_id, option_ids)
+
+
+async def _continue_add_to_cart(
+    callback: CallbackQuery,
+    state: FSMContext,
+    session: AsyncSession,
+    user: User,
+    redis,
+    product_id: int,
+    option_ids: list
+) -> None:
+    """Ask for the first required modifier still unanswered, else add to cart."""
     try:
-        await cart_service.add_item(user.id, product_id)
+        menu_service = MenuService(session)
+        for modifier in await menu_service.get_menu_product_modifiers(product_id):
+            if modifier.is_required and not any(o.id in option_ids for o in modifier.options):
+                product = await menu_service.get_menu_product(product_id)
+                await callback.answer()
+                await callback.message.edit_text(
+                    f"{product.name}\n\nВыберите: {modifier.name}",
+                    reply_markup=get_modifier_options_keyboard(product, modifier)
+                )
+                return
+        
+        cart_service = CartService(session, redis)
+        await cart_service.add_item(user.id, product_id, modifier_option_ids=option_ids)
+        await state.update_data(modifier_selection=None)
         await callback.answer("✅ Добавлено в корзину!")
     except Exception as e:
         await callback.answer(f"❌ Ошибка: {str(e)}", show_alert=True)
@@ -167,7 +229,7 @@ async def add_to_cart(callback: CallbackQuery, session: AsyncSession, user: User
 
 # Cart
 @router.message(F.text == "🛒 Корзина")
-async def show_cart(message: Message, session: AsyncSession, user: Optional[User] = None):
+async def show_cart(message: Message, session: AsyncSession, user: Optional[User] = None, redis=None):
     """Show cart contents."""
     if user is None:
         telegram_user = getattr(message, "from_user", None)
@@ -181,7 +243,7 @@ async def show_cart(message: Message, session: AsyncSession, user: Optional[User
         else:
             await message.answer("Пожалуйста, начните с /start и создайте профиль, чтобы использовать корзину.")
             return
-    cart_service = CartService(session)
+    cart_service = CartService(session, redis)
     cart_summary = await cart_service.get_cart_summary(user.id)  # type: ignore[arg-type]
     
     if not cart_summary["items"]:
@@ -206,9 +268,9 @@ async def show_cart(message: Message, session: AsyncSession, user: Optional[User
 
 
 @router.callback_query(F.data == "view_cart")
-async def view_cart_callback(callback: CallbackQuery, session: AsyncSession, user: User):
+async def view_cart_callback(callback: CallbackQuery, session: AsyncSession, user: User, redis=None):
     """View cart from callback."""
-    cart_service = CartService(session)
+    cart_service = CartService(session, redis)
     cart_summary = await cart_service.get_cart_summary(user.id)
     
     if not cart_summary["items"]:
@@ -233,18 +295,18 @@ async def view_cart_callback(callback: CallbackQuery, session: AsyncSession, use
 
 
 @router.callback_query(F.data == "clear_cart")
-async def clear_cart(callback: CallbackQuery, session: AsyncSession, user: User):
+async def clear_cart(callback: CallbackQuery, session: AsyncSession, user: User, redis=None):
     """Clear cart."""
-    cart_service = CartService(session)
+    cart_service = CartService(session, redis)
     await cart_service.clear_cart(user.id)
     await callback.answer("🗑 Корзина очищена")
     await callback.message.edit_text(Templates.empty_cart())
 
 
-@router.callback_query(F.data == "checkout")
-async def start_checkout(callback: CallbackQuery, state: FSMContext, session: AsyncSession, user: User):
+@router.callback_query(F.data == "checkout", flags={"throttle": "checkout"})
+async def start_checkout(callback: CallbackQuery, state: FSMContext, session: AsyncSession, user: User, redis=None):
     """Start checkout process."""
-    cart_service = CartService(session)
+    cart_service = CartService(session, redis)
     cart_summary = await cart_service.get_cart_summary(user.id)
     
     if not cart_summary["items"]:
@@ -258,7 +320,7 @@ async def start_checkout(callback: CallbackQuery, state: FSMContext, session: As
     )
 
 
-@router.message(ClientStates.checkout_entering_phone)
+@router.message(ClientStates.checkout_entering_phone, flags={"db": False})
 async def process_phone(message: Message, state: FSMContext):
     """Process phone number."""
     try:
@@ -273,7 +335,7 @@ async def process_phone(message: Message, state: FSMContext):
         await message.answer(f"❌ {str(e)}. Попробуйте еще раз:")
 
 
-@router.message(ClientStates.checkout_entering_address)
+@router.message(ClientStates.checkout_entering_address, flags={"db": False})
 async def process_address(message: Message, state: FSMContext):
     """Process delivery address."""
     try:
@@ -307,14 +369,16 @@ async def process_comment(message: Message, state: FSMContext, session):
     )
 
 
-@router.callback_query(ClientStates.checkout_confirming, F.data.startswith("payment:"))
-async def process_payment(callback: CallbackQuery, state: FSMContext, session, user):
+@router.callback_query(
+    ClientStates.checkout_confirming, F.data.startswith("payment:"), flags={"throttle": "checkout"}
+)
+async def process_payment(callback: CallbackQuery, state: FSMContext, session, user, redis=None):
     """Process payment method and create order."""
     payment_method = callback.data.split(":")[1]
     data = await state.get_data()
     
-    cart_service = CartService(session)
-    order_service = OrderService(session)
+    cart_service = CartService(session, redis)
+    order_service = OrderService(session, redis)
     
     # Get cart items
     cart_summary = await cart_service.get_cart_summary(user.id)
@@ -48,7 +48,7 @@ async def cmd_start(message: Message, session: AsyncSession, user: Optional[User
     )
 
 
-@router.message(Command("help"))
+@router.message(Command("help"), flags={"db": False})
 async def cmd_help(message: Message):
     """Handle /help command."""
     await message.answer(Templates.help_message())
@@ -116,8 +116,8 @@ async def back_callback(callback: CallbackQuery, state: FSMContext, user: Option
         )
 
 
-@router.message(Command("cancel"))
-@router.message(F.text == "❌ Отмена")
+@router.message(Command("cancel"), flags={"db": False})
+@router.message(F.text == "❌ Отмена", flags={"db": False})
 async def cmd_cancel(message: Message, state: FSMContext):
     """Cancel current operation."""
     current_state = await state.get_state()
@@ -118,7 +118,7 @@ async def take_order(callback: CallbackQuery, session: AsyncSession, user: User)
         await order_service.assign_courier(order_id, user.id, user.id)
         
         # Transition to ASSIGNED
-        await order_service.transition_status(
+        await order_service.advance_status(
             order_id=order_id,
             new_status=OrderStatus.ASSIGNED,
             changed_by_id=user.id
@@ -136,7 +136,7 @@ async def start_delivery(callback: CallbackQuery, session: AsyncSession, user: U
     order_service = OrderService(session)
     
     try:
-        await order_service.transition_status(
+        await order_service.advance_status(
             order_id=order_id,
             new_status=OrderStatus.IN_DELIVERY,
             changed_by_id=user.id
@@ -153,7 +153,7 @@ async def mark_delivered(callback: CallbackQuery, session: AsyncSession, user: U
     order_service = OrderService(session)
     
     try:
-        await order_service.transition_status(
+        await order_service.advance_status(
             order_id=order_id,
             new_status=OrderStatus.DELIVERED,
             changed_by_id=user.id
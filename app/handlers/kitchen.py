@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from app.models.user import User
 
+from app.keyboards.staff import displayed_order_ids
 from app.services.order_service import OrderService
 from app.utils.enums import OrderStatus
 from app.utils.formatters import Formatters
@@ -94,7 +95,7 @@ async def start_cooking(callback: CallbackQuery, session: AsyncSession, user: Us
     order_service = OrderService(session)
     
     try:
-        await order_service.transition_status(
+        await order_service.advance_status(
             order_id=order_id,
             new_status=OrderStatus.IN_PROGRESS,
             changed_by_id=user.id
@@ -111,7 +112,7 @@ async def mark_ready(callback: CallbackQuery, session: AsyncSession, user):
     order_service = OrderService(session)
     
     try:
-        await order_service.transition_status(
+        await order_service.advance_status(
             order_id=order_id,
             new_status=OrderStatus.READY,
             changed_by_id=user.id
@@ -121,6 +122,30 @@ async def mark_ready(callback: CallbackQuery, session: AsyncSession, user):
         await callback.answer(f"❌ Ошибка: {str(e)}", show_alert=True)
 
 
+@router.callback_query(F.data.in_({"kitchen:start_all", "kitchen:ready_all"}))
+async def bulk_advance(callback: CallbackQuery, session: AsyncSession, user: User) -> None:
+    """Start cooking or mark ready exactly the orders listed on the tapped message."""
+    if callback.data == "kitchen:start_all":
+        new_status = OrderStatus.IN_PROGRESS
+    else:
+        new_status = OrderStatus.READY
+    order_service = OrderService(session)
+    
+    try:
+        # Orders that arrived after the list was shown are not touched
+        order_ids = displayed_order_ids(callback.message.reply_markup, "kitchen:order:")
+        results = await order_service.transition_many(order_ids, new_status, changed_by_id=user.id)
+        done = sum(1 for r in results if r.success)
+        await callback.answer(f"✅ Обновлено заказов: {done} из {len(results)}")
+        await callback.message.edit_text(
+            "👨‍🍳 <b>Панель кухни</b>\n\n"
+            "Выберите действие:",
+            reply_markup=get_kitchen_keyboard()
+        )
+    except Exception as e:
+        await callback.answer(f"❌ Ошибка: {str(e)}", show_alert=True)
+
+
 def get_kitchen_keyboard() -> InlineKeyboardMarkup:
     """Get kitchen main keyboard."""
     from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
@@ -144,6 +169,12 @@ def get_kitchen_orders_keyboard(orders, show_ready=False) -> InlineKeyboardMarku
             callback_data=f"kitchen:order:{order.id}"
         )])
     
+    if len(orders) > 1:
+        if show_ready:
+            buttons.append([InlineKeyboardButton(text="🔥 Все готовы", callback_data="kitchen:ready_all")])
+        else:
+            buttons.append([InlineKeyboardButton(text="▶️ Начать все", callback_data="kitchen:start_all")])
+    
     buttons.append([InlineKeyboardButton(text="◀️ Назад", callback_data="back")])
     
     return InlineKeyboardMarkup(inline_keyboard=buttons)
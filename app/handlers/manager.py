@@ -8,7 +8,6 @@ from aiogram.fsm.context import FSMContext
 
 from app.services.order_service import OrderService
 from app.utils.enums import UserRole
-from app.services.notification_service import NotificationService
 from app.utils.enums import OrderStatus
 from app.utils.formatters import Formatters
 from app.states.staff import ManagerStates
@@ -82,17 +81,14 @@ async def confirm_order(callback: CallbackQuery, session: AsyncSession, user: Us
     order_service = OrderService(session)
     
     try:
-        order = await order_service.transition_status(
+        await order_service.advance_status(
             order_id=order_id,
             new_status=OrderStatus.CONFIRMED,
             changed_by_id=user.id
         )
+        # The customer is notified through the notification outbox
         await callback.answer("✅ Заказ подтвержден")
         
-        # Notify customer
-        # notification_service = NotificationService()
-        # await notification_service.notify_order_status_changed(order, "NEW", "CONFIRMED")
-        
         await view_new_orders(callback, session)
     except Exception as e:
         await callback.answer(f"❌ Ошибка: {str(e)}", show_alert=True)
@@ -138,7 +134,7 @@ async def mark_paid(callback: CallbackQuery, session: AsyncSession, user: User):
     order_service = OrderService(session)
     
     try:
-        order = await order_service.transition_status(
+        await order_service.advance_status(
             order_id=order_id,
             new_status=OrderStatus.PAID,
             changed_by_id=user.id
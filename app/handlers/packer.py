@@ -5,6 +5,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from app.models.user import User
 
+from app.keyboards.staff import displayed_order_ids
 from app.services.order_service import OrderService
 from app.utils.enums import OrderStatus
 
@@ -71,7 +72,7 @@ async def mark_packed(callback: CallbackQuery, session: AsyncSession, user: User
     order_service = OrderService(session)
     
     try:
-        await order_service.transition_status(
+        await order_service.advance_status(
             order_id=order_id,
             new_status=OrderStatus.PACKED,
             changed_by_id=user.id
@@ -81,6 +82,26 @@ async def mark_packed(callback: CallbackQuery, session: AsyncSession, user: User
         await callback.answer(f"❌ Ошибка: {str(e)}", show_alert=True)
 
 
+@router.callback_query(F.data == "packer:pack_all")
+async def mark_all_packed(callback: CallbackQuery, session: AsyncSession, user: User) -> None:
+    """Mark the orders listed on the tapped message as packed."""
+    order_service = OrderService(session)
+    
+    try:
+        # Orders that became ready after the list was shown are not touched
+        order_ids = displayed_order_ids(callback.message.reply_markup, "packer:order:")
+        results = await order_service.transition_many(order_ids, OrderStatus.PACKED, changed_by_id=user.id)
+        done = sum(1 for r in results if r.success)
+        await callback.answer(f"✅ Упаковано заказов: {done} из {len(results)}")
+        await callback.message.edit_text(
+            "📦 <b>Панель упаковщика</b>\n\n"
+            "Выберите действие:",
+            reply_markup=get_packer_keyboard()
+        )
+    except Exception as e:
+        await callback.answer(f"❌ Ошибка: {str(e)}", show_alert=True)
+
+
 def get_packer_keyboard():
     """Get packer main keyboard."""
     from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
@@ -102,6 +123,9 @@ def get_packer_orders_keyboard(orders):
             callback_data=f"packer:order:{order.id}"
         )])
     
+    if len(orders) > 1:
+        buttons.append([InlineKeyboardButton(text="✅ Упаковать все", callback_data="packer:pack_all")])
+    
     buttons.append([InlineKeyboardButton(text="◀️ Назад", callback_data="back")])
     
     return InlineKeyboardMarkup(inline_keyboard=buttons)
@@ -20,7 +20,7 @@ from app.keyboards.admin import (
     get_order_management_keyboard,
     get_statistics_keyboard
 )
-from app.keyboards.staff import get_staff_menu_keyboard
+from app.keyboards.staff import get_staff_menu_keyboard, displayed_order_ids
 
 __all__ = [
     "get_main_menu_keyboard",
@@ -42,4 +42,5 @@ __all__ = [
     "get_order_management_keyboard",
     "get_statistics_keyboard",
     "get_staff_menu_keyboard",
+    "displayed_order_ids",
 ]
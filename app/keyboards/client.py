@@ -7,6 +7,7 @@ from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from app.models.category import Category
 from app.models.product import Product
 from app.services.cart_service import CartItem
+from app.services.menu_cache import ModifierView
 
 
 def get_client_menu_keyboard() -> InlineKeyboardMarkup:
@@ -92,6 +93,28 @@ def get_product_detail_keyboard(product: Product) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 
+def get_modifier_options_keyboard(
+    product: Product,
+    modifier: ModifierView
+) -> InlineKeyboardMarkup:
+    """Options of a required modifier; earlier choices are kept in FSM data."""
+    buttons = []
+    for option in modifier.options:
+        text = option.name
+        if option.price_adjustment:
+            text += f" (+{option.price_adjustment:.0f} ₽)"
+        buttons.append([InlineKeyboardButton(
+            text=text,
+            callback_data=f"modifier_option:{product.id}:{option.id}"
+        )])
+    buttons.append([InlineKeyboardButton(
+        text="◀️ Назад",
+        callback_data=f"product:{product.id}"
+    )])
+    
+    return InlineKeyboardMarkup(inline_keyboard=buttons)
+
+
 def get_cart_keyboard(items: List[CartItem]) -> InlineKeyboardMarkup:
     """Get cart keyboard."""
     buttons = []
@@ -1,5 +1,7 @@
 """Staff keyboards."""
 
+from typing import List, Optional
+
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from app.utils.enums import UserRole
 
@@ -31,3 +33,15 @@ def get_staff_menu_keyboard(role: str) -> InlineKeyboardMarkup:
     return keyboards.get(role, InlineKeyboardMarkup(inline_keyboard=[
         [InlineKeyboardButton(text="📋 Меню", callback_data="menu")]
     ]))
+
+
+def displayed_order_ids(markup: Optional[InlineKeyboardMarkup], prefix: str) -> List[int]:
+    """Ids of the order buttons (callback data prefix + id) shown on a keyboard."""
+    if markup is None:
+        return []
+    return [
+        int(button.callback_data[len(prefix):])
+        for row in markup.inline_keyboard
+        for button in row
+        if button.callback_data and button.callback_data.startswith(prefix)
+    ]
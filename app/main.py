@@ -10,6 +10,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.endpoints import health, auth, menu, orders, settings, guest_orders, admin
 from app.config import settings
 from app.database import close_db, init_db
+from app.redis_pool import close_redis, init_redis
+from app.services.menu_cache import menu_cache
 
 
 @asynccontextmanager
@@ -17,8 +19,13 @@ async def lifespan(app: FastAPI):
     """Application lifespan manager."""
     # Startup
     await init_db()
+    redis_client = await init_redis()
+    if redis_client is not None:
+        menu_cache.start(redis_client)
     yield
     # Shutdown
+    await menu_cache.stop()
+    await close_redis()
     await close_db()
 
 
@@ -36,6 +43,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor"],
 )
 
 # Serve simple mobile shop frontend (guest orders)
@@ -3,6 +3,8 @@
 from app.middlewares.db import DBSessionMiddleware
 from app.middlewares.auth import AuthMiddleware, AdminMiddleware, StaffMiddleware
 from app.middlewares.logging import LoggingMiddleware
+from app.middlewares.ordering import ChatOrderingMiddleware
+from app.middlewares.redis import RedisMiddleware
 from app.middlewares.throttling import ThrottlingMiddleware
 from app.middlewares.trace import TraceMiddleware
 
@@ -12,6 +14,8 @@ __all__ = [
     "AdminMiddleware",
     "StaffMiddleware",
     "LoggingMiddleware",
+    "ChatOrderingMiddleware",
+    "RedisMiddleware",
     "ThrottlingMiddleware",
     "TraceMiddleware",
 ]
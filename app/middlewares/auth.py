@@ -5,6 +5,7 @@ from typing import Callable, Any, Awaitable
 from aiogram import BaseMiddleware
 from aiogram.types import TelegramObject, Message, CallbackQuery
 
+from app.services.user_cache import UserIdentity, user_cache
 from app.services.user_service import UserService
 from app.models.user import User
 
@@ -21,24 +22,35 @@ class AuthMiddleware(BaseMiddleware):
         """Authenticate user from Telegram data."""
         session = data.get("session")
         
-        if not session:
-            return await handler(event, data)
-        
         # Get Telegram user info
         telegram_user = None
         if isinstance(event, Message):
             telegram_user = event.from_user
         elif isinstance(event, CallbackQuery):
             telegram_user = event.from_user
+        else:
+            # Update-level middleware: aiogram resolves the sender for us
+            telegram_user = data.get("event_from_user")
         
         if telegram_user:
-            user_service = UserService(session)
-            user = await user_service.get_or_create_user(
-                telegram_id=telegram_user.id,
-                username=telegram_user.username,
-                first_name=telegram_user.first_name,
-                last_name=telegram_user.last_name
-            )
+            profile = {
+                "username": telegram_user.username,
+                "first_name": telegram_user.first_name,
+                "last_name": telegram_user.last_name
+            }
+            user = await user_cache.get(telegram_user.id)
+            if user is None:
+                if not session:
+                    return await handler(event, data)
+                db_user = await UserService(session).get_or_create_user(
+                    telegram_id=telegram_user.id,
+                    **profile
+                )
+                user = UserIdentity.from_user(db_user)
+                await user_cache.put(user)
+            else:
+                # Profile edits are written back in the background
+                user = await user_cache.update_profile(user, **profile)
             data["user"] = user
             data["is_admin"] = user.is_admin()
             data["is_staff"] = user.is_staff()
@@ -1,26 +1,116 @@
 """Database middleware for aiogram."""
 
-from typing import Callable, Any, Awaitable
+import logging
+from dataclasses import dataclass
+from typing import Callable, Any, Awaitable, Optional
 
 from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
 from aiogram.types import TelegramObject
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import AsyncSessionLocal
+from app import database
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DBSessionStats:
+    """How many updates actually needed the database.
+
+    sessions_opened counts sessions that sent a query and so took a pooled connection.
+    """
+
+    updates: int = 0
+    sessions_opened: int = 0
+    opted_out: int = 0
+
+    @property
+    def db_ratio(self) -> float:
+        """Share of updates that opened a session."""
+        return self.sessions_opened / self.updates if self.updates else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "updates": self.updates,
+            "sessions_opened": self.sessions_opened,
+            "opted_out": self.opted_out,
+            "db_ratio": round(self.db_ratio, 4)
+        }
+
+
+db_session_stats = DBSessionStats()
+
+# AsyncSession methods that send SQL; others (add, expunge, ...) stay in memory
+QUERY_METHODS = frozenset({
+    "execute", "scalar", "scalars", "get", "stream", "stream_scalars", "refresh", "flush", "commit"
+})
+
+
+class LazySession:
+    """Stands in for AsyncSession and opens the real one on first use.
+
+    Updates answered from caches or static text never create a session,
+    so they never check out a pooled connection.
+    """
+
+    def __init__(self, factory: Callable[[], AsyncSession], stats: Optional[DBSessionStats] = None):
+        self._factory = factory
+        self._stats = stats
+        self._session: Optional[AsyncSession] = None
+        self._queried = False
+
+    @property
+    def opened(self) -> bool:
+        """Whether the real session has been created."""
+        return self._session is not None
+
+    def _get(self) -> AsyncSession:
+        if self._session is None:
+            self._session = self._factory()
+        return self._session
+
+    def __getattr__(self, name: str) -> Any:
+        session = self._get()
+        if name in QUERY_METHODS and not self._queried:
+            self._queried = True
+            if self._stats is not None:
+                self._stats.sessions_opened += 1
+        return getattr(session, name)
+
+    async def close(self) -> None:
+        """Close the real session if it was opened."""
+        if self._session is not None:
+            await self._session.close()
 
 
 class DBSessionMiddleware(BaseMiddleware):
-    """Middleware that provides database session to handlers."""
-    
+    """Middleware that provides a lazily opened database session to handlers.
+
+    Handlers registered with ``flags={"db": False}`` get no session at all;
+    the flag is visible when the middleware is mounted on an event observer
+    (message, callback_query), not on raw updates.
+    """
+
+    def __init__(self, session_factory: Optional[Callable[[], AsyncSession]] = None, stats: Optional[DBSessionStats] = None):
+        self.session_factory = session_factory
+        self.stats = stats if stats is not None else db_session_stats
+
     async def __call__(
         self,
         handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
         event: TelegramObject,
         data: dict[str, Any]
     ) -> Any:
-        """Create and provide database session."""
-        async with AsyncSessionLocal() as session:
-            data["session"] = session
+        """Provide a lazy database session."""
+        self.stats.updates += 1
+        if get_flag(data, "db", default=True) is False:
+            self.stats.opted_out += 1
             return await handler(event, data)
 
-# SAVED: 2026-02-12 09:56:10
+        session = LazySession(self.session_factory or database.AsyncSessionLocal, self.stats)
+        data["session"] = session
+        try:
+            return await handler(event, data)
+        finally:
+            await session.close()
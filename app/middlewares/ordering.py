@@ -0,0 +1,39 @@
+"""Ordering middleware: one update per chat at a time, across bot replicas."""
+
+from typing import Callable, Any, Awaitable, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from app.services.chat_lock import ChatLock
+
+
+class ChatOrderingMiddleware(BaseMiddleware):
+    """Serializes the updates of each chat in update_id order.
+
+    Both polling and webhook mode process updates concurrently, so without it a
+    quick double tap can reach the handlers of one chat out of order. Must be an
+    outer update middleware registered after aiogram's UserContextMiddleware,
+    which resolves the chat and user of the update.
+    """
+
+    def __init__(self, chat_lock: Optional[ChatLock] = None):
+        self.chat_lock = chat_lock or ChatLock()
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: Update,
+        data: dict[str, Any]
+    ) -> Any:
+        """Run the update while holding its chat."""
+        chat = data.get("event_chat")
+        user = data.get("event_from_user")
+        chat_id = chat.id if chat else (user.id if user else None)
+
+        # Updates without a chat (e.g. inline queries of unknown users) need no order
+        if chat_id is None:
+            return await handler(event, data)
+
+        async with self.chat_lock.hold(chat_id, event.update_id):
+            return await handler(event, data)
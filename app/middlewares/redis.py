@@ -0,0 +1,23 @@
+"""Redis middleware for aiogram."""
+
+from typing import Callable, Any, Awaitable
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+
+class RedisMiddleware(BaseMiddleware):
+    """Middleware that provides the shared Redis client to handlers."""
+    
+    def __init__(self, redis_client=None):
+        self.redis = redis_client
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any]
+    ) -> Any:
+        """Inject Redis client (None when running without Redis)."""
+        data["redis"] = self.redis
+        return await handler(event, data)
@@ -1,38 +1,31 @@
 """Throttling middleware to prevent spam."""
 
-import time
-from typing import Callable, Any, Awaitable, Dict
+from typing import Callable, Any, Awaitable, Optional
 
 from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
 from aiogram.types import TelegramObject, Message, CallbackQuery
 
-from app.utils.exceptions import ValidationException
+from app.services.rate_limiter import RateLimits, TokenBucketLimiter
+
+# Handlers opt into a stricter class with flags={"throttle": "checkout"}
+DEFAULT_ACTION = "browse"
 
 
 class ThrottlingMiddleware(BaseMiddleware):
-    """Middleware to throttle user requests."""
+    """Middleware to throttle user requests with per-role, per-action token buckets.
     
-    def __init__(self, rate_limit: float = 0.5, max_cache_size: int = 10000):
-        """
-        Initialize throttling middleware.
-        
-        Args:
-            rate_limit: Minimum seconds between requests from same user
-            max_cache_size: Maximum number of entries to keep in memory
-        """
-        self.rate_limit = rate_limit
-        self.max_cache_size = max_cache_size
-        self.last_requests: Dict[int, float] = {}
+    Must run after AuthMiddleware (it needs the user's role) and be mounted on
+    event observers so the "throttle" handler flag is visible.
+    """
     
-    def _cleanup_old_entries(self, current_time: float) -> None:
-        """Remove entries older than rate_limit to prevent memory leaks."""
-        if len(self.last_requests) > self.max_cache_size:
-            # Remove entries older than 5 minutes
-            cutoff_time = current_time - 300
-            self.last_requests = {
-                k: v for k, v in self.last_requests.items() 
-                if v > cutoff_time
-            }
+    def __init__(
+        self,
+        limiter: Optional[TokenBucketLimiter] = None,
+        limits: Optional[RateLimits] = None
+    ):
+        self.limiter = limiter or TokenBucketLimiter()
+        self.limits = limits or RateLimits()
     
     async def __call__(
         self,
@@ -46,29 +39,18 @@ class ThrottlingMiddleware(BaseMiddleware):
         if not user:
             return await handler(event, data)
         
-        current_time = time.time()
-        user_id = user.id
-        
-        # Cleanup old entries periodically
-        if len(self.last_requests) % 100 == 0:
-            self._cleanup_old_entries(current_time)
-        
-        # Check last request time
-        if user_id in self.last_requests:
-            time_passed = current_time - self.last_requests[user_id]
-            if time_passed < self.rate_limit:
-                # Rate limit hit
-                if isinstance(event, Message):
-                    await event.answer(
-                        "⏱ Пожалуйста, не так быстро. Подождите немного."
-                    )
-                elif isinstance(event, CallbackQuery):
-                    await event.answer(
-                        "⏱ Слишком быстро!", show_alert=True
-                    )
-                return None
-        
-        # Update last request time
-        self.last_requests[user_id] = current_time
+        action = get_flag(data, "throttle", default=DEFAULT_ACTION)
+        limit = self.limits.get(user.role, action)
+        if limit is None or await self.limiter.allow(f"{user.id}:{action}", limit):
+            return await handler(event, data)
         
-        return await handler(event, data)
+        # Rate limit hit
+        if isinstance(event, Message):
+            await event.answer(
+                "⏱ Пожалуйста, не так быстро. Подождите немного."
+            )
+        elif isinstance(event, CallbackQuery):
+            await event.answer(
+                "⏱ Слишком быстро!", show_alert=True
+            )
+        return None
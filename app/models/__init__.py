@@ -12,7 +12,9 @@ from app.models.promo_code import PromoCode
 from app.models.delivery_zone import DeliveryZone
 from app.models.review import Review
 from app.models.daily_counter import DailyCounter
+from app.models.daily_stats import DailyStat
 from app.models.audit_log import AdminAuditLog
+from app.models.notification_outbox import NotificationOutbox
 
 __all__ = [
     "Base",
@@ -32,5 +34,7 @@ __all__ = [
     "DeliveryZone",
     "Review",
     "DailyCounter",
+    "DailyStat",
     "AdminAuditLog",
+    "NotificationOutbox",
 ]
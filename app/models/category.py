@@ -2,7 +2,7 @@
 
 from typing import List, Optional
 
-from sqlalchemy import Boolean, String, Integer, ForeignKey, DateTime, Text
+from sqlalchemy import Boolean, String, Integer, ForeignKey, Index, DateTime, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import BaseModel
@@ -12,6 +12,9 @@ class Category(BaseModel):
     """Category model supporting 3-level hierarchy."""
     
     __tablename__ = "categories"
+    __table_args__ = (
+        Index("ix_categories_parent_id", "parent_id"),
+    )
     
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -0,0 +1,40 @@
+"""DailyStat model: per-day order rollup for reports."""
+
+from datetime import date
+from decimal import Decimal
+from typing import Optional
+
+from sqlalchemy import Date, Integer, Numeric, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import Base
+
+# product_id of the rows that hold whole-order totals
+ORDER_TOTALS = 0
+
+# Each order is counted in slot order_id % ROLLUP_SLOTS, so concurrent order
+# writes of a day lock different rows; readers sum over the slots
+ROLLUP_SLOTS = 16
+
+
+class DailyStat(Base):
+    """Orders created on a local business day, by current status and product.
+    
+    Rows with product_id == ORDER_TOTALS count orders and their totals; other
+    rows count the order lines of one product. A day's counts are split over
+    ROLLUP_SLOTS slots and are only meaningful summed.
+    """
+    
+    __tablename__ = "daily_stats"
+    
+    stat_date: Mapped[date] = mapped_column(Date, primary_key=True)
+    status: Mapped[str] = mapped_column(String(20), primary_key=True)
+    product_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    slot: Mapped[int] = mapped_column(Integer, primary_key=True, default=0)
+    product_name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    orders: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    quantity: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    revenue: Mapped[Decimal] = mapped_column(Numeric(12, 2), default=0, nullable=False)
+    
+    def __repr__(self):
+        return f"<DailyStat(date={self.stat_date}, status={self.status}, product={self.product_id})>"
@@ -0,0 +1,51 @@
+"""Transactional outbox of bot notifications."""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, Integer, String, Text, text
+from sqlalchemy.dialects.postgresql import JSON
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import BaseModel
+
+
+class NotificationOutbox(BaseModel):
+    """One message to one chat, written in the transaction of the change it reports.
+    
+    The outbox dispatcher sends pending rows later; dedup_key makes writing the
+    same notification twice a no-op.
+    """
+    
+    __tablename__ = "notification_outbox"
+    
+    event_type: Mapped[str] = mapped_column(String(30), nullable=False)
+    order_id: Mapped[Optional[int]] = mapped_column(
+        ForeignKey("orders.id", ondelete="CASCADE"), nullable=True
+    )
+    chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    payload: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True)
+    dedup_key: Mapped[str] = mapped_column(String(100), unique=True, nullable=False)
+    
+    # Delivery state: pending until sent_at or failed_at is set
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    available_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=datetime.utcnow,
+        nullable=False
+    )
+    sent_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    failed_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    
+    __table_args__ = (
+        # The dispatcher only ever scans pending rows
+        Index(
+            "ix_notification_outbox_pending",
+            "available_at",
+            postgresql_where=text("sent_at IS NULL AND failed_at IS NULL")
+        ),
+    )
+    
+    def __repr__(self):
+        return f"<NotificationOutbox(id={self.id}, event={self.event_type}, order={self.order_id})>"
@@ -3,17 +3,41 @@
 from decimal import Decimal
 from typing import List, Optional
 
-from sqlalchemy import Boolean, String, Integer, ForeignKey, Numeric, DateTime, Text, Enum as SQLEnum
+from sqlalchemy import Boolean, String, Integer, ForeignKey, Numeric, DateTime, Text, Index, text, Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import BaseModel
 from app.utils.enums import OrderStatus, PaymentMethod, PaymentStatus
 
+# Orders in these statuses can no longer be cancelled
+NON_CANCELLABLE_STATUSES = (
+    OrderStatus.DELIVERED.value,
+    OrderStatus.CANCELLED.value,
+    OrderStatus.IN_DELIVERY.value
+)
+
 
 class Order(BaseModel):
     """Order model representing customer orders."""
     
     __tablename__ = "orders"
+    __table_args__ = (
+        # Staff queues: open orders of a status, oldest first
+        Index(
+            "ix_orders_active_status_created_at",
+            "status",
+            "created_at",
+            postgresql_where=text("status NOT IN ('DELIVERED', 'CANCELLED')")
+        ),
+        Index(
+            "ix_orders_courier_id_status",
+            "courier_id",
+            "status",
+            postgresql_where=text("courier_id IS NOT NULL")
+        ),
+        # Date ranges in stats and newest-first listings
+        Index("ix_orders_created_at", "created_at"),
+    )
     
     # Order number (YYYYMMDD-XXXX format)
     order_number: Mapped[str] = mapped_column(String(20), unique=True, index=True, nullable=False)
@@ -90,17 +114,16 @@ class Order(BaseModel):
     
     def can_be_cancelled(self) -> bool:
         """Check if order can be cancelled."""
-        return self.status not in [
-            OrderStatus.DELIVERED.value,
-            OrderStatus.CANCELLED.value,
-            OrderStatus.IN_DELIVERY.value
-        ]
+        return self.status not in NON_CANCELLABLE_STATUSES
 
 
 class OrderStatusLog(BaseModel):
     """Audit log for order status changes."""
     
     __tablename__ = "order_status_logs"
+    __table_args__ = (
+        Index("ix_order_status_logs_order_id", "order_id"),
+    )
     
     order_id: Mapped[int] = mapped_column(ForeignKey("orders.id"), nullable=False)
     old_status: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
@@ -2,7 +2,7 @@
 
 from typing import List, Optional
 
-from sqlalchemy import Boolean, String, Integer, ForeignKey, Numeric, Text
+from sqlalchemy import Boolean, String, Integer, ForeignKey, Index, Numeric, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.postgresql import JSON
 
@@ -13,6 +13,9 @@ class OrderItem(BaseModel):
     """Order item representing a product in an order."""
     
     __tablename__ = "order_items"
+    __table_args__ = (
+        Index("ix_order_items_order_id", "order_id"),
+    )
     
     order_id: Mapped[int] = mapped_column(ForeignKey("orders.id"), nullable=False)
     product_id: Mapped[int] = mapped_column(ForeignKey("products.id"), nullable=False)
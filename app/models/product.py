@@ -2,7 +2,7 @@
 
 from typing import List, Optional
 
-from sqlalchemy import Boolean, String, Integer, ForeignKey, Numeric, DateTime, Text
+from sqlalchemy import Boolean, String, Integer, ForeignKey, Index, Numeric, DateTime, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import BaseModel
@@ -12,6 +12,10 @@ class Product(BaseModel):
     """Product model representing menu items."""
     
     __tablename__ = "products"
+    __table_args__ = (
+        # Visible products of a category in menu order
+        Index("ix_products_category_listing", "category_id", "is_active", "is_archived", "sort_order"),
+    )
     
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     description: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
@@ -0,0 +1,52 @@
+"""Shared pooled Redis client."""
+
+import logging
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_redis = None
+
+
+async def init_redis():
+    """Create the shared Redis client once; None when Redis is not configured or unreachable."""
+    global _redis
+    if _redis is not None or not settings.redis_url:
+        return _redis
+    
+    import redis.asyncio as aioredis
+    
+    # A burst past max_connections waits for a free connection instead of raising at once
+    pool = aioredis.BlockingConnectionPool.from_url(
+        settings.redis_url,
+        max_connections=settings.redis_max_connections,
+        timeout=settings.redis_pool_timeout,
+        health_check_interval=30
+    )
+    client = aioredis.Redis(connection_pool=pool)
+    try:
+        await client.ping()
+    except Exception as e:
+        logger.warning(f"Redis unavailable, continuing without it: {e}")
+        await client.close()
+        await pool.disconnect()
+        return None
+    
+    _redis = client
+    logger.info("Redis connection pool initialized")
+    return _redis
+
+
+def get_redis():
+    """Shared Redis client, or None when not initialized."""
+    return _redis
+
+
+async def close_redis() -> None:
+    """Close the shared Redis client and its pool."""
+    global _redis
+    if _redis is not None:
+        await _redis.close()
+        await _redis.connection_pool.disconnect()
+        _redis = None
@@ -3,13 +3,14 @@
 from typing import List, Optional
 from datetime import datetime
 
-from sqlalchemy import select, and_, update
+from sqlalchemy import select, and_, insert, update
 from app.utils.time import utc_now
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.category import Category
 from app.models.product import Product
 from app.models.audit_log import AdminAuditLog
+from app.services.menu_cache import menu_cache
 from app.utils.exceptions import NotFoundException, ValidationException
 
 
@@ -38,22 +39,20 @@ class ArchiveService:
         category.archived_at = now
         category.archived_by_user_id = actor_user_id
         
+        # Log the action
+        log_rows = [
+            self._log_row(actor_user_id, "archive", "category", category_id, old_values={"cascade": cascade})
+        ]
+        
         # Cascade archive if requested
         if cascade:
-            await self._archive_category_children(category_id, actor_user_id, now)
+            log_rows += await self._archive_category_children(category_id, actor_user_id, now)
         
-        # Log the action
-        await self._log_action(
-            actor_user_id,
-            "archive",
-            "category",
-            category_id,
-            {"cascade": cascade},
-            None
-        )
+        await self._log_actions(log_rows)
         
         await self.session.flush()
         await self.session.commit()
+        await menu_cache.invalidate()
         return category
     
     async def unarchive_category(
@@ -73,22 +72,20 @@ class ArchiveService:
         category.archived_at = None
         category.archived_by_user_id = None
         
+        # Log the action
+        log_rows = [
+            self._log_row(actor_user_id, "unarchive", "category", category_id, {"cascade_option": cascade_option})
+        ]
+        
         # Cascade unarchive if requested
         if cascade_option == "with_descendants":
-            await self._unarchive_category_children(category_id)
+            log_rows += await self._unarchive_category_children(category_id, actor_user_id)
         
-        # Log the action
-        await self._log_action(
-            actor_user_id,
-            "unarchive",
-            "category",
-            category_id,
-            None,
-            {"cascade_option": cascade_option}
-        )
+        await self._log_actions(log_rows)
         
         await self.session.flush()
         await self.session.commit()
+        await menu_cache.invalidate()
         return category
     
     async def archive_product(
@@ -120,6 +117,7 @@ class ArchiveService:
         
         await self.session.flush()
         await self.session.commit()
+        await menu_cache.invalidate()
         return product
     
     async def unarchive_product(
@@ -149,6 +147,7 @@ class ArchiveService:
         
         await self.session.flush()
         await self.session.commit()
+        await menu_cache.invalidate()
         return product
     
     async def get_archived_categories(self) -> List[Category]:
@@ -191,68 +190,116 @@ class ArchiveService:
             raise NotFoundException("Product", str(product_id))
         return product
     
+    async def _descendant_ids(self, category_id: int) -> List[int]:
+        """Ids of all categories below category_id, collected by one recursive CTE."""
+        descendants = (
+            select(Category.id)
+            .where(Category.parent_id == category_id)
+            .cte("descendants", recursive=True)
+        )
+        # UNION (not UNION ALL) also stops on a corrupted, cyclic tree
+        descendants = descendants.union(
+            select(Category.id).where(Category.parent_id == descendants.c.id)
+        )
+        result = await self.session.execute(select(descendants.c.id))
+        return list(result.scalars().all())
+    
     async def _archive_category_children(
         self,
         parent_id: int,
         actor_user_id: int,
         archived_at: datetime
-    ) -> None:
-        """Recursively archive all children of a category."""
-        # Archive subcategories
-        subcategories_result = await self.session.execute(
-            select(Category).where(Category.parent_id == parent_id)
-        )
-        subcategories = subcategories_result.scalars().all()
+    ) -> List[dict]:
+        """Archive all descendants of a category and their products.
         
-        for subcategory in subcategories:
-            subcategory.is_archived = True
-            subcategory.archived_at = archived_at
-            subcategory.archived_by_user_id = actor_user_id
-            
-            # Recursively archive children
-            await self._archive_category_children(
-                subcategory.id,
-                actor_user_id,
-                archived_at
-            )
+        Returns audit log rows for every entity that changed.
+        """
+        category_ids = await self._descendant_ids(parent_id)
+        values = {
+            "is_archived": True,
+            "archived_at": archived_at,
+            "archived_by_user_id": actor_user_id
+        }
+        return await self._cascade(parent_id, category_ids, actor_user_id, "archive", values)
+    
+    async def _unarchive_category_children(self, parent_id: int, actor_user_id: int) -> List[dict]:
+        """Unarchive all descendants of a category and their products.
         
-        # Archive products in this category
-        await self.session.execute(
-            update(Product)
-            .where(Product.category_id == parent_id)
-            .values(
-                is_archived=True,
-                archived_at=archived_at,
-                archived_by_user_id=actor_user_id
-            )
-        )
+        Returns audit log rows for every entity that changed.
+        """
+        category_ids = await self._descendant_ids(parent_id)
+        values = {
+            "is_archived": False,
+            "archived_at": None,
+            "archived_by_user_id": None
+        }
+        return await self._cascade(parent_id, category_ids, actor_user_id, "unarchive", values)
     
-    async def _unarchive_category_children(self, parent_id: int) -> None:
-        """Recursively unarchive all children of a category."""
-        # Unarchive subcategories
-        subcategories_result = await self.session.execute(
-            select(Category).where(Category.parent_id == parent_id)
-        )
-        subcategories = subcategories_result.scalars().all()
+    async def _cascade(
+        self,
+        parent_id: int,
+        category_ids: List[int],
+        actor_user_id: int,
+        action: str,
+        values: dict
+    ) -> List[dict]:
+        """Two set-based UPDATEs: descendant categories, then products of the whole subtree.
         
-        for subcategory in subcategories:
-            subcategory.is_archived = False
-            subcategory.archived_at = None
-            subcategory.archived_by_user_id = None
-            
-            # Recursively unarchive children
-            await self._unarchive_category_children(subcategory.id)
+        Rows already in the target state are left alone (and not logged).
+        """
+        was_archived = not values["is_archived"]
+        changed_categories = []
+        if category_ids:
+            result = await self.session.execute(
+                update(Category)
+                .where(
+                    Category.id.in_(category_ids),
+                    Category.is_archived == was_archived
+                )
+                .values(**values)
+                .returning(Category.id)
+            )
+            changed_categories = list(result.scalars().all())
         
-        # Unarchive products in this category
-        await self.session.execute(
+        result = await self.session.execute(
             update(Product)
-            .where(Product.category_id == parent_id)
-            .values(
-                is_archived=False,
-                archived_at=None,
-                archived_by_user_id=None
-            )
+            .where(Product.category_id.in_([parent_id, *category_ids]), Product.is_archived == was_archived)
+            .values(**values)
+            .returning(Product.id)
         )
+        changed_products = list(result.scalars().all())
+        
+        cascade = {"cascade_from_category_id": parent_id}
+        return [
+            self._log_row(actor_user_id, action, "category", category_id, cascade)
+            for category_id in changed_categories
+        ] + [
+            self._log_row(actor_user_id, action, "product", product_id, cascade)
+            for product_id in changed_products
+        ]
+    
+    @staticmethod
+    def _log_row(
+        user_id: int,
+        action: str,
+        entity_type: str,
+        entity_id: int,
+        new_values: Optional[dict] = None,
+        old_values: Optional[dict] = None
+    ) -> dict:
+        return {
+            "user_id": user_id,
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "old_values": old_values,
+            "new_values": new_values
+        }
+    
+    async def _log_actions(self, rows: List[dict]) -> None:
+        """Write audit log rows with one executemany INSERT."""
+        if rows:
+            await self.session.execute(insert(AdminAuditLog), rows)
     
     async def _log_action(
         self,
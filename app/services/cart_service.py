@@ -1,14 +1,12 @@
 """Cart service for managing user shopping carts."""
 
-import json
 from typing import List, Optional, Dict, Any
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, fields
 
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.product import Product
-from app.models.modifier import ModifierOption
+from app.config import settings
+from app.services.cart_store import RedisCartStore, get_memory_store, to_cents
 from app.services.menu_service import MenuService
 from app.utils.exceptions import NotFoundException, ValidationException
 
@@ -33,6 +31,22 @@ class CartItem:
     def from_dict(cls, data: dict) -> "CartItem":
         """Create from dictionary."""
         return cls(**data)
+    
+    def to_line(self) -> dict:
+        """Convert to stored cart line with integer cent totals."""
+        unit_cents = to_cents(self.product_price) + to_cents(self.modifiers_price)
+        line = self.to_dict()
+        line["unit_cents"] = unit_cents
+        line["line_total_cents"] = unit_cents * self.quantity
+        return line
+    
+    @classmethod
+    def from_line(cls, line: dict) -> "CartItem":
+        """Create from stored cart line."""
+        names = {f.name for f in fields(cls)}
+        data = {k: v for k, v in line.items() if k in names}
+        data["item_total"] = line["line_total_cents"] / 100
+        return cls(**data)
 
 
 class CartService:
@@ -41,38 +55,28 @@ class CartService:
     def __init__(self, session: AsyncSession, redis_client=None):
         self.session = session
         self.redis = redis_client
+        if redis_client is not None:
+            self.store = RedisCartStore(redis_client, ttl_seconds=settings.cart_ttl_seconds)
+        else:
+            self.store = get_memory_store()
         self.menu_service = MenuService(session)
     
-    def _get_cart_key(self, user_id: int) -> str:
-        """Get Redis key for user cart."""
-        return f"cart:{user_id}"
-    
     def _get_lock_key(self, user_id: int) -> str:
         """Get Redis lock key for cart checkout."""
         return f"lock:cart:{user_id}"
     
     async def get_cart(self, user_id: int) -> List[CartItem]:
         """Get user's cart."""
-        if self.redis:
-            cart_key = self._get_cart_key(user_id)
-            cart_data = await self.redis.get(cart_key)
-            if cart_data:
-                items = json.loads(cart_data)
-                return [CartItem.from_dict(item) for item in items]
-        return []
+        summary = await self.store.summary(user_id)
+        return [CartItem.from_line(line) for line in summary["lines"]]
     
     async def save_cart(self, user_id: int, items: List[CartItem]) -> None:
         """Save user's cart."""
-        if self.redis:
-            cart_key = self._get_cart_key(user_id)
-            cart_data = json.dumps([item.to_dict() for item in items])
-            await self.redis.set(cart_key, cart_data, ex=86400)  # 24 hours
+        await self.store.replace(user_id, [item.to_line() for item in items])
     
     async def clear_cart(self, user_id: int) -> None:
         """Clear user's cart."""
-        if self.redis:
-            cart_key = self._get_cart_key(user_id)
-            await self.redis.delete(cart_key)
+        await self.store.clear(user_id)
     
     async def add_item(
         self,
@@ -83,29 +87,21 @@ class CartService:
         special_instructions: Optional[str] = None
     ) -> CartItem:
         """Add item to cart."""
-        # Get product
-        product = await self.menu_service.get_product_by_id(product_id)
+        # Product and selected options in one lookup
+        product, options = await self.menu_service.resolve_product_options(product_id, modifier_option_ids)
         
         if not product.is_available:
             raise ValidationException("Product is not available")
         
-        # Calculate modifiers
-        modifiers = []
-        modifiers_price = 0.0
-        
-        if modifier_option_ids:
-            for option_id in modifier_option_ids:
-                option_result = await self.session.execute(
-                    select(ModifierOption).where(ModifierOption.id == option_id)
-                )
-                option = option_result.scalar_one_or_none()
-                if option:
-                    modifiers.append({
-                        "id": option.id,
-                        "name": option.name,
-                        "price_adjustment": float(option.price_adjustment)
-                    })
-                    modifiers_price += float(option.price_adjustment)
+        modifiers = [
+            {
+                "id": option.id,
+                "name": option.name,
+                "price_adjustment": float(option.price_adjustment)
+            }
+            for option in options
+        ]
+        modifiers_price = float(sum(option.price_adjustment for option in options))
         
         # Calculate item total
         item_total = (float(product.price) + modifiers_price) * quantity
@@ -123,21 +119,17 @@ class CartService:
         )
         
         # Add to cart
-        cart = await self.get_cart(user_id)
-        cart.append(cart_item)
-        await self.save_cart(user_id, cart)
+        await self.store.add_line(user_id, cart_item.to_line())
         
         return cart_item
     
     async def remove_item(self, user_id: int, item_index: int) -> None:
         """Remove item from cart by index."""
-        cart = await self.get_cart(user_id)
-        
-        if item_index < 0 or item_index >= len(cart):
+        if item_index < 0:
             raise ValidationException("Invalid item index")
         
-        cart.pop(item_index)
-        await self.save_cart(user_id, cart)
+        if not await self.store.remove_line(user_id, item_index):
+            raise ValidationException("Invalid item index")
     
     async def update_quantity(
         self,
@@ -149,30 +141,23 @@ class CartService:
         if quantity < 1:
             raise ValidationException("Quantity must be at least 1")
         
-        cart = await self.get_cart(user_id)
-        
-        if item_index < 0 or item_index >= len(cart):
+        if item_index < 0:
             raise ValidationException("Invalid item index")
         
-        item = cart[item_index]
-        item.quantity = quantity
-        item.item_total = (item.product_price + item.modifiers_price) * quantity
-        
-        await self.save_cart(user_id, cart)
-        return item
+        line = await self.store.set_quantity(user_id, item_index, quantity)
+        if line is None:
+            raise ValidationException("Invalid item index")
+        return CartItem.from_line(line)
     
     async def get_cart_summary(self, user_id: int) -> dict:
         """Get cart summary."""
-        cart = await self.get_cart(user_id)
-        
-        total_items = sum(item.quantity for item in cart)
-        subtotal = sum(item.item_total for item in cart)
-        
+        summary = await self.store.summary(user_id)
+        items = [CartItem.from_line(line) for line in summary["lines"]]
         return {
-            "items": cart,
-            "total_items": total_items,
-            "subtotal": subtotal,
-            "item_count": len(cart)
+            "items": items,
+            "total_items": summary["total_items"],
+            "subtotal": summary["subtotal_cents"] / 100,
+            "item_count": len(items)
         }
     
     async def acquire_checkout_lock(self, user_id: int, ttl_seconds: int = 30) -> bool:
@@ -0,0 +1,318 @@
+"""Cart storage backends."""
+
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+# Shared Lua prelude: converts a legacy JSON-blob cart (a Redis string) into the
+# hash layout in place, and lists line ids in insertion order.
+#
+# Hash layout of cart:{user_id}:
+#   seq             - last line id
+#   subtotal_cents  - sum of line_total_cents
+#   total_items     - sum of quantities
+#   line:<id>       - JSON of the line (CartItem fields + unit_cents, line_total_cents)
+_PRELUDE = """
+local function migrate(key)
+    if redis.call('TYPE', key).ok ~= 'string' then
+        return
+    end
+    local raw = redis.call('GET', key)
+    local ttl = redis.call('PTTL', key)
+    redis.call('DEL', key)
+    local ok, items = pcall(cjson.decode, raw)
+    if not ok or type(items) ~= 'table' then
+        return
+    end
+    local subtotal, count = 0, 0
+    for i, item in ipairs(items) do
+        local qty = tonumber(item.quantity) or 1
+        local unit = math.floor(((tonumber(item.product_price) or 0) + (tonumber(item.modifiers_price) or 0)) * 100 + 0.5)
+        item.quantity = qty
+        item.unit_cents = unit
+        item.line_total_cents = unit * qty
+        redis.call('HSET', key, 'line:' .. i, cjson.encode(item))
+        subtotal = subtotal + unit * qty
+        count = count + qty
+    end
+    if #items > 0 then
+        redis.call('HSET', key, 'seq', #items, 'subtotal_cents', subtotal, 'total_items', count)
+        if ttl > 0 then
+            redis.call('PEXPIRE', key, ttl)
+        end
+    end
+end
+
+local function line_ids(key)
+    local ids = {}
+    for _, field in ipairs(redis.call('HKEYS', key)) do
+        local id = string.match(field, '^line:(%d+)$')
+        if id then
+            table.insert(ids, tonumber(id))
+        end
+    end
+    table.sort(ids)
+    return ids
+end
+"""
+
+# KEYS[1] cart, ARGV[1] line JSON (with unit_cents, quantity, line_total_cents), ARGV[2] TTL
+_ADD_SCRIPT = _PRELUDE + """
+migrate(KEYS[1])
+local line = cjson.decode(ARGV[1])
+local id = redis.call('HINCRBY', KEYS[1], 'seq', 1)
+redis.call('HSET', KEYS[1], 'line:' .. id, ARGV[1])
+redis.call('HINCRBY', KEYS[1], 'subtotal_cents', line.line_total_cents)
+redis.call('HINCRBY', KEYS[1], 'total_items', line.quantity)
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return id
+"""
+
+# KEYS[1] cart, ARGV[1] zero-based line index, ARGV[2] TTL; returns 0 for a bad index
+_REMOVE_SCRIPT = _PRELUDE + """
+migrate(KEYS[1])
+local ids = line_ids(KEYS[1])
+local index = tonumber(ARGV[1]) + 1
+if index < 1 or index > #ids then
+    return 0
+end
+if #ids == 1 then
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+local field = 'line:' .. ids[index]
+local line = cjson.decode(redis.call('HGET', KEYS[1], field))
+redis.call('HDEL', KEYS[1], field)
+redis.call('HINCRBY', KEYS[1], 'subtotal_cents', -line.line_total_cents)
+redis.call('HINCRBY', KEYS[1], 'total_items', -line.quantity)
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+# KEYS[1] cart, ARGV[1] zero-based line index, ARGV[2] quantity, ARGV[3] TTL
+# Returns the updated line JSON, or false for a bad index
+_SET_QUANTITY_SCRIPT = _PRELUDE + """
+migrate(KEYS[1])
+local ids = line_ids(KEYS[1])
+local index = tonumber(ARGV[1]) + 1
+if index < 1 or index > #ids then
+    return false
+end
+local field = 'line:' .. ids[index]
+local line = cjson.decode(redis.call('HGET', KEYS[1], field))
+local qty = tonumber(ARGV[2])
+local total = line.unit_cents * qty
+redis.call('HINCRBY', KEYS[1], 'subtotal_cents', total - line.line_total_cents)
+redis.call('HINCRBY', KEYS[1], 'total_items', qty - line.quantity)
+line.quantity = qty
+line.line_total_cents = total
+local encoded = cjson.encode(line)
+redis.call('HSET', KEYS[1], field, encoded)
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return encoded
+"""
+
+# KEYS[1] cart; returns HGETALL of the (migrated) cart
+_SUMMARY_SCRIPT = _PRELUDE + """
+migrate(KEYS[1])
+return redis.call('HGETALL', KEYS[1])
+"""
+
+
+def to_cents(amount: float) -> int:
+    """Convert a money amount to integer cents."""
+    return int(round(float(amount) * 100))
+
+
+def decode_line(raw) -> Dict[str, Any]:
+    """Decode a stored line, undoing cjson's empty-array-as-object encoding."""
+    line = json.loads(raw)
+    modifiers = line.get("modifiers")
+    if not modifiers:
+        line["modifiers"] = []
+    elif isinstance(modifiers, dict):
+        line["modifiers"] = list(modifiers.values())
+    return line
+
+
+class RedisCartStore:
+    """Cart stored as a Redis hash; each operation is one atomic script call."""
+
+    def __init__(self, redis_client, ttl_seconds: int = 86400):
+        self.redis = redis_client
+        self.ttl_seconds = ttl_seconds
+        self._add = redis_client.register_script(_ADD_SCRIPT)
+        self._remove = redis_client.register_script(_REMOVE_SCRIPT)
+        self._set_quantity = redis_client.register_script(_SET_QUANTITY_SCRIPT)
+        self._summary = redis_client.register_script(_SUMMARY_SCRIPT)
+
+    @staticmethod
+    def cart_key(user_id: int) -> str:
+        return f"cart:{user_id}"
+
+    async def add_line(self, user_id: int, line: Dict[str, Any]) -> None:
+        """Append a line (must contain unit_cents, quantity, line_total_cents)."""
+        await self._add(keys=[self.cart_key(user_id)], args=[json.dumps(line), self.ttl_seconds])
+
+    async def remove_line(self, user_id: int, index: int) -> bool:
+        """Remove line by position; False when the index is out of range."""
+        result = await self._remove(keys=[self.cart_key(user_id)], args=[index, self.ttl_seconds])
+        return bool(result)
+
+    async def set_quantity(self, user_id: int, index: int, quantity: int) -> Optional[Dict[str, Any]]:
+        """Set line quantity by position; None when the index is out of range."""
+        result = await self._set_quantity(
+            keys=[self.cart_key(user_id)],
+            args=[index, quantity, self.ttl_seconds]
+        )
+        return decode_line(result) if result else None
+
+    async def summary(self, user_id: int) -> Dict[str, Any]:
+        """Lines in insertion order plus incrementally maintained totals."""
+        flat = await self._summary(keys=[self.cart_key(user_id)])
+        fields = {
+            (k.decode() if isinstance(k, bytes) else k): v
+            for k, v in zip(flat[::2], flat[1::2])
+        }
+        line_ids = sorted(int(name[5:]) for name in fields if name.startswith("line:"))
+        return {
+            "lines": [decode_line(fields[f"line:{i}"]) for i in line_ids],
+            "subtotal_cents": int(fields.get("subtotal_cents", 0)),
+            "total_items": int(fields.get("total_items", 0)),
+        }
+
+    async def replace(self, user_id: int, lines: List[Dict[str, Any]]) -> None:
+        """Replace the whole cart."""
+        key = self.cart_key(user_id)
+        mapping: Dict[str, Any] = {f"line:{i}": json.dumps(line) for i, line in enumerate(lines, start=1)}
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            if lines:
+                mapping.update({
+                    "seq": len(lines),
+                    "subtotal_cents": sum(line["line_total_cents"] for line in lines),
+                    "total_items": sum(line["quantity"] for line in lines),
+                })
+                pipe.hset(key, mapping=mapping)
+                pipe.expire(key, self.ttl_seconds)
+            await pipe.execute()
+
+    async def clear(self, user_id: int) -> None:
+        """Delete the cart."""
+        await self.redis.delete(self.cart_key(user_id))
+
+
+class MemoryCartStore:
+    """In-process cart store used when Redis is not configured.
+    
+    Same contract as RedisCartStore. Carts expire ``ttl_seconds`` after the
+    last change and the least recently used cart is evicted once more than
+    ``max_users`` carts are held. Operations never await, so each one is
+    atomic with respect to other coroutines in the process.
+    """
+    
+    def __init__(self, ttl_seconds: int = 86400, max_users: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        # user_id -> (expires_at, cart), least recently used first
+        self._carts: "OrderedDict[int, tuple]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._carts)
+    
+    def _get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        entry = self._carts.get(user_id)
+        if entry is None:
+            return None
+        expires_at, cart = entry
+        if expires_at <= time.monotonic():
+            del self._carts[user_id]
+            return None
+        self._carts.move_to_end(user_id)
+        return cart
+    
+    def _touch(self, user_id: int, cart: Dict[str, Any]) -> None:
+        self._carts[user_id] = (time.monotonic() + self.ttl_seconds, cart)
+        self._carts.move_to_end(user_id)
+        while len(self._carts) > self.max_users:
+            self._carts.popitem(last=False)
+    
+    @staticmethod
+    def _empty() -> Dict[str, Any]:
+        return {"lines": [], "subtotal_cents": 0, "total_items": 0}
+    
+    async def add_line(self, user_id: int, line: Dict[str, Any]) -> None:
+        """Append a line (must contain unit_cents, quantity, line_total_cents)."""
+        cart = self._get(user_id) or self._empty()
+        cart["lines"].append(dict(line))
+        cart["subtotal_cents"] += line["line_total_cents"]
+        cart["total_items"] += line["quantity"]
+        self._touch(user_id, cart)
+    
+    async def remove_line(self, user_id: int, index: int) -> bool:
+        """Remove line by position; False when the index is out of range."""
+        cart = self._get(user_id)
+        if cart is None or not 0 <= index < len(cart["lines"]):
+            return False
+        line = cart["lines"].pop(index)
+        if not cart["lines"]:
+            del self._carts[user_id]
+            return True
+        cart["subtotal_cents"] -= line["line_total_cents"]
+        cart["total_items"] -= line["quantity"]
+        self._touch(user_id, cart)
+        return True
+    
+    async def set_quantity(self, user_id: int, index: int, quantity: int) -> Optional[Dict[str, Any]]:
+        """Set line quantity by position; None when the index is out of range."""
+        cart = self._get(user_id)
+        if cart is None or not 0 <= index < len(cart["lines"]):
+            return None
+        line = cart["lines"][index]
+        total = line["unit_cents"] * quantity
+        cart["subtotal_cents"] += total - line["line_total_cents"]
+        cart["total_items"] += quantity - line["quantity"]
+        line["quantity"] = quantity
+        line["line_total_cents"] = total
+        self._touch(user_id, cart)
+        return dict(line)
+    
+    async def summary(self, user_id: int) -> Dict[str, Any]:
+        """Lines in insertion order plus incrementally maintained totals."""
+        cart = self._get(user_id) or self._empty()
+        return {
+            "lines": [dict(line) for line in cart["lines"]],
+            "subtotal_cents": cart["subtotal_cents"],
+            "total_items": cart["total_items"],
+        }
+    
+    async def replace(self, user_id: int, lines: List[Dict[str, Any]]) -> None:
+        """Replace the whole cart."""
+        if not lines:
+            self._carts.pop(user_id, None)
+            return
+        self._touch(user_id, {
+            "lines": [dict(line) for line in lines],
+            "subtotal_cents": sum(line["line_total_cents"] for line in lines),
+            "total_items": sum(line["quantity"] for line in lines),
+        })
+    
+    async def clear(self, user_id: int) -> None:
+        """Delete the cart."""
+        self._carts.pop(user_id, None)
+
+
+_memory_store: Optional[MemoryCartStore] = None
+
+
+def get_memory_store() -> MemoryCartStore:
+    """Process-wide in-memory cart store, created on first use."""
+    global _memory_store
+    if _memory_store is None:
+        from app.config import settings
+        _memory_store = MemoryCartStore(
+            ttl_seconds=settings.cart_ttl_seconds,
+            max_users=settings.cart_memory_max_users
+        )
+    return _memory_store
@@ -0,0 +1,152 @@
+"""Per-chat ordering of bot updates shared by bot replicas through Redis."""
+
+import asyncio
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# The hash tag keeps all keys of one chat in the same Redis Cluster slot
+CHAT_KEY_PREFIX = "chat:"
+
+# KEYS[1] waiting updates (zset by update_id), KEYS[2] lock, KEYS[3] waiter deadlines (hash).
+# ARGV member, lock ttl (ms), wait (ms), lock token. Join the queue once; take the lock only when
+# no earlier update of the chat is still waiting. Waiters past their deadline (their
+# replica gave up or died) are dropped so they cannot block the chat.
+ACQUIRE_LUA = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+if not redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    redis.call('ZADD', KEYS[1], ARGV[1], ARGV[1])
+    redis.call('HSET', KEYS[3], ARGV[1], now + tonumber(ARGV[3]))
+end
+local ttl = tonumber(ARGV[2]) + tonumber(ARGV[3])
+redis.call('PEXPIRE', KEYS[1], ttl)
+redis.call('PEXPIRE', KEYS[3], ttl)
+while true do
+    local head = redis.call('ZRANGE', KEYS[1], 0, 0)[1]
+    if head == ARGV[1] then
+        break
+    end
+    local deadline = tonumber(redis.call('HGET', KEYS[3], head))
+    if deadline ~= nil and deadline > now then
+        return 0
+    end
+    redis.call('ZREM', KEYS[1], head)
+    redis.call('HDEL', KEYS[3], head)
+end
+if not redis.call('SET', KEYS[2], ARGV[4], 'NX', 'PX', ARGV[2]) then
+    return 0
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+return 1
+"""
+
+# Same keys; ARGV member, lock token. Leave the queue and free the lock if still ours.
+RELEASE_LUA = """
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+if redis.call('GET', KEYS[2]) == ARGV[2] then
+    return redis.call('DEL', KEYS[2])
+end
+return 0
+"""
+
+# Delay between attempts to take a busy chat lock
+MIN_POLL_SECONDS = 0.01
+MAX_POLL_SECONDS = 0.2
+
+
+class ChatLock:
+    """Processes the updates of one chat one at a time, in update_id order.
+
+    With Redis the order holds across bot replicas; without it (or when Redis
+    fails) per-chat asyncio locks keep the order within this process. A holder
+    that outlives ttl_seconds loses the lock, and an update that waited longer
+    than wait_seconds is processed anyway: ordering is given up before updates are.
+    """
+
+    def __init__(
+        self,
+        redis_client=None,
+        ttl_seconds: Optional[float] = None,
+        wait_seconds: Optional[float] = None
+    ):
+        self._redis = redis_client
+        self._acquire = redis_client.register_script(ACQUIRE_LUA) if redis_client is not None else None
+        self._release = redis_client.register_script(RELEASE_LUA) if redis_client is not None else None
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.chat_lock_ttl_seconds
+        self.wait_seconds = wait_seconds if wait_seconds is not None else settings.chat_lock_wait_seconds
+        # chat id -> (lock, number of updates holding or waiting for it)
+        self._local: Dict[int, Tuple[asyncio.Lock, int]] = {}
+
+    @asynccontextmanager
+    async def hold(self, chat_id: int, update_id: int) -> AsyncIterator[None]:
+        """Wait for the earlier updates of chat_id, then keep it locked for the block."""
+        if self._acquire is not None:
+            keys = self._keys(chat_id)
+            member = str(update_id)
+            token = uuid.uuid4().hex
+            try:
+                await self._acquire_redis(keys, member, token)
+            except Exception as e:
+                logger.warning(f"Redis chat lock unavailable, ordering within this process only: {e}")
+            else:
+                try:
+                    yield
+                finally:
+                    await self._release_redis(keys, member, token)
+                return
+
+        async with self._hold_local(chat_id):
+            yield
+
+    async def _acquire_redis(self, keys: list, member: str, token: str) -> bool:
+        """Poll until the chat is ours; False when wait_seconds ran out first."""
+        ttl_ms = int(self.ttl_seconds * 1000)
+        wait_ms = int(self.wait_seconds * 1000)
+        deadline = time.monotonic() + self.wait_seconds
+        delay = MIN_POLL_SECONDS
+        while True:
+            if int(await self._acquire(keys=keys, args=[member, ttl_ms, wait_ms, token])):
+                return True
+            if time.monotonic() >= deadline:
+                logger.warning(f"Gave up waiting for {keys[1]} after {self.wait_seconds}s, processing out of order")
+                return False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_POLL_SECONDS)
+
+    async def _release_redis(self, keys: list, member: str, token: str) -> None:
+        try:
+            await self._release(keys=keys, args=[member, token])
+        except Exception as e:
+            # The lock expires after ttl_seconds on its own
+            logger.warning(f"Failed to release {keys[1]}: {e}")
+
+    @asynccontextmanager
+    async def _hold_local(self, chat_id: int) -> AsyncIterator[None]:
+        # asyncio.Lock wakes waiters first-in, first-out, i.e. in arrival order
+        lock, users = self._local.get(chat_id, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._local[chat_id] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._local[chat_id]
+            if users == 1:
+                del self._local[chat_id]
+            else:
+                self._local[chat_id] = (lock, users - 1)
+
+    @staticmethod
+    def _keys(chat_id: int) -> list:
+        prefix = f"{CHAT_KEY_PREFIX}{{{chat_id}}}"
+        return [f"{prefix}:queue", f"{prefix}:lock", f"{prefix}:deadlines"]
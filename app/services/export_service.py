@@ -0,0 +1,190 @@
+"""Streaming export of orders and their items for accounting."""
+
+import csv
+import io
+import logging
+from datetime import date
+from typing import AsyncIterator, List, Sequence
+
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.utils.time import get_timezone, local_day_range
+
+logger = logging.getLogger(__name__)
+
+CSV = "csv"
+PARQUET = "parquet"
+EXPORT_FORMATS = (CSV, PARQUET)
+
+# Rows fetched from the server-side cursor per round trip (and per Parquet row group)
+EXPORT_BATCH_SIZE = 5000
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes back to the caller in chunks."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+class OrderExportService:
+    """One row per order line, read with a server-side cursor in constant memory.
+
+    Created times are local to the configured timezone; days are inclusive.
+    """
+
+    COLUMNS = [
+        ("order_id", Order.id),
+        ("order_number", Order.order_number),
+        ("created_at", None),
+        ("status", Order.status),
+        ("payment_method", Order.payment_method),
+        ("payment_status", Order.payment_status),
+        ("subtotal", Order.subtotal),
+        ("delivery_fee", Order.delivery_fee),
+        ("discount_amount", Order.discount_amount),
+        ("order_total", Order.total),
+        ("product_id", OrderItem.product_id),
+        ("product_name", OrderItem.product_name),
+        ("product_price", OrderItem.product_price),
+        ("quantity", OrderItem.quantity),
+        ("modifiers_price", OrderItem.modifiers_price),
+        ("item_total", OrderItem.item_total),
+    ]
+
+    def __init__(self, session: AsyncSession, batch_size: int = EXPORT_BATCH_SIZE):
+        self.session = session
+        self.batch_size = batch_size
+        self.tz = get_timezone()
+
+    @property
+    def header(self) -> List[str]:
+        return [name for name, _ in self.COLUMNS]
+
+    def statement(self, start_date: date, end_date: date):
+        """Order lines of orders created on local days start_date..end_date."""
+        lower, upper = local_day_range(start_date, end_date, self.tz)
+        local_created_at = func.timezone(str(self.tz), Order.created_at)
+        columns = [
+            (column if column is not None else local_created_at).label(name)
+            for name, column in self.COLUMNS
+        ]
+        return (
+            select(*columns)
+            .join(OrderItem, OrderItem.order_id == Order.id)
+            .where(and_(Order.created_at >= lower, Order.created_at < upper))
+            .order_by(Order.created_at, Order.id, OrderItem.id)
+            .execution_options(yield_per=self.batch_size)
+        )
+
+    async def batches(self, start_date: date, end_date: date) -> AsyncIterator[Sequence]:
+        """Row batches of at most batch_size, streamed from the database."""
+        result = await self.session.stream(self.statement(start_date, end_date))
+        try:
+            async for rows in result.partitions(self.batch_size):
+                yield rows
+        finally:
+            await result.close()
+
+    async def iter_csv(self, start_date: date, end_date: date) -> AsyncIterator[bytes]:
+        """UTF-8 CSV with a header row, one chunk per batch."""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(self.header)
+        yield buffer.getvalue().encode()
+
+        async for rows in self.batches(start_date, end_date):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(rows)
+            yield buffer.getvalue().encode()
+
+    async def iter_parquet(self, start_date: date, end_date: date) -> AsyncIterator[bytes]:
+        """Parquet file written one row group per batch (requires pyarrow)."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        money = pa.decimal128(10, 2)
+        schema = pa.schema([
+            ("order_id", pa.int64()),
+            ("order_number", pa.string()),
+            ("created_at", pa.timestamp("us")),
+            ("status", pa.string()),
+            ("payment_method", pa.string()),
+            ("payment_status", pa.string()),
+            ("subtotal", money),
+            ("delivery_fee", money),
+            ("discount_amount", money),
+            ("order_total", money),
+            ("product_id", pa.int64()),
+            ("product_name", pa.string()),
+            ("product_price", money),
+            ("quantity", pa.int32()),
+            ("modifiers_price", money),
+            ("item_total", money),
+        ])
+
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema)
+        try:
+            async for rows in self.batches(start_date, end_date):
+                columns = list(zip(*rows))
+                writer.write_batch(pa.record_batch(
+                    [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                    schema=schema
+                ))
+                yield sink.drain()
+        finally:
+            writer.close()
+        yield sink.drain()
+
+    def iter_export(self, start_date: date, end_date: date, export_format: str = CSV) -> AsyncIterator[bytes]:
+        """Byte chunks of the export in the requested format."""
+        if export_format == PARQUET:
+            return self.iter_parquet(start_date, end_date)
+        if export_format == CSV:
+            return self.iter_csv(start_date, end_date)
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+
+async def stream_orders_export(
+    start_date: date,
+    end_date: date,
+    export_format: str = CSV
+) -> AsyncIterator[bytes]:
+    """Export on its own read session, so it can outlive the request's dependencies."""
+    from app.database import read_session
+
+    async with read_session() as session:
+        async for chunk in OrderExportService(session).iter_export(start_date, end_date, export_format):
+            yield chunk
+
+
+def parquet_available() -> bool:
+    """Parquet export needs the optional pyarrow package."""
+    try:
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
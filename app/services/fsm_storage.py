@@ -0,0 +1,75 @@
+"""FSM storage for bot dialogs (checkout, staff forms) shared by bot replicas."""
+
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def dumps(data: Any) -> str:
+    """Compact JSON: no spaces, and Cyrillic addresses as UTF-8 instead of \\u escapes."""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def create_fsm_storage(redis_client=None, ttl_seconds: Optional[int] = None) -> BaseStorage:
+    """Redis storage on the shared pool, or process memory when Redis is not available.
+
+    State and data expire after ttl_seconds without changes, so abandoned
+    checkouts do not pile up in Redis.
+    """
+    if redis_client is None:
+        return MemoryStorage()
+
+    from aiogram.fsm.storage.redis import RedisStorage
+
+    ttl = ttl_seconds if ttl_seconds is not None else settings.fsm_state_ttl_seconds
+    redis_storage = RedisStorage(
+        redis_client,
+        state_ttl=ttl,
+        data_ttl=ttl,
+        json_dumps=dumps,
+        json_loads=json.loads
+    )
+    return FallbackStorage(redis_storage)
+
+
+class FallbackStorage(BaseStorage):
+    """Uses the primary storage and falls back to process memory per call when it fails.
+
+    While Redis is down a dialog continues in this process only; once Redis is
+    back the state stored there wins again.
+    """
+
+    def __init__(self, primary: BaseStorage, fallback: Optional[BaseStorage] = None):
+        self.primary = primary
+        self.fallback = fallback or MemoryStorage()
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await self._call("set_state", key, state)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return await self._call("get_state", key)
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        await self._call("set_data", key, data)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return await self._call("get_data", key)
+
+    async def close(self) -> None:
+        # The primary's Redis pool is shared and closed by close_redis()
+        await self.fallback.close()
+
+    async def _call(self, method: str, *args: Any) -> Any:
+        try:
+            return await getattr(self.primary, method)(*args)
+        except Exception as e:
+            logger.warning(f"FSM storage unavailable, using process memory: {e}")
+            return await getattr(self.fallback, method)(*args)
+
@@ -0,0 +1,96 @@
+"""Progress of running menu imports, readable by polling clients."""
+
+import json
+import logging
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+IMPORT_KEY_PREFIX = "import:progress:"
+
+# Errors kept in full; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+# How long a finished import stays visible to pollers
+PROGRESS_TTL_SECONDS = 3600
+
+
+@dataclass
+class ImportProgress:
+    """Counters of one import; imported stays 0 until the import commits."""
+
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    dry_run: bool = False
+    rows: int = 0
+    valid: int = 0
+    imported: int = 0
+    error_count: int = 0
+    errors: List[str] = field(default_factory=list)
+    done: bool = False
+
+    @property
+    def success(self) -> bool:
+        return self.error_count == 0
+
+    def add_error(self, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(message)
+
+    def as_dict(self) -> Dict:
+        return {**asdict(self), "success": self.success}
+
+
+class ImportProgressStore:
+    """In-process progress by job id, mirrored to Redis when it is available."""
+
+    def __init__(self, ttl_seconds: int = PROGRESS_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._local: Dict[str, Tuple[float, ImportProgress]] = {}
+
+    async def put(self, progress: ImportProgress) -> None:
+        """Publish the current state of an import."""
+        now = time.monotonic()
+        self._local = {
+            job_id: entry for job_id, entry in self._local.items() if entry[0] > now
+        }
+        self._local[progress.job_id] = (now + self.ttl_seconds, progress)
+
+        redis = self._redis()
+        if redis is None:
+            return
+        try:
+            await redis.set(
+                f"{IMPORT_KEY_PREFIX}{progress.job_id}",
+                json.dumps(progress.as_dict()),
+                ex=self.ttl_seconds
+            )
+        except Exception as e:
+            logger.warning(f"Failed to publish import progress: {e}")
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        """Latest progress of a job, possibly reported by another process."""
+        entry = self._local.get(job_id)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1].as_dict()
+
+        redis = self._redis()
+        if redis is None:
+            return None
+        try:
+            raw = await redis.get(f"{IMPORT_KEY_PREFIX}{job_id}")
+        except Exception as e:
+            logger.warning(f"Failed to read import progress: {e}")
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    @staticmethod
+    def _redis():
+        from app.redis_pool import get_redis
+        return get_redis()
+
+
+import_progress = ImportProgressStore()
@@ -2,20 +2,98 @@
 
 import json
 import csv
+import codecs
 import io
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Optional, Set
 
+from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.models.category import Category
 from app.models.product import Product
 from app.models.modifier import Modifier, ModifierOption, ProductModifier
+from app.services.import_progress import ImportProgress
+from app.services.menu_cache import menu_cache
 from app.utils.exceptions import ValidationException
 
 
+@dataclass
+class CategoryRow:
+    """Parsed category; parent is the index of its parent in the same parse."""
+    
+    values: Dict[str, Any]
+    depth: int = 0
+    parent: Optional[int] = None
+
+
+@dataclass
+class ProductRow:
+    """Parsed product with the modifiers to link; row is the 1-based source row."""
+    
+    row: int
+    values: Dict[str, Any]
+    modifier_ids: List[int] = field(default_factory=list)
+
+
+@dataclass
+class ModifierRow:
+    """Parsed modifier with its options."""
+    
+    values: Dict[str, Any]
+    options: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def _int(value: Any, name: str, default: Optional[int] = None) -> Optional[int]:
+    if value is None or value == "":
+        return default
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValidationException(f"Invalid {name}: {value}")
+
+
+def _complete_records_end(text: str) -> int:
+    """Offset just past the last newline that is not inside a quoted field."""
+    end = 0
+    start = 0
+    quotes = 0
+    while True:
+        newline = text.find("\n", start)
+        if newline == -1:
+            return end
+        quotes += text.count('"', start, newline)
+        if quotes % 2 == 0:
+            end = newline + 1
+        start = newline + 1
+
+
+async def iter_csv_records(stream: AsyncIterable[bytes], encoding: str = "utf-8-sig") -> AsyncIterator[List[str]]:
+    """CSV records parsed incrementally from a byte stream; only a partial record is buffered."""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    pending = ""
+    async for chunk in stream:
+        pending += decoder.decode(chunk)
+        end = _complete_records_end(pending)
+        if end:
+            for record in csv.reader(io.StringIO(pending[:end])):
+                if record:
+                    yield record
+            pending = pending[end:]
+    pending += decoder.decode(b"", final=True)
+    for record in csv.reader(io.StringIO(pending)):
+        if record:
+            yield record
+
+
 class ImportService:
-    """Service for importing data from various formats."""
+    """Service for importing data from various formats.
+    
+    The whole payload is parsed and validated before anything is written;
+    rows are then inserted set-based, a few statements per table. Any error
+    rolls the import back, and errors are reported per row.
+    """
     
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -34,28 +112,29 @@ class ImportService:
         if not isinstance(data, list):
             raise ValidationException("JSON must be an array of categories")
         
-        imported = 0
+        categories: List[CategoryRow] = []
         errors = []
+        for idx, item in enumerate(data):
+            try:
+                self._parse_category(item, categories)
+            except Exception as e:
+                errors.append(f"Row {idx + 1}: {str(e)}")
         
-        # Use nested transaction for atomic import
-        async with self.session.begin_nested() as nested:
-            for idx, item in enumerate(data):
+        if not errors:
+            # Use nested transaction for atomic import
+            async with self.session.begin_nested() as nested:
                 try:
-                    await self._import_category(item)
-                    imported += 1
+                    await self._insert_categories(categories)
                 except Exception as e:
-                    errors.append(f"Row {idx + 1}: {str(e)}")
-            
-            # Rollback if any errors occurred
-            if errors:
-                await nested.rollback()
-                imported = 0
-            else:
-                await self.session.commit()
+                    errors.append(f"Import failed: {str(e)}")
+                    await nested.rollback()
+                else:
+                    await self.session.commit()
+                    await menu_cache.invalidate()
         
         return {
             "success": len(errors) == 0,
-            "imported": imported,
+            "imported": 0 if errors else len(data),
             "errors": errors
         }
     
@@ -70,30 +149,107 @@ class ImportService:
         except Exception as e:
             raise ValidationException(f"Invalid CSV: {str(e)}")
         
-        imported = 0
+        products: List[ProductRow] = []
         errors = []
+        for idx, row in enumerate(reader):
+            try:
+                products.append(self._product_from_csv_row(idx + 1, row))
+            except Exception as e:
+                errors.append(f"Row {idx + 1}: {str(e)}")
+        
+        if not errors:
+            # Use nested transaction for atomic import
+            async with self.session.begin_nested() as nested:
+                try:
+                    errors = await self._check_product_references(products, "Row")
+                    if not errors:
+                        await self._insert_products(products)
+                except Exception as e:
+                    errors.append(f"Import failed: {str(e)}")
+                
+                # Rollback if any errors occurred
+                if errors:
+                    await nested.rollback()
+                else:
+                    await self.session.commit()
+                    await menu_cache.invalidate()
+        
+        return {
+            "success": len(errors) == 0,
+            "imported": 0 if errors else len(products),
+            "errors": errors
+        }
+    
+    async def import_products_from_stream(
+        self,
+        stream: AsyncIterable[bytes],
+        actor_user_id: int,
+        batch_size: Optional[int] = None,
+        dry_run: bool = False,
+        progress: Optional[ImportProgress] = None,
+        on_progress: Optional[Callable[[ImportProgress], Awaitable[None]]] = None
+    ) -> ImportProgress:
+        """Import products from a CSV byte stream in batches.
+        
+        Memory is bounded by one batch. Each batch is validated and inserted
+        in its own savepoint inside the import's savepoint, so a failure
+        anywhere still rolls back the whole import. After the first error
+        the remaining rows are only validated. A dry run validates
+        everything and writes nothing.
+        """
+        batch_size = batch_size or settings.import_batch_size
+        progress = progress or ImportProgress(dry_run=dry_run)
+        progress.dry_run = dry_run
+        
+        async def report() -> None:
+            if on_progress is not None:
+                await on_progress(progress)
         
         # Use nested transaction for atomic import
         async with self.session.begin_nested() as nested:
-            for idx, row in enumerate(reader):
+            header = None
+            batch: List[ProductRow] = []
+            async for record in iter_csv_records(stream):
+                if header is None:
+                    header = [name.strip() for name in record]
+                    continue
+                progress.rows += 1
                 try:
-                    await self._import_product_from_csv_row(row)
-                    imported += 1
+                    batch.append(self._product_from_csv_row(progress.rows, dict(zip(header, record))))
                 except Exception as e:
-                    errors.append(f"Row {idx + 1}: {str(e)}")
+                    progress.add_error(f"Row {progress.rows}: {str(e)}")
+                if len(batch) >= batch_size:
+                    await self._import_product_batch(batch, progress)
+                    batch = []
+                    await report()
+            if batch:
+                await self._import_product_batch(batch, progress)
             
             # Rollback if any errors occurred
-            if errors:
+            if progress.error_count or dry_run:
                 await nested.rollback()
-                imported = 0
             else:
                 await self.session.commit()
+                await menu_cache.invalidate()
+                progress.imported = progress.valid
         
-        return {
-            "success": len(errors) == 0,
-            "imported": imported,
-            "errors": errors
-        }
+        progress.done = True
+        await report()
+        return progress
+    
+    async def _import_product_batch(self, products: List[ProductRow], progress: ImportProgress) -> None:
+        """Validate references of a batch and insert it unless the import already failed."""
+        try:
+            async with self.session.begin_nested():
+                errors = await self._check_product_references(products, "Row")
+                for error in errors:
+                    progress.add_error(error)
+                # Errors are prefixed with "Row N"
+                progress.valid += len(products) - len({error.split(":", 1)[0] for error in errors})
+                if not progress.error_count and not progress.dry_run:
+                    await self._insert_products(products)
+        except Exception as e:
+            progress.add_error(f"Rows {products[0].row}-{products[-1].row}: Import failed: {str(e)}")
     
     async def import_menu_full(
         self,
@@ -107,91 +263,102 @@ class ImportService:
             "modifiers": {"imported": 0, "errors": []}
         }
         
-        # Use nested transaction for atomic import
-        async with self.session.begin_nested() as nested:
-            # Import categories
-            if "categories" in data:
-                for idx, cat_data in enumerate(data["categories"]):
-                    try:
-                        await self._import_category_hierarchy(cat_data)
-                        stats["categories"]["imported"] += 1
-                    except Exception as e:
-                        stats["categories"]["errors"].append(f"Category {idx + 1}: {str(e)}")
-            
-            # Import modifiers
-            if "modifiers" in data:
-                for idx, mod_data in enumerate(data["modifiers"]):
-                    try:
-                        await self._import_modifier(mod_data)
-                        stats["modifiers"]["imported"] += 1
-                    except Exception as e:
-                        stats["modifiers"]["errors"].append(f"Modifier {idx + 1}: {str(e)}")
-            
-            # Import products
-            if "products" in data:
-                for idx, prod_data in enumerate(data["products"]):
-                    try:
-                        await self._import_product(prod_data)
-                        stats["products"]["imported"] += 1
-                    except Exception as e:
-                        stats["products"]["errors"].append(f"Product {idx + 1}: {str(e)}")
-            
-            # Rollback if any errors occurred
-            has_errors = any(
-                stats[key]["errors"] for key in ["categories", "products", "modifiers"]
-            )
-            if has_errors:
-                await nested.rollback()
-                for key in ["categories", "products", "modifiers"]:
-                    stats[key]["imported"] = 0
-            else:
-                await self.session.commit()
+        # Parse everything before touching the database
+        categories: List[CategoryRow] = []
+        for idx, cat_data in enumerate(data.get("categories") or []):
+            try:
+                self._parse_category(cat_data, categories)
+                stats["categories"]["imported"] += 1
+            except Exception as e:
+                stats["categories"]["errors"].append(f"Category {idx + 1}: {str(e)}")
+        
+        modifiers: List[ModifierRow] = []
+        for idx, mod_data in enumerate(data.get("modifiers") or []):
+            try:
+                modifiers.append(self._parse_modifier(mod_data))
+                stats["modifiers"]["imported"] += 1
+            except Exception as e:
+                stats["modifiers"]["errors"].append(f"Modifier {idx + 1}: {str(e)}")
+        
+        products: List[ProductRow] = []
+        for idx, prod_data in enumerate(data.get("products") or []):
+            try:
+                products.append(self._parse_product(idx + 1, prod_data))
+                stats["products"]["imported"] += 1
+            except Exception as e:
+                stats["products"]["errors"].append(f"Product {idx + 1}: {str(e)}")
+        
+        def has_errors() -> bool:
+            return any(stats[key]["errors"] for key in ["categories", "products", "modifiers"])
+        
+        if not has_errors():
+            # Use nested transaction for atomic import
+            async with self.session.begin_nested() as nested:
+                section = "categories"
+                try:
+                    await self._insert_categories(categories)
+                    section = "modifiers"
+                    await self._insert_modifiers(modifiers)
+                    # Products may link modifiers created above
+                    section = "products"
+                    stats["products"]["errors"] = await self._check_product_references(products, "Product")
+                    if not stats["products"]["errors"]:
+                        await self._insert_products(products)
+                except Exception as e:
+                    stats[section]["errors"].append(f"Import failed: {str(e)}")
+                
+                # Rollback if any errors occurred
+                if has_errors():
+                    await nested.rollback()
+                else:
+                    await self.session.commit()
+                    await menu_cache.invalidate()
+        
+        if has_errors():
+            for key in ["categories", "products", "modifiers"]:
+                stats[key]["imported"] = 0
         
         return {
-            "success": not has_errors,
+            "success": not has_errors(),
             "stats": stats
         }
     
-    async def _import_category(
+    def _parse_category(
         self,
         data: Dict[str, Any],
-        parent_id: Optional[int] = None
-    ) -> Category:
-        """Import a single category."""
+        categories: List[CategoryRow],
+        parent: Optional[int] = None,
+        depth: int = 0
+    ) -> None:
+        """Append a category and its children to categories, parents first."""
+        if not isinstance(data, dict):
+            raise ValidationException("Category must be an object")
         name = data.get("name")
         if not name:
             raise ValidationException("Category name is required")
         
-        category = Category(
-            name=name,
-            description=data.get("description"),
-            parent_id=parent_id,
-            level=data.get("level", 1 if parent_id is None else 2),
-            sort_order=data.get("sort_order", 0),
-            image_url=data.get("image_url"),
-            is_active=data.get("is_active", True),
-            is_archived=False
-        )
-        
-        self.session.add(category)
-        await self.session.flush()
+        categories.append(CategoryRow(
+            values={
+                "name": name,
+                "description": data.get("description"),
+                "parent_id": None,
+                "level": _int(data.get("level"), "level", 1 if parent is None else 2),
+                "sort_order": _int(data.get("sort_order"), "sort_order", 0),
+                "image_url": data.get("image_url"),
+                "is_active": data.get("is_active", True),
+                "is_archived": False
+            },
+            depth=depth,
+            parent=parent
+        ))
+        index = len(categories) - 1
         
-        # Import children if present
         if "children" in data and isinstance(data["children"], list):
             for child_data in data["children"]:
-                await self._import_category(child_data, category.id)
-        
-        return category
-    
-    async def _import_category_hierarchy(
-        self,
-        data: Dict[str, Any]
-    ) -> Category:
-        """Import category with full hierarchy."""
-        return await self._import_category(data, None)
+                self._parse_category(child_data, categories, index, depth + 1)
     
-    async def _import_product(self, data: Dict[str, Any]) -> Product:
-        """Import a single product."""
+    def _parse_product(self, row: int, data: Dict[str, Any]) -> ProductRow:
+        """Validate a product payload without touching the database."""
         name = data.get("name")
         category_id = data.get("category_id")
         price = data.get("price")
@@ -200,7 +367,7 @@ class ImportService:
             raise ValidationException("Product name is required")
         if not category_id:
             raise ValidationException("Product category_id is required")
-        if price is None:
+        if price is None or price == "":
             raise ValidationException("Product price is required")
         
         try:
@@ -208,79 +375,151 @@ class ImportService:
         except (TypeError, ValueError):
             raise ValidationException(f"Invalid price: {price}")
         
-        product = Product(
-            name=name,
-            description=data.get("description"),
-            price=price,
-            category_id=int(category_id),
-            stock_quantity=data.get("stock_quantity"),
-            track_stock=data.get("track_stock", False),
-            sort_order=data.get("sort_order", 0),
-            image_url=data.get("image_url"),
-            is_active=data.get("is_active", True),
-            is_archived=False
-        )
-        
-        self.session.add(product)
-        await self.session.flush()
-        
-        # Assign modifiers if specified
+        modifier_ids = []
         if "modifier_ids" in data and isinstance(data["modifier_ids"], list):
             for mod_id in data["modifier_ids"]:
-                link = ProductModifier(
-                    product_id=product.id,
-                    modifier_id=int(mod_id)
-                )
-                self.session.add(link)
+                mod_id = _int(mod_id, "modifier id")
+                if mod_id is not None and mod_id not in modifier_ids:
+                    modifier_ids.append(mod_id)
         
-        return product
+        return ProductRow(
+            row=row,
+            values={
+                "name": name,
+                "description": data.get("description"),
+                "price": price,
+                "category_id": _int(category_id, "category_id"),
+                "stock_quantity": _int(data.get("stock_quantity"), "stock_quantity"),
+                "track_stock": data.get("track_stock", False),
+                "sort_order": _int(data.get("sort_order"), "sort_order", 0),
+                "image_url": data.get("image_url"),
+                "is_active": data.get("is_active", True),
+                "is_archived": False
+            },
+            modifier_ids=modifier_ids
+        )
     
-    async def _import_product_from_csv_row(self, row: Dict[str, str]) -> Product:
-        """Import product from CSV row."""
+    def _product_from_csv_row(self, row_number: int, row: Dict[str, str]) -> ProductRow:
+        """Parse a product from a CSV row."""
         data = {
             "name": row.get("name"),
             "description": row.get("description"),
             "price": row.get("price"),
             "category_id": row.get("category_id"),
             "stock_quantity": row.get("stock_quantity"),
-            "track_stock": row.get("track_stock", "false").lower() == "true",
+            "track_stock": (row.get("track_stock") or "false").lower() == "true",
             "sort_order": row.get("sort_order", "0"),
             "image_url": row.get("image_url"),
-            "is_active": row.get("is_active", "true").lower() == "true"
+            "is_active": (row.get("is_active") or "true").lower() == "true"
         }
-        return await self._import_product(data)
+        return self._parse_product(row_number, data)
     
-    async def _import_modifier(self, data: Dict[str, Any]) -> Modifier:
-        """Import a modifier with options."""
+    def _parse_modifier(self, data: Dict[str, Any]) -> ModifierRow:
+        """Validate a modifier with options."""
+        if not isinstance(data, dict):
+            raise ValidationException("Modifier must be an object")
         name = data.get("name")
         if not name:
             raise ValidationException("Modifier name is required")
         
-        modifier = Modifier(
-            name=name,
-            description=data.get("description"),
-            is_required=data.get("is_required", False),
-            is_multiple=data.get("is_multiple", False),
-            sort_order=data.get("sort_order", 0),
-            is_active=data.get("is_active", True)
-        )
-        
-        self.session.add(modifier)
-        await self.session.flush()
-        
-        # Import options
+        options = []
         if "options" in data and isinstance(data["options"], list):
             for opt_data in data["options"]:
-                option = ModifierOption(
-                    modifier_id=modifier.id,
-                    name=opt_data.get("name", "Option"),
-                    price_adjustment=float(opt_data.get("price_adjustment", 0)),
-                    sort_order=opt_data.get("sort_order", 0),
-                    is_active=opt_data.get("is_active", True)
-                )
-                self.session.add(option)
-        
-        return modifier
+                try:
+                    price_adjustment = float(opt_data.get("price_adjustment", 0))
+                except (TypeError, ValueError):
+                    raise ValidationException(f"Invalid price_adjustment: {opt_data.get('price_adjustment')}")
+                options.append({
+                    "name": opt_data.get("name", "Option"),
+                    "price_adjustment": price_adjustment,
+                    "sort_order": _int(opt_data.get("sort_order"), "sort_order", 0),
+                    "is_active": opt_data.get("is_active", True)
+                })
+        
+        return ModifierRow(
+            values={
+                "name": name,
+                "description": data.get("description"),
+                "is_required": data.get("is_required", False),
+                "is_multiple": data.get("is_multiple", False),
+                "sort_order": _int(data.get("sort_order"), "sort_order", 0),
+                "is_active": data.get("is_active", True)
+            },
+            options=options
+        )
+    
+    async def _existing_ids(self, model, ids: Set[int]) -> Set[int]:
+        """Subset of ids present in model's table, in one query."""
+        if not ids:
+            return set()
+        result = await self.session.execute(select(model.id).where(model.id.in_(ids)))
+        return set(result.scalars().all())
+    
+    async def _check_product_references(self, products: List[ProductRow], label: str) -> List[str]:
+        """Per-row errors for unknown category_id and modifier_ids."""
+        category_ids = await self._existing_ids(
+            Category, {product.values["category_id"] for product in products}
+        )
+        modifier_ids = await self._existing_ids(
+            Modifier, {mod_id for product in products for mod_id in product.modifier_ids}
+        )
+        
+        errors = []
+        for product in products:
+            if product.values["category_id"] not in category_ids:
+                errors.append(f"{label} {product.row}: Unknown category_id: {product.values['category_id']}")
+            missing = [mod_id for mod_id in product.modifier_ids if mod_id not in modifier_ids]
+            if missing:
+                errors.append(f"{label} {product.row}: Unknown modifier_ids: {missing}")
+        return errors
+    
+    async def _insert_returning_ids(self, model, rows: List[Dict[str, Any]]) -> List[int]:
+        """Bulk INSERT ... RETURNING id, ids in the order of rows."""
+        if not rows:
+            return []
+        result = await self.session.scalars(
+            insert(model).returning(model.id, sort_by_parameter_order=True),
+            rows
+        )
+        return list(result.all())
+    
+    async def _insert_categories(self, categories: List[CategoryRow]) -> None:
+        """Insert categories level by level so children get their parents' ids."""
+        ids: Dict[int, int] = {}
+        depth = 0
+        while True:
+            level = [(index, row) for index, row in enumerate(categories) if row.depth == depth]
+            if not level:
+                return
+            rows = [
+                {**row.values, "parent_id": ids[row.parent] if row.parent is not None else None}
+                for _, row in level
+            ]
+            for (index, _), category_id in zip(level, await self._insert_returning_ids(Category, rows)):
+                ids[index] = category_id
+            depth += 1
+    
+    async def _insert_modifiers(self, modifiers: List[ModifierRow]) -> None:
+        """Insert modifiers, then all their options in one executemany."""
+        modifier_ids = await self._insert_returning_ids(Modifier, [m.values for m in modifiers])
+        options = [
+            {**option, "modifier_id": modifier_id}
+            for modifier, modifier_id in zip(modifiers, modifier_ids)
+            for option in modifier.options
+        ]
+        if options:
+            await self.session.execute(insert(ModifierOption), options)
+    
+    async def _insert_products(self, products: List[ProductRow]) -> None:
+        """Insert products, then their modifier links in one executemany."""
+        product_ids = await self._insert_returning_ids(Product, [p.values for p in products])
+        links = [
+            {"product_id": product_id, "modifier_id": modifier_id}
+            for product, product_id in zip(products, product_ids)
+            for modifier_id in product.modifier_ids
+        ]
+        if links:
+            await self.session.execute(insert(ProductModifier), links)
     
     def validate_import_data(self, data: Dict[str, Any]) -> List[str]:
         """Validate import data structure."""
@@ -0,0 +1,370 @@
+"""Process-wide immutable menu snapshot shared by bot and API readers."""
+
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.category import Category
+from app.models.modifier import Modifier, ModifierOption, ProductModifier
+from app.models.product import Product
+
+logger = logging.getLogger(__name__)
+
+MENU_VERSION_KEY = "menu:version"
+MENU_CHANNEL = "menu:invalidate"
+
+
+@dataclass(frozen=True)
+class CategoryView:
+    """Read-only category as seen by menu readers."""
+
+    id: int
+    name: str
+    description: Optional[str]
+    sort_order: int
+    parent_id: Optional[int]
+    level: int
+    image_url: Optional[str]
+    created_at: datetime
+    is_active: bool = True
+    is_archived: bool = False
+
+
+@dataclass(frozen=True)
+class ModifierOptionView:
+    """Read-only modifier option."""
+
+    id: int
+    modifier_id: int
+    name: str
+    price_adjustment: Decimal
+    sort_order: int
+
+
+@dataclass(frozen=True)
+class ModifierView:
+    """Read-only modifier with its active options."""
+
+    id: int
+    name: str
+    description: Optional[str]
+    is_required: bool
+    is_multiple: bool
+    sort_order: int
+    options: Tuple[ModifierOptionView, ...]
+
+
+@dataclass(frozen=True)
+class ProductView:
+    """Read-only product as seen by menu readers."""
+
+    id: int
+    name: str
+    description: Optional[str]
+    price: Decimal
+    category_id: int
+    stock_quantity: Optional[int]
+    track_stock: bool
+    image_url: Optional[str]
+    sort_order: int
+    created_at: datetime
+    modifier_ids: Tuple[int, ...] = ()
+    is_active: bool = True
+    is_archived: bool = False
+
+    @property
+    def is_available(self) -> bool:
+        """Check if product is available for ordering."""
+        if self.track_stock and self.stock_quantity is not None:
+            return self.stock_quantity > 0
+        return True
+
+
+@dataclass(frozen=True)
+class MenuSnapshot:
+    """Active, non-archived menu indexed for O(1) lookups."""
+
+    version: int
+    categories: Mapping[int, CategoryView]
+    children: Mapping[Optional[int], Tuple[CategoryView, ...]]
+    products: Mapping[int, ProductView]
+    products_by_category: Mapping[int, Tuple[ProductView, ...]]
+    available_products: Tuple[ProductView, ...]
+    modifiers: Mapping[int, ModifierView]
+    # Identifies the menu state across processes (ETag source)
+    tag: str = ""
+
+    def get_children(self, parent_id: Optional[int]) -> List[CategoryView]:
+        """Visible subcategories of parent_id (root when None)."""
+        return list(self.children.get(parent_id, ()))
+
+    def get_products(self, category_id: int) -> List[ProductView]:
+        """Visible products of a category."""
+        return list(self.products_by_category.get(category_id, ()))
+
+    def get_product_modifiers(self, product_id: int) -> List[ModifierView]:
+        """Active modifiers attached to a product."""
+        product = self.products.get(product_id)
+        if product is None:
+            return []
+        return [self.modifiers[m] for m in product.modifier_ids if m in self.modifiers]
+
+
+def _sort_key(item) -> tuple:
+    return (item.sort_order, item.name)
+
+
+def option_view(option: ModifierOption) -> ModifierOptionView:
+    """Freeze a modifier option row."""
+    return ModifierOptionView(
+        id=option.id,
+        modifier_id=option.modifier_id,
+        name=option.name,
+        price_adjustment=Decimal(str(option.price_adjustment)),
+        sort_order=option.sort_order
+    )
+
+
+def modifier_view(modifier: Modifier, options) -> ModifierView:
+    """Freeze a modifier row with the given option views."""
+    return ModifierView(
+        id=modifier.id,
+        name=modifier.name,
+        description=modifier.description,
+        is_required=modifier.is_required,
+        is_multiple=modifier.is_multiple,
+        sort_order=modifier.sort_order,
+        options=tuple(sorted(options, key=_sort_key))
+    )
+
+
+def product_view(product: Product, modifier_ids=()) -> ProductView:
+    """Freeze a product row."""
+    return ProductView(
+        id=product.id,
+        name=product.name,
+        description=product.description,
+        price=Decimal(str(product.price)),
+        category_id=product.category_id,
+        stock_quantity=product.stock_quantity,
+        track_stock=product.track_stock,
+        image_url=product.image_url,
+        sort_order=product.sort_order,
+        created_at=product.created_at,
+        modifier_ids=tuple(modifier_ids)
+    )
+
+
+async def build_snapshot(session: AsyncSession, version: int = 0, tag: str = "") -> MenuSnapshot:
+    """Load the visible menu from the database into an immutable snapshot."""
+    category_rows = (await session.execute(
+        select(Category).where(Category.is_active == True, Category.is_archived == False)
+    )).scalars().all()
+    product_rows = (await session.execute(
+        select(Product).where(Product.is_active == True, Product.is_archived == False)
+    )).scalars().all()
+    modifier_rows = (await session.execute(
+        select(Modifier).where(Modifier.is_active == True)
+    )).scalars().all()
+    option_rows = (await session.execute(
+        select(ModifierOption).where(ModifierOption.is_active == True)
+    )).scalars().all()
+    link_rows = (await session.execute(
+        select(ProductModifier).order_by(ProductModifier.product_id, ProductModifier.sort_order)
+    )).scalars().all()
+
+    categories = {
+        c.id: CategoryView(
+            id=c.id,
+            name=c.name,
+            description=c.description,
+            sort_order=c.sort_order,
+            parent_id=c.parent_id,
+            level=c.level,
+            image_url=c.image_url,
+            created_at=c.created_at
+        )
+        for c in category_rows
+    }
+    children: Dict[Optional[int], List[CategoryView]] = {}
+    for category in categories.values():
+        children.setdefault(category.parent_id, []).append(category)
+
+    options_by_modifier: Dict[int, List[ModifierOptionView]] = {}
+    for o in option_rows:
+        options_by_modifier.setdefault(o.modifier_id, []).append(option_view(o))
+    modifiers = {
+        m.id: modifier_view(m, options_by_modifier.get(m.id, []))
+        for m in modifier_rows
+    }
+
+    modifier_ids: Dict[int, List[int]] = {}
+    for link in link_rows:
+        modifier_ids.setdefault(link.product_id, []).append(link.modifier_id)
+
+    # Products of hidden categories are not part of the menu
+    products = {
+        p.id: product_view(p, modifier_ids.get(p.id, ()))
+        for p in product_rows
+        if p.category_id in categories
+    }
+    by_category: Dict[int, List[ProductView]] = {}
+    for product in products.values():
+        by_category.setdefault(product.category_id, []).append(product)
+
+    return MenuSnapshot(
+        version=version,
+        categories=MappingProxyType(categories),
+        children=MappingProxyType({k: tuple(sorted(v, key=_sort_key)) for k, v in children.items()}),
+        products=MappingProxyType(products),
+        products_by_category=MappingProxyType({k: tuple(sorted(v, key=_sort_key)) for k, v in by_category.items()}),
+        available_products=tuple(sorted(products.values(), key=_sort_key)),
+        modifiers=MappingProxyType(modifiers),
+        tag=tag or str(version)
+    )
+
+
+class MenuCache:
+    """Holds the current menu snapshot and keeps it in sync across processes."""
+
+    def __init__(self, ttl_seconds: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.menu_cache_ttl_seconds
+        self._snapshot: Optional[MenuSnapshot] = None
+        self._built_at = 0.0
+        self._generation = 0
+        self._builds = 0
+        # Local versions are only meaningful within this process
+        self._instance = uuid.uuid4().hex[:8]
+        self._lock = asyncio.Lock()
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def peek(self) -> Optional[MenuSnapshot]:
+        """Current snapshot if it is built and fresh, without touching the database."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+        if self.ttl_seconds and time.monotonic() - self._built_at > self.ttl_seconds:
+            return None
+        return snapshot
+
+    async def get(self, session: AsyncSession) -> MenuSnapshot:
+        """Current snapshot, rebuilding it when missing or stale.
+
+        session may be a replica session; rebuilds still read the primary.
+        """
+        snapshot = self.peek()
+        if snapshot is not None:
+            return snapshot
+
+        async with self._lock:
+            snapshot = self.peek()
+            if snapshot is not None:
+                return snapshot
+            generation = self._generation
+            version, tag = await self._next_version()
+            snapshot = await self._build(session, version, tag)
+            # Do not publish a snapshot built while a write invalidated the menu
+            if generation == self._generation:
+                self._snapshot = snapshot
+                self._built_at = time.monotonic()
+            return snapshot
+
+    async def _build(self, session: AsyncSession, version: int, tag: str) -> MenuSnapshot:
+        # A lagging replica would be cached (and ETagged) under the new version
+        from app import database
+
+        replica = database.read_engine
+        if replica is None or replica is database.engine or getattr(session, "bind", None) is not replica:
+            return await build_snapshot(session, version, tag)
+        async with database.AsyncSessionLocal() as primary:
+            return await build_snapshot(primary, version, tag)
+
+    def invalidate_local(self) -> None:
+        """Drop the snapshot held by this process."""
+        self._generation += 1
+        self._snapshot = None
+
+    async def invalidate(self) -> None:
+        """Drop the snapshot here and notify other processes through Redis."""
+        self.invalidate_local()
+        if self._redis is None:
+            return
+        try:
+            version = await self._redis.incr(MENU_VERSION_KEY)
+            await self._redis.publish(MENU_CHANNEL, version)
+        except Exception as e:
+            logger.warning(f"Failed to publish menu invalidation: {e}")
+
+    def current_tag(self) -> Optional[str]:
+        """Tag of the fresh snapshot, or None when it has to be rebuilt."""
+        snapshot = self.peek()
+        return snapshot.tag if snapshot is not None else None
+
+    async def _next_version(self) -> Tuple[int, str]:
+        """Version and tag for a snapshot about to be built."""
+        if self._redis is not None:
+            try:
+                version = int(await self._redis.get(MENU_VERSION_KEY) or 0)
+                return version, str(version)
+            except Exception as e:
+                logger.warning(f"Failed to read menu version: {e}")
+        self._builds += 1
+        return self._builds, f"{self._instance}.{self._builds}"
+
+    def start(self, redis_client) -> None:
+        """Attach Redis and start listening for invalidations from other processes."""
+        self._redis = redis_client
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """Stop the invalidation listener."""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        self._redis = None
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(MENU_CHANNEL)
+                # Messages may have been missed while not subscribed
+                self.invalidate_local()
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    self._on_version(int(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Menu invalidation listener error: {e}")
+                await asyncio.sleep(5)
+            finally:
+                try:
+                    await pubsub.close()
+                except Exception:
+                    pass
+
+    def _on_version(self, version: int) -> None:
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.version < version:
+            self.invalidate_local()
+
+
+menu_cache = MenuCache()
@@ -1,14 +1,26 @@
 """Menu service for managing categories and products."""
 
-from typing import List, Optional
+import base64
+import json
+from typing import Any, List, Optional, Sequence, Tuple, Union
 
-from sqlalchemy import select, and_, or_
+from sqlalchemy import func, select, and_, or_, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.models.category import Category
 from app.models.product import Product
 from app.models.modifier import Modifier, ModifierOption, ProductModifier
+from app.services.menu_cache import (
+    CategoryView,
+    ModifierOptionView,
+    ModifierView,
+    ProductView,
+    menu_cache,
+    modifier_view,
+    option_view,
+    product_view,
+)
 from app.utils.exceptions import NotFoundException, ValidationException
 
 
@@ -35,8 +47,12 @@ class MenuService:
         parent_id: Optional[int] = None,
         include_inactive: bool = False,
         include_archived: bool = False
-    ) -> List[Category]:
+    ) -> List[Union[Category, CategoryView]]:
         """Get category tree starting from parent_id."""
+        if not include_inactive and not include_archived:
+            snapshot = await menu_cache.get(self.session)
+            return snapshot.get_children(parent_id)
+        
         query = select(Category).where(Category.parent_id == parent_id)
         
         if not include_inactive:
@@ -100,6 +116,7 @@ class MenuService:
         self.session.add(category)
         await self.session.flush()
         await self.session.commit()
+        await menu_cache.invalidate()
         return category
     
     async def update_category(
@@ -127,6 +144,7 @@ class MenuService:
         
         await self.session.flush()
         await self.session.commit()
+        await menu_cache.invalidate()
         return category
     
     # Product operations
@@ -148,8 +166,12 @@ class MenuService:
         category_id: int,
         include_inactive: bool = False,
         include_archived: bool = False
-    ) -> List[Product]:
+    ) -> List[Union[Product, ProductView]]:
         """Get products by category ID."""
+        if not include_inactive and not include_archived:
+            snapshot = await menu_cache.get(self.session)
+            return snapshot.get_products(category_id)
+        
         query = select(Product).where(Product.category_id == category_id)
         
         if not include_inactive:
@@ -163,24 +185,180 @@ class MenuService:
         result = await self.session.execute(query)
         return result.scalars().all()
     
-    async def get_available_products(self) -> List[Product]:
+    async def get_available_products(self) -> List[ProductView]:
         """Get all available products for clients."""
-        query = (
-            select(Product)
-            .join(Category)
+        snapshot = await menu_cache.get(self.session)
+        return list(snapshot.available_products)
+    
+    async def list_products(
+        self,
+        category_id: Optional[int] = None,
+        include_inactive: bool = False,
+        skip: int = 0,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None
+    ) -> Tuple[List[Any], Optional[str]]:
+        """Get a page of products ordered by (sort_order, name, id).
+        
+        Uses keyset pagination when cursor is given, LIMIT/OFFSET otherwise.
+        With fields, only those columns are selected and dicts are returned.
+        Returns the page and the cursor of the next page (None on the last page).
+        """
+        if fields:
+            # Keyset columns are always selected to build the next cursor
+            names = dict.fromkeys(["id", *fields, "sort_order", "name"])
+            query = select(*[getattr(Product, name) for name in names])
+        else:
+            query = select(Product)
+        query = self._filter_products(query, category_id, include_inactive)
+        query = query.order_by(Product.sort_order, Product.name, Product.id)
+        
+        if cursor:
+            sort_order, name, last_id = _decode_cursor(cursor)
+            query = query.where(
+                tuple_(Product.sort_order, Product.name, Product.id) > tuple_(sort_order, name, last_id)
+            )
+        elif skip:
+            query = query.offset(skip)
+        
+        # One extra row tells whether there is a next page
+        result = await self.session.execute(query.limit(limit + 1))
+        if fields:
+            rows = [dict(row._mapping) for row in result.all()]
+        else:
+            rows = list(result.scalars().all())
+        
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            if fields:
+                next_cursor = _encode_cursor(last["sort_order"], last["name"], last["id"])
+            else:
+                next_cursor = _encode_cursor(last.sort_order, last.name, last.id)
+        
+        if fields:
+            rows = [{name: row[name] for name in ["id", *fields]} for row in rows]
+        return rows, next_cursor
+    
+    async def count_products(
+        self,
+        category_id: Optional[int] = None,
+        include_inactive: bool = False
+    ) -> int:
+        """Count products matching list_products filters."""
+        if not include_inactive:
+            snapshot = await menu_cache.get(self.session)
+            if category_id:
+                return len(snapshot.products_by_category.get(category_id, ()))
+            return len(snapshot.available_products)
+        
+        query = self._filter_products(select(func.count(Product.id)), category_id, include_inactive)
+        result = await self.session.execute(query)
+        return result.scalar() or 0
+    
+    def _filter_products(self, query, category_id: Optional[int], include_inactive: bool):
+        """Apply list_products filters to a query."""
+        # Same category visibility as the menu snapshot, so counts match pages
+        query = query.join(Category, and_(Product.category_id == Category.id, _visible_category()))
+        query = query.where(Product.is_archived == False)
+        if not include_inactive:
+            query = query.where(Product.is_active == True)
+        if category_id:
+            query = query.where(Product.category_id == category_id)
+        return query
+    
+    async def get_menu_product(self, product_id: int) -> ProductView:
+        """Get visible product from the menu snapshot."""
+        snapshot = await menu_cache.get(self.session)
+        product = snapshot.products.get(product_id)
+        if product is None:
+            raise NotFoundException("Product", str(product_id))
+        return product
+    
+    async def get_menu_product_modifiers(self, product_id: int) -> List[ModifierView]:
+        """Active modifiers of a visible product from the menu snapshot."""
+        snapshot = await menu_cache.get(self.session)
+        if product_id not in snapshot.products:
+            raise NotFoundException("Product", str(product_id))
+        return snapshot.get_product_modifiers(product_id)
+    
+    async def resolve_product_options(
+        self,
+        product_id: int,
+        option_ids: Optional[Sequence[int]] = None
+    ) -> Tuple[ProductView, List[ModifierOptionView]]:
+        """Load a visible product with the selected modifier options and validate the selection.
+        
+        Served from the menu snapshot when it is warm, otherwise with one query.
+        """
+        option_ids = list(dict.fromkeys(option_ids or []))
+        snapshot = menu_cache.peek()
+        if snapshot is not None:
+            product = snapshot.products.get(product_id)
+            if product is None:
+                raise NotFoundException("Product", str(product_id))
+            modifiers = snapshot.get_product_modifiers(product_id)
+        else:
+            product, modifiers = await self._load_product_options(product_id, option_ids)
+        
+        allowed = {option.id: option for modifier in modifiers for option in modifier.options}
+        unknown = [option_id for option_id in option_ids if option_id not in allowed]
+        if unknown:
+            raise ValidationException(f"Modifier options {unknown} are not available for this product")
+        
+        selected = [allowed[option_id] for option_id in option_ids]
+        for modifier in modifiers:
+            count = sum(1 for option in selected if option.modifier_id == modifier.id)
+            if modifier.is_required and count == 0:
+                raise ValidationException(f"Choose an option for '{modifier.name}'")
+            if not modifier.is_multiple and count > 1:
+                raise ValidationException(f"Only one option can be chosen for '{modifier.name}'")
+        return product, selected
+    
+    async def _load_product_options(
+        self,
+        product_id: int,
+        option_ids: List[int]
+    ) -> Tuple[ProductView, List[ModifierView]]:
+        """Product, its active modifiers and the selected options among them in one query."""
+        result = await self.session.execute(
+            select(Product, Modifier, ModifierOption)
+            .join(Category, and_(Product.category_id == Category.id, _visible_category()))
+            .outerjoin(ProductModifier, ProductModifier.product_id == Product.id)
+            .outerjoin(Modifier, and_(
+                Modifier.id == ProductModifier.modifier_id,
+                Modifier.is_active == True
+            ))
+            .outerjoin(ModifierOption, and_(
+                ModifierOption.modifier_id == Modifier.id,
+                ModifierOption.is_active == True,
+                ModifierOption.id.in_(option_ids)
+            ))
             .where(
-                and_(
-                    Product.is_active == True,
-                    Product.is_archived == False,
-                    Category.is_active == True,
-                    Category.is_archived == False
-                )
+                Product.id == product_id,
+                Product.is_active == True,
+                Product.is_archived == False
             )
-            .order_by(Product.sort_order, Product.name)
+            .order_by(ProductModifier.sort_order)
         )
+        rows = result.all()
+        if not rows:
+            raise NotFoundException("Product", str(product_id))
         
-        result = await self.session.execute(query)
-        return result.scalars().all()
+        modifier_rows = {}
+        options = {}
+        for _, modifier, option in rows:
+            if modifier is None:
+                continue
+            modifier_rows.setdefault(modifier.id, modifier)
+            if option is not None:
+                options.setdefault(modifier.id, []).append(option_view(option))
+        
+        product = product_view(rows[0][0], modifier_rows)
+        modifiers = [modifier_view(m, options.get(m.id, [])) for m in modifier_rows.values()]
+        return product, modifiers
     
     async def create_product(
         self,
@@ -215,6 +393,7 @@ class MenuService:
         self.session.add(product)
         await self.session.flush()
         await self.session.commit()
+        await menu_cache.invalidate()
         return product
     
     async def update_product(
@@ -251,6 +430,7 @@ class MenuService:
         
         await self.session.flush()
         await self.session.commit()
+        await menu_cache.invalidate()
         return product
     
     # Modifier operations
@@ -288,6 +468,7 @@ class MenuService:
         self.session.add(modifier)
         await self.session.flush()
         await self.session.commit()
+        await menu_cache.invalidate()
         return modifier
     
     async def add_modifier_option(
@@ -311,6 +492,7 @@ class MenuService:
         self.session.add(option)
         await self.session.flush()
         await self.session.commit()
+        await menu_cache.invalidate()
         return option
     
     async def assign_modifier_to_product(
@@ -332,6 +514,7 @@ class MenuService:
         self.session.add(link)
         await self.session.flush()
         await self.session.commit()
+        await menu_cache.invalidate()
         return link
     
     async def remove_modifier_from_product(
@@ -351,3 +534,27 @@ class MenuService:
         link = result.scalar_one_or_none()
         if link:
             await self.session.delete(link)
+            await self.session.flush()
+            await self.session.commit()
+            await menu_cache.invalidate()
+
+
+def _visible_category():
+    """Categories shown to clients; the menu snapshot loads the same set."""
+    return and_(Category.is_active == True, Category.is_archived == False)
+
+
+def _encode_cursor(sort_order: int, name: str, product_id: int) -> str:
+    """Encode keyset position as an opaque cursor."""
+    raw = json.dumps([sort_order, name, product_id], ensure_ascii=False).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[int, str, int]:
+    """Decode cursor produced by _encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_order, name, product_id = json.loads(base64.urlsafe_b64decode(padded))
+        return int(sort_order), str(name), int(product_id)
+    except Exception:
+        raise ValidationException("Invalid cursor")
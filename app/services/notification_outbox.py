@@ -0,0 +1,89 @@
+"""Outbox writes kept in the same transaction as the order changes they report."""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import DateTime, Integer, String, func, literal, null, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.notification_outbox import NotificationOutbox
+from app.models.order import Order
+from app.models.user import User
+from app.utils.enums import UserRole
+from app.utils.time import utc_now
+
+ORDER_CREATED = "order_created"
+ORDER_STATUS_CHANGED = "order_status_changed"
+
+OUTBOX_COLUMNS = ["event_type", "order_id", "chat_id", "payload", "dedup_key", "attempts", "available_at", "created_at"]
+
+
+def _insert(rows):
+    """INSERT ... SELECT into the outbox; notifications already written are skipped."""
+    return pg_insert(NotificationOutbox).from_select(OUTBOX_COLUMNS, rows).on_conflict_do_nothing(
+        index_elements=[NotificationOutbox.dedup_key]
+    )
+
+
+class OrderNotificationOutbox:
+    """Queues order notifications for the outbox dispatcher.
+
+    Each write is one INSERT ... SELECT that resolves the recipients' chats in
+    the database, so it adds a single statement to the caller's transaction and
+    nothing is sent until that transaction commits.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def order_created(self, order: Order) -> None:
+        """Tell every active manager about a new order."""
+        now = literal(utc_now(), DateTime(timezone=True))
+        rows = select(
+            literal(ORDER_CREATED, String),
+            literal(order.id, Integer),
+            User.telegram_id,
+            null(),
+            func.concat("order:", order.id, ":created:", User.id),
+            literal(0, Integer),
+            now,
+            now
+        ).where(User.role == UserRole.MANAGER.value, User.is_active == True)
+        await self.session.execute(_insert(rows))
+
+    def transition_statement(self, updated, now: Optional[datetime] = None):
+        """Outbox insert for the orders of an UPDATE ... RETURNING CTE.
+
+        updated must expose order_id, user_id, old_status, new_status and version.
+        Used as a CTE of the transition statement so it costs no extra round trip;
+        the version bumped by the transition makes each step its own notification.
+        """
+        step = func.concat("v", updated.c.version)
+        changed = select(
+            updated.c.order_id,
+            updated.c.user_id,
+            updated.c.old_status,
+            updated.c.new_status,
+            step.label("step")
+        ).cte("changed")
+        return self._status_insert(changed, now or utc_now())
+
+    @staticmethod
+    def _status_insert(changed, now: datetime):
+        at = literal(now, DateTime(timezone=True))
+        return _insert(
+            select(
+                literal(ORDER_STATUS_CHANGED, String),
+                changed.c.order_id,
+                User.telegram_id,
+                func.json_build_object(
+                    "old_status", changed.c.old_status,
+                    "new_status", changed.c.new_status
+                ),
+                func.concat("order:", changed.c.order_id, ":", changed.c.step),
+                literal(0, Integer),
+                at,
+                at
+            ).where(User.id == changed.c.user_id)
+        )
@@ -5,6 +5,8 @@ import logging
 
 from aiogram import Bot
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.order import Order
 from app.models.user import User
@@ -15,10 +17,16 @@ logger = logging.getLogger(__name__)
 
 
 class NotificationService:
-    """Service for sending notifications."""
+    """Service for sending notifications.
     
-    def __init__(self, bot: Optional[Bot] = None):
+    Order notifications are normally queued in the notification outbox by
+    OrderService and sent by the outbox dispatcher; the notify_* methods send
+    directly and are meant for callers outside an order transaction.
+    """
+    
+    def __init__(self, bot: Optional[Bot] = None, session: Optional[AsyncSession] = None):
         self.bot = bot
+        self.session = session
     
     async def notify_order_created(self, order: Order) -> None:
         """Notify about new order."""
@@ -26,14 +34,7 @@ class NotificationService:
             return
         
         try:
-            message = (
-                f"📦 <b>Новый заказ #{order.order_number}</b>\n\n"
-                f"👤 Клиент: {order.user.full_name}\n"
-                f"📞 Телефон: {order.delivery_phone}\n"
-                f"💰 Сумма: {order.total:.2f} ₽\n"
-                f"💳 Оплата: {self._format_payment_method(order.payment_method)}\n\n"
-                f"📍 Адрес: {order.delivery_address}"
-            )
+            message = self.order_created_message(order)
             
             # Notify managers
             await self._notify_staff(UserRole.MANAGER.value, message)
@@ -53,26 +54,41 @@ class NotificationService:
         
         try:
             # Notify customer
-            status_messages = {
-                OrderStatus.CONFIRMED.value: f"✅ Заказ #{order.order_number} подтвержден!",
-                OrderStatus.IN_PROGRESS.value: f"👨‍🍳 Заказ #{order.order_number} готовится",
-                OrderStatus.READY.value: f"🔥 Заказ #{order.order_number} готов к упаковке",
-                OrderStatus.PACKED.value: f"📦 Заказ #{order.order_number} упакован",
-                OrderStatus.IN_DELIVERY.value: f"🚚 Заказ #{order.order_number} в пути",
-                OrderStatus.DELIVERED.value: f"🎉 Заказ #{order.order_number} доставлен!",
-                OrderStatus.CANCELLED.value: f"❌ Заказ #{order.order_number} отменен",
-            }
-            
-            message = status_messages.get(
-                new_status,
-                f"Статус заказа #{order.order_number} изменен: {new_status}"
-            )
+            message = self.status_changed_message(order, new_status)
             
             await self.bot.send_message(order.user.telegram_id, message)
             
         except Exception as e:
             logger.error(f"Failed to notify status change: {e}")
     
+    def order_created_message(self, order: Order) -> str:
+        """Staff message about a new order (needs order.user loaded)."""
+        return (
+            f"📦 <b>Новый заказ #{order.order_number}</b>\n\n"
+            f"👤 Клиент: {order.user.full_name}\n"
+            f"📞 Телефон: {order.delivery_phone}\n"
+            f"💰 Сумма: {order.total:.2f} ₽\n"
+            f"💳 Оплата: {self._format_payment_method(order.payment_method)}\n\n"
+            f"📍 Адрес: {order.delivery_address}"
+        )
+    
+    def status_changed_message(self, order: Order, new_status: str) -> str:
+        """Customer message about a new order status."""
+        status_messages = {
+            OrderStatus.CONFIRMED.value: f"✅ Заказ #{order.order_number} подтвержден!",
+            OrderStatus.IN_PROGRESS.value: f"👨‍🍳 Заказ #{order.order_number} готовится",
+            OrderStatus.READY.value: f"🔥 Заказ #{order.order_number} готов к упаковке",
+            OrderStatus.PACKED.value: f"📦 Заказ #{order.order_number} упакован",
+            OrderStatus.IN_DELIVERY.value: f"🚚 Заказ #{order.order_number} в пути",
+            OrderStatus.DELIVERED.value: f"🎉 Заказ #{order.order_number} доставлен!",
+            OrderStatus.CANCELLED.value: f"❌ Заказ #{order.order_number} отменен",
+        }
+        
+        return status_messages.get(
+            new_status,
+            f"Статус заказа #{order.order_number} изменен: {new_status}"
+        )
+    
     async def notify_courier_assigned(
         self,
         order: Order,
@@ -132,10 +148,19 @@ class NotificationService:
             logger.error(f"Failed to notify backup: {e}")
     
     async def _notify_staff(self, role: str, message: str) -> None:
-        """Notify staff members with specific role."""
-        # This would query the database for staff members
-        # For now, we'll skip the actual implementation
-        pass
+        """Notify active staff members with specific role."""
+        if self.session is None:
+            logger.warning(f"No database session, cannot notify {role} staff")
+            return
+        
+        result = await self.session.execute(
+            select(User.telegram_id).where(User.role == role, User.is_active == True)
+        )
+        for telegram_id in result.scalars().all():
+            try:
+                await self.bot.send_message(telegram_id, message, parse_mode="HTML")
+            except Exception as e:
+                logger.error(f"Failed to notify staff member {telegram_id}: {e}")
     
     def _format_payment_method(self, method: str) -> str:
         """Format payment method for display."""
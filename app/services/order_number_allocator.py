@@ -0,0 +1,202 @@
+"""Order number allocators producing YYYYMMDD-XXXX numbers."""
+
+import logging
+from abc import ABC, abstractmethod
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import Integer, cast, func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.config import settings
+from app.models.daily_counter import DailyCounter
+from app.models.order import Order
+from app.utils.time import now
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] - counter key, ARGV[1] - floor for an existing key (-1 when none),
+# ARGV[2] - seed for a missing key (-1 when unknown), ARGV[3] - TTL seconds.
+# Returns -1 when the key is missing and the caller has to supply a seed.
+_REDIS_ALLOCATE_SCRIPT = """
+local floor = tonumber(ARGV[1])
+local seed = tonumber(ARGV[2])
+local current = redis.call('GET', KEYS[1])
+if not current then
+    if seed < 0 then
+        return -1
+    end
+    redis.call('SET', KEYS[1], seed, 'EX', ARGV[3])
+elseif floor > tonumber(current) then
+    redis.call('SET', KEYS[1], floor, 'KEEPTTL')
+end
+return redis.call('INCR', KEYS[1])
+"""
+
+
+def format_order_number(day: date, counter: int) -> str:
+    """Format order number as YYYYMMDD-XXXX."""
+    return f"{day.strftime('%Y%m%d')}-{counter:04d}"
+
+
+class OrderNumberAllocator(ABC):
+    """Base class for order number allocators."""
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    async def allocate(self, day: Optional[date] = None) -> str:
+        """Allocate the next order number for a business day."""
+        if day is None:
+            day = now().date()
+        counter = await self._next_counter(day)
+        return format_order_number(day, counter)
+
+    @abstractmethod
+    async def _next_counter(self, day: date) -> int:
+        """Next counter value for a business day."""
+
+    async def _daily_counter(self, day: date) -> int:
+        """Counter of a day in daily_counters, or -1 when the day has no row."""
+        result = await self.session.execute(
+            select(DailyCounter.counter).where(DailyCounter.counter_date == day)
+        )
+        counter = result.scalar_one_or_none()
+        return counter if counter is not None else -1
+
+    async def _issued_floor(self, day: date) -> int:
+        """Highest counter already issued for a day according to the database."""
+        prefix = day.strftime('%Y%m%d')
+        counter = max(await self._daily_counter(day), 0)
+
+        # Compared as numbers: "-10000" sorts below "-9999" as text
+        number_result = await self.session.execute(
+            select(func.max(cast(func.split_part(Order.order_number, "-", 2), Integer)))
+            .where(Order.order_number.like(f"{prefix}-%"))
+        )
+        issued = number_result.scalar_one_or_none() or 0
+        return max(counter, issued)
+
+
+class UpsertCounterAllocator(OrderNumberAllocator):
+    """Atomic INSERT ... ON CONFLICT DO UPDATE ... RETURNING on daily_counters.
+
+    The upsert commits in its own short transaction, so the day's row lock is
+    released at once instead of when the order commits. A number taken by an
+    order that later rolls back is skipped, as with the other backends.
+    """
+
+    async def _next_counter(self, day: date, floor: int = 0) -> int:
+        stmt = pg_insert(DailyCounter).values(counter_date=day, counter=floor + 1)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[DailyCounter.counter_date],
+            set_={"counter": func.greatest(DailyCounter.counter, floor) + 1}
+        ).returning(DailyCounter.counter)
+
+        bind = getattr(self.session, "bind", None)
+        if not isinstance(bind, AsyncEngine):
+            # Session pinned to a connection: there is no second transaction to use
+            result = await self.session.execute(stmt)
+            return result.scalar_one()
+
+        async with AsyncSession(bind) as counter_session, counter_session.begin():
+            result = await counter_session.execute(stmt)
+            return result.scalar_one()
+
+    async def allocate_above(self, day: date, floor: int) -> str:
+        """Allocate a number strictly greater than ``floor``."""
+        counter = await self._next_counter(day, floor)
+        return format_order_number(day, counter)
+
+
+class SequenceAllocator(OrderNumberAllocator):
+    """One PostgreSQL sequence per business day (nextval never blocks)."""
+
+    @staticmethod
+    def sequence_name(day: date) -> str:
+        return f"order_number_seq_{day.strftime('%Y%m%d')}"
+
+    async def _next_counter(self, day: date) -> int:
+        name = self.sequence_name(day)
+        try:
+            async with self.session.begin_nested():
+                result = await self.session.execute(text(f"SELECT nextval('{name}')"))
+                return result.scalar_one()
+        except Exception:
+            # Sequence for this day does not exist yet
+            pass
+
+        floor = await self._issued_floor(day)
+        try:
+            async with self.session.begin_nested():
+                await self.session.execute(
+                    text(f"CREATE SEQUENCE IF NOT EXISTS {name} START WITH {floor + 1}")
+                )
+        except Exception:
+            # Created concurrently by another checkout
+            logger.debug("Sequence %s created concurrently", name)
+        result = await self.session.execute(text(f"SELECT nextval('{name}')"))
+        return result.scalar_one()
+
+    async def drop_sequences_before(self, day: date) -> int:
+        """Drop per-day sequences older than ``day``."""
+        result = await self.session.execute(
+            text(
+                "SELECT sequencename FROM pg_sequences "
+                "WHERE sequencename LIKE 'order_number_seq_%' AND sequencename < :cutoff"
+            ),
+            {"cutoff": self.sequence_name(day)}
+        )
+        names = result.scalars().all()
+        for name in names:
+            await self.session.execute(text(f"DROP SEQUENCE IF EXISTS {name}"))
+        return len(names)
+
+
+class RedisCounterAllocator(OrderNumberAllocator):
+    """Redis INCR per day with database reconciliation and fallback."""
+
+    key_ttl_seconds = 2 * 24 * 3600
+
+    def __init__(self, session: AsyncSession, redis_client):
+        super().__init__(session)
+        self.redis = redis_client
+        self.fallback = UpsertCounterAllocator(session)
+
+    @staticmethod
+    def counter_key(day: date) -> str:
+        return f"order_counter:{day.strftime('%Y%m%d')}"
+
+    async def _next_counter(self, day: date) -> int:
+        key = self.counter_key(day)
+        try:
+            # In this mode only the database fallback writes daily_counters, so a row
+            # for the day means some process issued numbers Redis has not seen
+            floor = await self._daily_counter(day)
+            counter = await self.redis.eval(_REDIS_ALLOCATE_SCRIPT, 1, key, floor, -1, self.key_ttl_seconds)
+            if counter == -1:
+                # Key is missing (new day or Redis restart): seed from the database
+                seed = await self._issued_floor(day)
+                counter = await self.redis.eval(_REDIS_ALLOCATE_SCRIPT, 1, key, seed, seed, self.key_ttl_seconds)
+            return int(counter)
+        except Exception as e:
+            logger.warning("Redis order counter unavailable, falling back to database: %s", e)
+            floor = await self._issued_floor(day)
+            return await self.fallback._next_counter(day, floor)
+
+
+def get_order_number_allocator(
+    session: AsyncSession,
+    redis_client=None,
+    backend: Optional[str] = None
+) -> OrderNumberAllocator:
+    """Build the allocator configured by ``settings.order_number_backend``."""
+    backend = backend or settings.order_number_backend
+    if backend == "sequence":
+        return SequenceAllocator(session)
+    if backend == "redis":
+        if redis_client is not None:
+            return RedisCounterAllocator(session, redis_client)
+        logger.warning("order_number_backend=redis but no Redis client available, using upsert")
+    return UpsertCounterAllocator(session)
@@ -1,17 +1,16 @@
 """Order service for order lifecycle management."""
 
-from typing import List, Optional
-from datetime import datetime, date
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
 
-from sqlalchemy import select, and_, func
+from sqlalchemy import DateTime, Integer, Text, insert, literal, select, and_, func, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import Dict
 from sqlalchemy.orm import selectinload
 
-from app.models.order import Order, OrderStatusLog
+from app.models.order import NON_CANCELLABLE_STATUSES, Order, OrderStatusLog
 from app.models.order_item import OrderItem
 from app.models.product import Product
-from app.models.daily_counter import DailyCounter
+from app.models.modifier import ModifierOption
 from app.models.user import User
 from app.utils.enums import OrderStatus, PaymentStatus, UserRole
 from app.utils.exceptions import (
@@ -20,14 +19,48 @@ from app.utils.exceptions import (
     InvalidStateTransitionException
 )
 from app.utils.state_machine import OrderStateMachine
+from app.services.order_number_allocator import OrderNumberAllocator, get_order_number_allocator
+from app.services.stats_rollup import DailyStatsRollup
+from app.services.notification_outbox import OrderNotificationOutbox
+
+
+@dataclass(frozen=True)
+class StatusTransition:
+    """Result of a status transition (columns returned by the UPDATE)."""
+    
+    order_id: int
+    order_number: str
+    user_id: int
+    courier_id: Optional[int]
+    old_status: str
+    new_status: str
+    version: int
+
+
+@dataclass(frozen=True)
+class BulkTransitionResult:
+    """Per-order outcome of a bulk status transition."""
+    
+    order_id: int
+    success: bool
+    transition: Optional[StatusTransition] = None
+    error: Optional[str] = None
 
 
 class OrderService:
     """Service for order operations."""
     
-    def __init__(self, session: AsyncSession):
+    def __init__(
+        self,
+        session: AsyncSession,
+        redis_client=None,
+        number_allocator: Optional[OrderNumberAllocator] = None
+    ):
         self.session = session
         self.state_machine = OrderStateMachine()
+        self.number_allocator = number_allocator or get_order_number_allocator(session, redis_client)
+        self.rollup = DailyStatsRollup(session)
+        self.outbox = OrderNotificationOutbox(session)
     
     async def get_order_by_id(self, order_id: int) -> Order:
         """Get order by ID with related data."""
@@ -119,9 +152,22 @@ class OrderService:
         delivery_comment: Optional[str] = None,
         promo_code_id: Optional[int] = None
     ) -> Order:
-        """Create a new order."""
-        # Generate order number
-        order_number = await self._generate_order_number()
+        """Create a new order.
+
+        All products and modifier options referenced by the cart are loaded
+        with one ``IN (...)`` select each, priced in memory and persisted
+        together with the initial status log in a single transaction.
+        """
+        if not items:
+            raise ValidationException("Order must contain at least one item")
+        
+        products = await self._load_products(item["product_id"] for item in items)
+        options = await self._load_modifier_options(
+            m["id"]
+            for item in items
+            for m in (item.get("modifiers") or [])
+            if m.get("id") is not None
+        )
         
         # Calculate totals
         subtotal = 0.0
@@ -130,30 +176,25 @@ class OrderService:
         for item_data in items:
             product_id = item_data["product_id"]
             quantity = item_data.get("quantity", 1)
-            modifiers = item_data.get("modifiers", [])
             special_instructions = item_data.get("special_instructions")
             
-            # Get product
-            product_result = await self.session.execute(
-                select(Product).where(Product.id == product_id)
-            )
-            product = product_result.scalar_one_or_none()
-            
+            product = products.get(product_id)
             if not product:
                 raise NotFoundException("Product", str(product_id))
             
             if not product.is_available:
                 raise ValidationException(f"Product '{product.name}' is not available")
             
+            modifiers = self._price_modifiers(item_data.get("modifiers") or [], options)
+            
             # Calculate price with modifiers
             product_price = float(product.price)
-            modifiers_price = sum(m.get("price_adjustment", 0) for m in modifiers)
+            modifiers_price = sum(m["price_adjustment"] for m in modifiers)
             item_total = (product_price + modifiers_price) * quantity
             
             subtotal += item_total
             
-            # Create order item
-            order_item = OrderItem(
+            order_items.append(OrderItem(
                 product_id=product_id,
                 product_name=product.name,
                 product_price=product_price,
@@ -162,15 +203,16 @@ class OrderService:
                 modifiers_price=modifiers_price,
                 item_total=item_total,
                 special_instructions=special_instructions
-            )
-            order_items.append(order_item)
+            ))
         
         # Calculate total (delivery fee and discount logic would go here)
         delivery_fee = 0.0
         discount_amount = 0.0
         total = subtotal + delivery_fee - discount_amount
         
-        # Create order
+        # Generate order number right before the order row is inserted
+        order_number = await self._generate_order_number()
+        
         order = Order(
             order_number=order_number,
             user_id=user_id,
@@ -185,18 +227,66 @@ class OrderService:
             delivery_phone=delivery_phone,
             delivery_comment=delivery_comment,
             promo_code_id=promo_code_id,
-            items=order_items
+            items=order_items,
+            status_logs=[
+                OrderStatusLog(
+                    old_status=None,
+                    new_status=OrderStatus.NEW.value,
+                    changed_by_id=user_id
+                )
+            ]
         )
         
         self.session.add(order)
         await self.session.flush()
+        await self.rollup.record_order(order)
+        # Sent by the outbox dispatcher once this transaction commits
+        await self.outbox.order_created(order)
         await self.session.commit()
         
-        # Log initial status
-        await self._log_status_change(order.id, None, OrderStatus.NEW.value, user_id)
-        
         return order
     
+    async def _load_products(self, product_ids: Iterable[int]) -> Dict[int, Product]:
+        """Load products for an order in a single query."""
+        ids = set(product_ids)
+        if not ids:
+            return {}
+        result = await self.session.execute(
+            select(Product).where(Product.id.in_(ids))
+        )
+        return {product.id: product for product in result.scalars().all()}
+    
+    async def _load_modifier_options(self, option_ids: Iterable[int]) -> Dict[int, ModifierOption]:
+        """Load modifier options for an order in a single query."""
+        ids = {int(option_id) for option_id in option_ids}
+        if not ids:
+            return {}
+        result = await self.session.execute(
+            select(ModifierOption).where(ModifierOption.id.in_(ids))
+        )
+        return {option.id: option for option in result.scalars().all()}
+    
+    def _price_modifiers(
+        self,
+        modifiers: List[dict],
+        options: Dict[int, ModifierOption]
+    ) -> List[dict]:
+        """Snapshot selected modifiers using current option prices."""
+        priced = []
+        for modifier in modifiers:
+            option_id = modifier.get("id")
+            if option_id is None:
+                raise ValidationException("Modifier option id is required")
+            option = options.get(int(option_id))
+            if not option or not option.is_active:
+                raise NotFoundException("ModifierOption", str(option_id))
+            priced.append({
+                "id": option.id,
+                "name": option.name,
+                "price_adjustment": float(option.price_adjustment)
+            })
+        return priced
+    
     async def transition_status(
         self,
         order_id: int,
@@ -204,57 +294,163 @@ class OrderService:
         changed_by_id: Optional[int] = None,
         reason: Optional[str] = None
     ) -> Order:
-        """Transition order to new status with optimistic locking."""
-        # Get current order with version
-        order = await self.get_order_by_id(order_id)
-        current_status = OrderStatus(order.status)
+        """Transition order to new status and return it with related data loaded."""
+        await self.advance_status(order_id, new_status, changed_by_id, reason)
+        # Previously loaded instances are stale after the UPDATE
+        self.session.expire_all()
+        return await self.get_order_by_id(order_id)
+    
+    async def advance_status(
+        self,
+        order_id: int,
+        new_status: OrderStatus,
+        changed_by_id: Optional[int] = None,
+        reason: Optional[str] = None
+    ) -> StatusTransition:
+        """Transition order to new status in a single statement and commit."""
+        result = await self.session.execute(
+            self._transition_statement([order_id], new_status, changed_by_id, reason)
+        )
+        row = result.first()
+        if row is None:
+            await self._raise_transition_error(order_id, new_status)
         
-        # Validate transition
-        if not self.state_machine.can_transition(current_status, new_status):
-            raise InvalidStateTransitionException(
-                current_status.value,
-                new_status.value
+        await self.session.commit()
+        return StatusTransition(**row._mapping)
+    
+    async def transition_many(
+        self,
+        order_ids: Iterable[int],
+        new_status: OrderStatus,
+        changed_by_id: Optional[int] = None,
+        reason: Optional[str] = None
+    ) -> List[BulkTransitionResult]:
+        """Apply one status transition to many orders in a single statement and commit."""
+        order_ids = list(dict.fromkeys(order_ids))
+        if not order_ids:
+            return []
+        
+        result = await self.session.execute(
+            self._transition_statement(order_ids, new_status, changed_by_id, reason)
+        )
+        transitions = {
+            row.order_id: StatusTransition(**row._mapping)
+            for row in result.all()
+        }
+        
+        errors: Dict[int, str] = {}
+        failed_ids = [order_id for order_id in order_ids if order_id not in transitions]
+        if failed_ids:
+            status_result = await self.session.execute(
+                select(Order.id, Order.status).where(Order.id.in_(failed_ids))
             )
+            current_statuses = {row.id: row.status for row in status_result.all()}
+            for order_id in failed_ids:
+                if order_id not in current_statuses:
+                    errors[order_id] = NotFoundException("Order", str(order_id)).message
+                else:
+                    errors[order_id] = InvalidStateTransitionException(
+                        current_statuses[order_id],
+                        new_status.value
+                    ).message
+        
+        if transitions:
+            await self.session.commit()
         
-        # Update with optimistic locking
-        from sqlalchemy import update
-        current_version = order.version
+        return [
+            BulkTransitionResult(order_id=order_id, success=True, transition=transitions[order_id])
+            if order_id in transitions
+            else BulkTransitionResult(order_id=order_id, success=False, error=errors[order_id])
+            for order_id in order_ids
+        ]
+    
+    def _transition_statement(
+        self,
+        order_ids: List[int],
+        new_status: OrderStatus,
+        changed_by_id: Optional[int],
+        reason: Optional[str],
+        source_statuses: Optional[List[str]] = None,
+        extra_values: Optional[dict] = None
+    ):
+        """Build locked UPDATE ... RETURNING plus status log, daily_stats and outbox writes as one statement.
         
+        Only orders in source_statuses (default: the state machine's sources of
+        new_status) are changed; extra_values are set along with the status.
+        """
         from app.utils.time import utc_now
         now = utc_now()
-        timestamp_field = self._get_timestamp_field(new_status)
+        if source_statuses is None:
+            source_statuses = [s.value for s in self.state_machine.get_source_statuses(new_status)]
+        
+        locked = (
+            select(Order.id, Order.status)
+            .where(Order.id.in_(order_ids), Order.status.in_(source_statuses))
+            .with_for_update()
+            .cte("locked")
+        )
+        
         update_values = {
             "status": new_status.value,
-            "version": current_version + 1
+            "version": Order.version + 1,
+            "updated_at": now
         }
+        timestamp_field = self._get_timestamp_field(new_status)
         if timestamp_field:
             update_values[timestamp_field] = now
+        update_values.update(extra_values or {})
         
-        result = await self.session.execute(
+        updated = (
             update(Order)
-            .where(Order.id == order_id, Order.version == current_version)
+            .where(Order.id == locked.c.id)
             .values(**update_values)
+            .returning(
+                Order.id.label("order_id"),
+                Order.order_number,
+                Order.user_id,
+                Order.courier_id,
+                locked.c.status.label("old_status"),
+                Order.status.label("new_status"),
+                Order.version,
+                Order.created_at,
+                Order.total
+            )
+            .cte("updated")
         )
         
-        if result.rowcount == 0:
-            raise InvalidStateTransitionException(
-                current_status.value,
-                new_status.value
+        logged = insert(OrderStatusLog).from_select(
+            ["order_id", "old_status", "new_status", "changed_by_id", "reason", "created_at"],
+            select(
+                updated.c.order_id,
+                updated.c.old_status,
+                updated.c.new_status,
+                literal(changed_by_id, Integer),
+                literal(reason, Text),
+                literal(now, DateTime(timezone=True))
             )
+        ).cte("logged")
+        rolled = self.rollup.transition_statement(updated).cte("rolled")
+        notified = self.outbox.transition_statement(updated, now).cte("notified")
         
-        # Refresh order object with new values
-        await self.session.refresh(order)
-        
-        # Log the change
-        await self._log_status_change(
-            order.id,
-            current_status.value,
-            new_status.value,
-            changed_by_id,
-            reason
+        return select(
+            updated.c.order_id,
+            updated.c.order_number,
+            updated.c.user_id,
+            updated.c.courier_id,
+            updated.c.old_status,
+            updated.c.new_status,
+            updated.c.version
+        ).add_cte(logged, rolled, notified)
+    
+    async def _raise_transition_error(self, order_id: int, new_status: OrderStatus) -> None:
+        """Raise the appropriate error for a transition that matched no row."""
+        result = await self.session.execute(
+            select(Order.status).where(Order.id == order_id)
         )
-        
-        return order
+        current_status = result.scalar_one_or_none()
+        if current_status is None:
+            raise NotFoundException("Order", str(order_id))
+        raise InvalidStateTransitionException(current_status, new_status.value)
     
     async def assign_courier(
         self,
@@ -294,71 +490,38 @@ class OrderService:
         cancelled_by_id: int,
         reason: str
     ) -> Order:
-        """Cancel an order."""
-        order = await self.get_order_by_id(order_id)
-        
-        if not order.can_be_cancelled():
-            raise ValidationException("Order cannot be cancelled at this stage")
+        """Cancel an order through the locked transition statement.
         
-        old_status = order.status
-        
-        from app.utils.time import utc_now
-        order.status = OrderStatus.CANCELLED.value
-        order.cancelled_at = utc_now()
-        order.cancelled_by_id = cancelled_by_id
-        order.cancellation_reason = reason
-        
-        await self._log_status_change(
-            order.id,
-            old_status,
-            OrderStatus.CANCELLED.value,
-            cancelled_by_id,
-            reason
+        The status is checked and changed under the row lock, so a cancel racing
+        a kitchen or packer transition cannot log or count the order twice.
+        """
+        cancellable = [s.value for s in OrderStatus if s.value not in NON_CANCELLABLE_STATUSES]
+        result = await self.session.execute(
+            self._transition_statement(
+                [order_id],
+                OrderStatus.CANCELLED,
+                cancelled_by_id,
+                reason,
+                source_statuses=cancellable,
+                extra_values={"cancelled_by_id": cancelled_by_id, "cancellation_reason": reason}
+            )
         )
+        if result.first() is None:
+            status_result = await self.session.execute(
+                select(Order.status).where(Order.id == order_id)
+            )
+            if status_result.scalar_one_or_none() is None:
+                raise NotFoundException("Order", str(order_id))
+            raise ValidationException("Order cannot be cancelled at this stage")
         
-        await self.session.flush()
         await self.session.commit()
-        return order
+        # Previously loaded instances are stale after the UPDATE
+        self.session.expire_all()
+        return await self.get_order_by_id(order_id)
     
     async def _generate_order_number(self) -> str:
-        """Generate unique order number using daily counter."""
-        today = date.today()
-        
-        # Try to increment counter
-        counter_result = await self.session.execute(
-            select(DailyCounter).where(DailyCounter.counter_date == today)
-        )
-        counter = counter_result.scalar_one_or_none()
-        
-        if counter:
-            counter.counter += 1
-        else:
-            counter = DailyCounter(counter_date=today, counter=1)
-            self.session.add(counter)
-        
-        await self.session.flush()
-        await self.session.commit()
-        
-        # Format: YYYYMMDD-XXXX
-        return f"{today.strftime('%Y%m%d')}-{counter.counter:04d}"
-    
-    async def _log_status_change(
-        self,
-        order_id: int,
-        old_status: Optional[str],
-        new_status: str,
-        changed_by_id: Optional[int] = None,
-        reason: Optional[str] = None
-    ) -> None:
-        """Log order status change."""
-        log = OrderStatusLog(
-            order_id=order_id,
-            old_status=old_status,
-            new_status=new_status,
-            changed_by_id=changed_by_id,
-            reason=reason
-        )
-        self.session.add(log)
+        """Generate unique order number (YYYYMMDD-XXXX) via the configured allocator."""
+        return await self.number_allocator.allocate()
     
     def _get_timestamp_field(self, status: OrderStatus) -> Optional[str]:
         """Get timestamp field name for a status."""
@@ -0,0 +1,223 @@
+"""Background delivery of the notification outbox through the bot."""
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+from sqlalchemy import select, update
+from sqlalchemy.orm import selectinload
+
+from app.config import settings
+from app.models.notification_outbox import NotificationOutbox
+from app.models.order import Order
+from app.services.notification_outbox import ORDER_CREATED, ORDER_STATUS_CHANGED
+from app.services.notification_service import NotificationService
+from app.utils.time import utc_now
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class OutboxEntry:
+    """A claimed outbox row (columns returned by the claiming UPDATE)."""
+
+    id: int
+    event_type: str
+    order_id: Optional[int]
+    chat_id: int
+    payload: Optional[dict]
+    attempts: int
+
+
+class OutboxDispatcher:
+    """Drains pending outbox rows in batches, oldest first.
+
+    Rows are claimed with FOR UPDATE SKIP LOCKED and leased for lease_seconds,
+    so several bot replicas can run a dispatcher without sending a row twice;
+    a dispatcher that dies mid-batch only delays its rows until the lease ends.
+    Failed sends are retried with exponential backoff up to max_attempts, and
+    a chat's later messages in the batch wait for its failed one.
+    """
+
+    def __init__(
+        self,
+        batch_size: Optional[int] = None,
+        poll_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        retry_base_seconds: Optional[float] = None,
+        retry_max_seconds: Optional[float] = None,
+        lease_seconds: Optional[float] = None
+    ):
+        self.batch_size = batch_size or settings.outbox_batch_size
+        self.poll_seconds = poll_seconds if poll_seconds is not None else settings.outbox_poll_seconds
+        self.max_attempts = max_attempts or settings.outbox_max_attempts
+        self.retry_base_seconds = retry_base_seconds or settings.outbox_retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds or settings.outbox_retry_max_seconds
+        self.lease_seconds = lease_seconds or settings.outbox_lease_seconds
+        self._bot = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, bot) -> None:
+        """Start delivering through bot in the background."""
+        self._bot = bot
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Stop the background task; unsent rows stay pending for the next start."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def run_once(self) -> int:
+        """Claim and deliver one batch; returns the number of rows claimed."""
+        from app import database
+
+        if database.AsyncSessionLocal is None or self._bot is None:
+            return 0
+        async with database.AsyncSessionLocal() as session:
+            entries = await self._claim(session)
+            if not entries:
+                return 0
+            orders = await self._load_orders(session, {e.order_id for e in entries if e.order_id})
+            results = await self._deliver(entries, orders)
+            # ORM bulk UPDATE by primary key (executemany)
+            await session.execute(update(NotificationOutbox), results)
+            await session.commit()
+        return len(entries)
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                claimed = await self.run_once()
+            except Exception as e:
+                logger.error(f"Notification outbox dispatch failed: {e}")
+                claimed = 0
+            # A full batch means more rows are probably waiting
+            if claimed < self.batch_size:
+                await asyncio.sleep(self.poll_seconds)
+
+    async def _claim(self, session) -> List[OutboxEntry]:
+        """Lease the next due rows and commit, so the sends run outside any transaction."""
+        now = utc_now()
+        due = (
+            select(NotificationOutbox.id)
+            .where(
+                NotificationOutbox.sent_at.is_(None),
+                NotificationOutbox.failed_at.is_(None),
+                NotificationOutbox.available_at <= now
+            )
+            .order_by(NotificationOutbox.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+            .cte("due")
+        )
+        result = await session.execute(
+            update(NotificationOutbox)
+            .where(NotificationOutbox.id == due.c.id)
+            .values(
+                attempts=NotificationOutbox.attempts + 1,
+                available_at=now + timedelta(seconds=self.lease_seconds)
+            )
+            .returning(
+                NotificationOutbox.id,
+                NotificationOutbox.event_type,
+                NotificationOutbox.order_id,
+                NotificationOutbox.chat_id,
+                NotificationOutbox.payload,
+                NotificationOutbox.attempts
+            )
+        )
+        entries = sorted((OutboxEntry(**row._mapping) for row in result.all()), key=lambda e: e.id)
+        await session.commit()
+        return entries
+
+    async def _load_orders(self, session, order_ids: Iterable[int]) -> Dict[int, Order]:
+        order_ids = list(order_ids)
+        if not order_ids:
+            return {}
+        result = await session.execute(
+            select(Order).options(selectinload(Order.user)).where(Order.id.in_(order_ids))
+        )
+        return {order.id: order for order in result.scalars().all()}
+
+    async def _deliver(self, entries: List[OutboxEntry], orders: Dict[int, Order]) -> List[dict]:
+        """Send each entry in id order; returns the outbox updates to write."""
+        results = []
+        # chat id -> retry time of its failed message in this batch
+        held_chats: Dict[int, datetime] = {}
+        for entry in entries:
+            if entry.chat_id in held_chats:
+                # Keep the chat's order; this attempt does not count
+                results.append(self._retry(entry, held_chats[entry.chat_id], None, entry.attempts - 1))
+                continue
+
+            result = await self._send(entry, orders.get(entry.order_id))
+            if result["sent_at"] is None and result["failed_at"] is None:
+                held_chats[entry.chat_id] = result["available_at"]
+            results.append(result)
+        return results
+
+    async def _send(self, entry: OutboxEntry, order: Optional[Order]) -> dict:
+        now = utc_now()
+        try:
+            text = self._render(entry, order)
+            await self._bot.send_message(entry.chat_id, text, parse_mode="HTML")
+        except TelegramRetryAfter as e:
+            return self._retry(entry, now + timedelta(seconds=e.retry_after), str(e))
+        except (TelegramForbiddenError, TelegramBadRequest, LookupError) as e:
+            # Blocked bot, unknown chat or missing order: retrying will not help
+            return self._failed(entry, now, str(e))
+        except Exception as e:
+            if entry.attempts >= self.max_attempts:
+                return self._failed(entry, now, str(e))
+            delay = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (entry.attempts - 1))
+            return self._retry(entry, now + timedelta(seconds=delay), str(e))
+        return self._row(entry, entry.attempts, now, sent_at=now)
+
+    def _render(self, entry: OutboxEntry, order: Optional[Order]) -> str:
+        if order is None:
+            raise LookupError(f"Order {entry.order_id} not found")
+        service = NotificationService()
+        if entry.event_type == ORDER_CREATED:
+            return service.order_created_message(order)
+        if entry.event_type == ORDER_STATUS_CHANGED:
+            return service.status_changed_message(order, entry.payload["new_status"])
+        raise LookupError(f"Unknown notification type {entry.event_type}")
+
+    def _retry(self, entry: OutboxEntry, at: datetime, error: Optional[str], attempts: Optional[int] = None) -> dict:
+        attempts = entry.attempts if attempts is None else attempts
+        return self._row(entry, attempts, at, last_error=error)
+
+    def _failed(self, entry: OutboxEntry, at: datetime, error: str) -> dict:
+        logger.warning(f"Giving up on notification {entry.id} to chat {entry.chat_id}: {error}")
+        return self._row(entry, entry.attempts, at, failed_at=at, last_error=error)
+
+    @staticmethod
+    def _row(
+        entry: OutboxEntry,
+        attempts: int,
+        available_at: datetime,
+        sent_at: Optional[datetime] = None,
+        failed_at: Optional[datetime] = None,
+        last_error: Optional[str] = None
+    ) -> dict:
+        # Same keys in every row so the executemany stays one batch
+        return {
+            "id": entry.id,
+            "attempts": attempts,
+            "available_at": available_at,
+            "sent_at": sent_at,
+            "failed_at": failed_at,
+            "last_error": last_error[:1000] if last_error else None
+        }
+
+
+outbox_dispatcher = OutboxDispatcher()
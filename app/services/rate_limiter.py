@@ -0,0 +1,127 @@
+"""Token-bucket rate limiter shared by bot replicas through Redis."""
+
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+THROTTLE_KEY_PREFIX = "throttle:"
+
+# KEYS[1] bucket; ARGV rate (tokens/s), burst, ttl (ms).
+# Refill by elapsed server time, then take one token if available.
+TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil then
+    tokens = burst
+else
+    tokens = math.min(burst, tokens + (now - ts) * rate)
+end
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], ARGV[3])
+return allowed
+"""
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """Sustained rate in requests per second and the burst allowed on top of it."""
+
+    rate: float
+    burst: int
+
+    @classmethod
+    def parse(cls, value: str) -> Optional["RateLimit"]:
+        """"rate/burst" (e.g. "2/10"); "off" or "0" disables the limit."""
+        value = value.strip().lower()
+        if value in ("off", "0", ""):
+            return None
+        rate, _, burst = value.partition("/")
+        rate = float(rate)
+        return cls(rate=rate, burst=int(burst) if burst else max(1, math.ceil(rate)))
+
+    @property
+    def ttl_ms(self) -> int:
+        """Time for an empty bucket to refill completely, after which it can be forgotten."""
+        return max(1000, math.ceil(self.burst / self.rate * 1000))
+
+
+class RateLimits:
+    """Limits by role and action.
+
+    Lookup order: "<role>:<action>", "<role>", "<action>", "default".
+    """
+
+    def __init__(self, limits: Optional[Mapping[str, str]] = None):
+        limits = limits if limits is not None else settings.throttle_limits
+        self._limits: Dict[str, Optional[RateLimit]] = {
+            key: RateLimit.parse(value) for key, value in limits.items()
+        }
+
+    def get(self, role: Optional[str], action: str) -> Optional[RateLimit]:
+        """Limit for a role performing an action; None means unlimited."""
+        for key in (f"{role}:{action}", role, action, "default"):
+            if key in self._limits:
+                return self._limits[key]
+        return None
+
+
+class TokenBucketLimiter:
+    """Token buckets in Redis (one Lua call per check) with an in-process fallback.
+
+    The fallback keeps one bucket per key in an LRU bounded by max_local_keys,
+    so every check is O(1) and is only accurate per process.
+    """
+
+    def __init__(self, redis_client=None, max_local_keys: Optional[int] = None):
+        self._redis = redis_client
+        self._script = redis_client.register_script(TOKEN_BUCKET_LUA) if redis_client is not None else None
+        self.max_local_keys = max_local_keys if max_local_keys is not None else settings.throttle_max_local_keys
+        self._local: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def allow(self, key: str, limit: RateLimit) -> bool:
+        """Take one token from key's bucket; False when it is empty."""
+        if self._script is not None:
+            try:
+                allowed = await self._script(
+                    keys=[f"{THROTTLE_KEY_PREFIX}{key}"],
+                    args=[limit.rate, limit.burst, limit.ttl_ms]
+                )
+                return bool(int(allowed))
+            except Exception as e:
+                logger.warning(f"Redis rate limiter unavailable, using local buckets: {e}")
+        return self._allow_local(key, limit)
+
+    def _allow_local(self, key: str, limit: RateLimit) -> bool:
+        now = time.monotonic()
+        entry = self._local.pop(key, None)
+        if entry is None:
+            tokens = float(limit.burst)
+        else:
+            tokens, updated_at = entry
+            tokens = min(float(limit.burst), tokens + (now - updated_at) * limit.rate)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._local[key] = (tokens, now)
+        if len(self._local) > self.max_local_keys:
+            # Least recently seen bucket; it has most likely refilled anyway
+            self._local.popitem(last=False)
+        return allowed
@@ -0,0 +1,142 @@
+"""Rendered stats reports precomputed by Celery and served to admins from Redis."""
+
+import json
+import logging
+from datetime import date, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.order import Order
+from app.services.stats_service import StatsService
+from app.utils.enums import OrderStatus
+from app.utils.time import local_day_range, today
+
+logger = logging.getLogger(__name__)
+
+REPORT_KEY_PREFIX = "report:"
+
+DAILY = "daily"
+WEEKLY = "weekly"
+
+
+async def build_daily_report(session: AsyncSession, day: date) -> Dict:
+    """Totals, top products and status split of one local day."""
+    stats = StatsService(session)
+    return {
+        **await stats.get_daily_stats(day),
+        "top_products": await stats.get_top_products(day, day, limit=10),
+        "statuses": await stats.get_order_status_distribution(day, day)
+    }
+
+
+async def build_weekly_report(session: AsyncSession, end_date: date) -> Dict:
+    """Seven local days ending with end_date."""
+    stats = StatsService(session)
+    start_date = end_date - timedelta(days=6)
+    return {
+        **await stats.get_period_stats(start_date, end_date),
+        "top_products": await stats.get_top_products(start_date, end_date, limit=10),
+        "statuses": await stats.get_order_status_distribution(start_date, end_date)
+    }
+
+
+BUILDERS = {
+    DAILY: build_daily_report,
+    WEEKLY: build_weekly_report
+}
+
+
+def report_days(kind: str, day: date) -> Tuple[date, date]:
+    """First and last local day covered by a report."""
+    if kind == WEEKLY:
+        return day - timedelta(days=6), day
+    return day, day
+
+
+async def days_settled(session: AsyncSession, start_date: date, end_date: date) -> bool:
+    """Whether every order created on these days is delivered or cancelled."""
+    lower, upper = local_day_range(start_date, end_date)
+    # Same predicate as the partial index ix_orders_active_status_created_at
+    result = await session.execute(
+        select(Order.id)
+        .where(
+            Order.created_at >= lower,
+            Order.created_at < upper,
+            Order.status.notin_([OrderStatus.DELIVERED.value, OrderStatus.CANCELLED.value])
+        )
+        .limit(1)
+    )
+    return result.first() is None
+
+
+class ReportCache:
+    """Reports keyed by kind and date; a missing Redis client disables caching.
+
+    A report is only stored once every order of its days is delivered or
+    cancelled, so later transitions cannot change it; rebuilding the rollup
+    of a day drops the reports covering it.
+    """
+
+    def __init__(self, redis_client=None, ttl_seconds: Optional[int] = None):
+        self._redis = redis_client
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.report_cache_ttl_seconds
+
+    @staticmethod
+    def key(kind: str, day: date) -> str:
+        return f"{REPORT_KEY_PREFIX}{kind}:{day.isoformat()}"
+
+    async def get(self, kind: str, day: date) -> Optional[Dict]:
+        """Cached report, or None when it has not been generated yet."""
+        if self._redis is None:
+            return None
+        try:
+            raw = await self._redis.get(self.key(kind, day))
+        except Exception as e:
+            logger.warning(f"Failed to read cached report: {e}")
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    async def put(self, kind: str, day: date, report: Dict) -> None:
+        """Store a rendered report."""
+        if self._redis is None:
+            return
+        try:
+            await self._redis.set(self.key(kind, day), json.dumps(report), ex=self.ttl_seconds or None)
+        except Exception as e:
+            logger.warning(f"Failed to cache report: {e}")
+
+    async def put_if_settled(self, session: AsyncSession, kind: str, day: date, report: Dict) -> bool:
+        """Store a report if none of its orders can change status any more."""
+        if self._redis is None or not await days_settled(session, *report_days(kind, day)):
+            return False
+        await self.put(kind, day, report)
+        return True
+
+    async def invalidate(self, start_date: date, end_date: date) -> None:
+        """Drop the daily and weekly reports that cover any of these days."""
+        if self._redis is None:
+            return
+        keys = []
+        day = start_date
+        while day <= end_date + timedelta(days=6):
+            if day <= end_date:
+                keys.append(self.key(DAILY, day))
+            keys.append(self.key(WEEKLY, day))
+            day += timedelta(days=1)
+        try:
+            await self._redis.delete(*keys)
+        except Exception as e:
+            logger.warning(f"Failed to drop cached reports: {e}")
+
+    async def get_or_build(self, session: AsyncSession, kind: str, day: date) -> Dict:
+        """Cached report, built with session on a miss and stored once settled."""
+        report = await self.get(kind, day)
+        if report is not None:
+            return report
+        report = await BUILDERS[kind](session, day)
+        if day < today():
+            await self.put_if_settled(session, kind, day, report)
+        return report
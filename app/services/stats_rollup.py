@@ -0,0 +1,226 @@
+"""Incremental daily_stats rollup kept in step with order writes."""
+
+from datetime import date, datetime, timezone as dt_timezone
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from sqlalchemy import Integer, String, and_, delete, func, literal, null, select, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.daily_stats import ORDER_TOTALS, ROLLUP_SLOTS, DailyStat
+from app.models.order import Order
+from app.models.order_item import OrderItem
+from app.utils.time import get_timezone, local_day_range, utc_now
+
+ROLLUP_COLUMNS = ["stat_date", "status", "product_id", "slot", "product_name", "orders", "quantity", "revenue"]
+
+
+def _add_on_conflict(stmt):
+    """Turn an insert into daily_stats into an additive upsert."""
+    return stmt.on_conflict_do_update(
+        index_elements=[DailyStat.stat_date, DailyStat.status, DailyStat.product_id, DailyStat.slot],
+        set_={
+            "orders": DailyStat.orders + stmt.excluded.orders,
+            "quantity": DailyStat.quantity + stmt.excluded.quantity,
+            "revenue": DailyStat.revenue + stmt.excluded.revenue,
+            "product_name": func.coalesce(stmt.excluded.product_name, DailyStat.product_name)
+        }
+    )
+
+
+class DailyStatsRollup:
+    """Applies order deltas to daily_stats and rebuilds days from source tables.
+
+    Orders are counted on the local day they were created, under their
+    current status, so a status change moves them between rows of that day.
+    Each order always lands in the same slot (order_id % ROLLUP_SLOTS), which
+    spreads the day's upserts over ROLLUP_SLOTS rows per status and product.
+    """
+
+    def __init__(self, session: AsyncSession, tz=None):
+        self.session = session
+        self.tz = tz or get_timezone()
+
+    def local_day(self, created_at: Optional[datetime]) -> date:
+        """Local business day of a creation timestamp (naive values are UTC)."""
+        if created_at is None:
+            created_at = utc_now()
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=dt_timezone.utc)
+        return created_at.astimezone(self.tz).date()
+
+    def order_rows(self, order: Order, status: str, sign: int = 1) -> List[dict]:
+        """Rollup deltas of one order counted under status."""
+        day = self.local_day(order.created_at)
+        slot = order.id % ROLLUP_SLOTS
+        items = list(order.items or [])
+        rows: Dict[int, dict] = {
+            ORDER_TOTALS: {
+                "stat_date": day,
+                "status": status,
+                "product_id": ORDER_TOTALS,
+                "slot": slot,
+                "product_name": None,
+                "orders": sign,
+                "quantity": sign * sum(item.quantity for item in items),
+                "revenue": sign * Decimal(str(order.total))
+            }
+        }
+        for item in items:
+            row = rows.setdefault(item.product_id, {
+                "stat_date": day,
+                "status": status,
+                "product_id": item.product_id,
+                "slot": slot,
+                "product_name": item.product_name,
+                "orders": sign,
+                "quantity": 0,
+                "revenue": Decimal(0)
+            })
+            row["quantity"] += sign * item.quantity
+            row["revenue"] += sign * Decimal(str(item.item_total))
+        return list(rows.values())
+
+    async def record_order(self, order: Order) -> None:
+        """Count a new order under its status."""
+        await self._apply(self.order_rows(order, order.status))
+
+    async def move_order(self, order: Order, old_status: str, new_status: str) -> None:
+        """Move a loaded order from old_status to new_status."""
+        if old_status == new_status:
+            return
+        await self._apply(
+            self.order_rows(order, old_status, -1) + self.order_rows(order, new_status, 1)
+        )
+
+    async def _apply(self, rows: List[dict]) -> None:
+        await self.session.execute(_add_on_conflict(pg_insert(DailyStat).values(rows)))
+
+    def transition_statement(self, updated):
+        """Additive upsert moving the orders of an UPDATE ... RETURNING CTE.
+
+        updated must expose order_id, old_status, new_status, created_at and total.
+        Used as a CTE of the transition statement so it costs no extra round trip.
+        """
+        day = func.date(func.timezone(str(self.tz), updated.c.created_at))
+        slot = updated.c.order_id % ROLLUP_SLOTS
+        moves = union_all(
+            select(
+                updated.c.order_id,
+                updated.c.old_status.label("status"),
+                literal(-1, Integer).label("sign"),
+                day.label("stat_date"),
+                slot.label("slot"),
+                updated.c.total
+            ),
+            select(
+                updated.c.order_id,
+                updated.c.new_status.label("status"),
+                literal(1, Integer).label("sign"),
+                day.label("stat_date"),
+                slot.label("slot"),
+                updated.c.total
+            )
+        ).cte("moves")
+
+        order_quantity = (
+            select(func.coalesce(func.sum(OrderItem.quantity), 0))
+            .where(OrderItem.order_id == moves.c.order_id)
+            .scalar_subquery()
+        )
+        totals = (
+            select(
+                moves.c.stat_date,
+                moves.c.status,
+                literal(ORDER_TOTALS, Integer),
+                moves.c.slot,
+                null().cast(String),
+                func.sum(moves.c.sign),
+                func.sum(moves.c.sign * order_quantity),
+                func.sum(moves.c.sign * moves.c.total)
+            )
+            .group_by(moves.c.stat_date, moves.c.status, moves.c.slot)
+        )
+        # One row per order and product, so an order with several lines of a
+        # product still moves that product's order count by one
+        lines = (
+            select(
+                OrderItem.order_id,
+                OrderItem.product_id,
+                func.max(OrderItem.product_name).label("product_name"),
+                func.sum(OrderItem.quantity).label("quantity"),
+                func.sum(OrderItem.item_total).label("revenue")
+            )
+            .where(OrderItem.order_id.in_(select(updated.c.order_id)))
+            .group_by(OrderItem.order_id, OrderItem.product_id)
+            .subquery("lines")
+        )
+        products = (
+            select(
+                moves.c.stat_date,
+                moves.c.status,
+                lines.c.product_id,
+                moves.c.slot,
+                func.max(lines.c.product_name),
+                func.sum(moves.c.sign),
+                func.sum(moves.c.sign * lines.c.quantity),
+                func.sum(moves.c.sign * lines.c.revenue)
+            )
+            .join(lines, lines.c.order_id == moves.c.order_id)
+            .group_by(moves.c.stat_date, moves.c.status, lines.c.product_id, moves.c.slot)
+        )
+        return _add_on_conflict(
+            pg_insert(DailyStat).from_select(ROLLUP_COLUMNS, union_all(totals, products))
+        )
+
+    async def rebuild_days(self, start_date: date, end_date: Optional[date] = None) -> None:
+        """Recompute local days start_date..end_date from orders and order_items (no commit)."""
+        if end_date is None:
+            end_date = start_date
+        lower, upper = local_day_range(start_date, end_date, self.tz)
+        in_range = and_(Order.created_at >= lower, Order.created_at < upper)
+        day = func.date(func.timezone(str(self.tz), Order.created_at))
+        slot = Order.id % ROLLUP_SLOTS
+
+        order_quantity = (
+            select(func.coalesce(func.sum(OrderItem.quantity), 0))
+            .where(OrderItem.order_id == Order.id)
+            .scalar_subquery()
+        )
+        totals = (
+            select(
+                day,
+                Order.status,
+                literal(ORDER_TOTALS, Integer),
+                slot,
+                null().cast(String),
+                func.count(Order.id),
+                func.sum(order_quantity),
+                func.sum(Order.total)
+            )
+            .where(in_range)
+            .group_by(day, Order.status, slot)
+        )
+        products = (
+            select(
+                day,
+                Order.status,
+                OrderItem.product_id,
+                slot,
+                func.max(OrderItem.product_name),
+                func.count(func.distinct(Order.id)),
+                func.sum(OrderItem.quantity),
+                func.sum(OrderItem.item_total)
+            )
+            .join(OrderItem, OrderItem.order_id == Order.id)
+            .where(in_range)
+            .group_by(day, Order.status, OrderItem.product_id, slot)
+        )
+
+        await self.session.execute(
+            delete(DailyStat).where(DailyStat.stat_date.between(start_date, end_date))
+        )
+        await self.session.execute(
+            pg_insert(DailyStat).from_select(ROLLUP_COLUMNS, union_all(totals, products))
+        )
@@ -1,62 +1,96 @@
 """Stats service for generating statistics and reports."""
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, date, timedelta
 
-from sqlalchemy import select, func, and_, cast, Date
+from sqlalchemy import select, func, and_, union_all
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.models.daily_stats import ORDER_TOTALS, DailyStat
 from app.models.order import Order
 from app.models.order_item import OrderItem
 from app.models.product import Product
 from app.utils.enums import OrderStatus
+from app.utils.time import get_timezone, local_day_range
+
+DateRange = Tuple[date, date]
 
 
 class StatsService:
-    """Service for statistics and reporting."""
+    """Service for statistics and reporting.
+    
+    Days are calendar days in the configured timezone. Closed days are read
+    from the daily_stats rollup; today (and later) from the live tables,
+    filtered with half-open ranges on Order.created_at.
+    """
     
     def __init__(self, session: AsyncSession):
         self.session = session
+        self.tz = get_timezone()
+    
+    def _today(self) -> date:
+        return datetime.now(self.tz).date()
+    
+    def _split(self, start_date: date, end_date: date) -> Tuple[Optional[DateRange], Optional[DateRange]]:
+        """Split start_date..end_date into closed days (rollup) and live days."""
+        current = self._today()
+        closed = (start_date, min(end_date, current - timedelta(days=1))) if start_date < current else None
+        live = (max(start_date, current), end_date) if end_date >= current else None
+        return closed, live
+    
+    def _created_between(self, start_date: date, end_date: date):
+        """Orders created on local days start_date..end_date inclusive."""
+        lower, upper = local_day_range(start_date, end_date, self.tz)
+        return and_(Order.created_at >= lower, Order.created_at < upper)
+    
+    def _local_day(self):
+        """Local calendar day of Order.created_at."""
+        return func.date_trunc("day", func.timezone(str(self.tz), Order.created_at))
+    
+    @staticmethod
+    def _rollup_between(start_date: date, end_date: date):
+        return DailyStat.stat_date.between(start_date, end_date)
     
     async def get_daily_stats(self, target_date: Optional[date] = None) -> Dict:
         """Get statistics for a specific day."""
         if target_date is None:
-            target_date = date.today()
+            target_date = self._today()
         
-        # Orders count and revenue
-        orders_result = await self.session.execute(
-            select(
-                func.count(Order.id).label("total_orders"),
-                func.sum(Order.total).label("total_revenue"),
-                func.avg(Order.total).label("avg_order_value")
-            )
-            .where(
-                and_(
-                    cast(Order.created_at, Date) == target_date,
-                    Order.status != OrderStatus.CANCELLED.value
+        # One pass: completed and cancelled orders via conditional aggregates
+        if target_date < self._today():
+            not_cancelled = DailyStat.status != OrderStatus.CANCELLED.value
+            query = (
+                select(
+                    func.sum(DailyStat.orders).filter(not_cancelled).label("total_orders"),
+                    func.sum(DailyStat.revenue).filter(not_cancelled).label("total_revenue"),
+                    func.sum(DailyStat.orders).filter(
+                        DailyStat.status == OrderStatus.CANCELLED.value
+                    ).label("cancelled_orders")
                 )
+                .where(DailyStat.stat_date == target_date, DailyStat.product_id == ORDER_TOTALS)
             )
-        )
-        orders_stats = orders_result.one()
-        
-        # Cancelled orders
-        cancelled_result = await self.session.execute(
-            select(func.count(Order.id))
-            .where(
-                and_(
-                    cast(Order.created_at, Date) == target_date,
-                    Order.status == OrderStatus.CANCELLED.value
+        else:
+            not_cancelled = Order.status != OrderStatus.CANCELLED.value
+            query = (
+                select(
+                    func.count(Order.id).filter(not_cancelled).label("total_orders"),
+                    func.sum(Order.total).filter(not_cancelled).label("total_revenue"),
+                    func.count(Order.id).filter(
+                        Order.status == OrderStatus.CANCELLED.value
+                    ).label("cancelled_orders")
                 )
+                .where(self._created_between(target_date, target_date))
             )
-        )
-        cancelled_count = cancelled_result.scalar() or 0
+        stats = (await self.session.execute(query)).one()
         
+        total_orders = int(stats.total_orders or 0)
+        total_revenue = float(stats.total_revenue or 0)
         return {
             "date": target_date.isoformat(),
-            "total_orders": orders_stats.total_orders or 0,
-            "cancelled_orders": cancelled_count,
-            "total_revenue": float(orders_stats.total_revenue or 0),
-            "average_order_value": float(orders_stats.avg_order_value or 0)
+            "total_orders": total_orders,
+            "cancelled_orders": int(stats.cancelled_orders or 0),
+            "total_revenue": total_revenue,
+            "average_order_value": total_revenue / total_orders if total_orders else 0.0
         }
     
     async def get_period_stats(
@@ -65,57 +99,64 @@ class StatsService:
         end_date: date
     ) -> Dict:
         """Get statistics for a date period."""
+        closed, live = self._split(start_date, end_date)
+        rows = []
+        
         # Daily breakdown
-        daily_result = await self.session.execute(
-            select(
-                cast(Order.created_at, Date).label("day"),
-                func.count(Order.id).label("orders"),
-                func.sum(Order.total).label("revenue")
+        if closed:
+            result = await self.session.execute(
+                select(
+                    DailyStat.stat_date.label("day"),
+                    func.sum(DailyStat.orders).label("orders"),
+                    func.sum(DailyStat.revenue).label("revenue")
+                )
+                .where(
+                    self._rollup_between(*closed),
+                    DailyStat.product_id == ORDER_TOTALS,
+                    DailyStat.status != OrderStatus.CANCELLED.value
+                )
+                .group_by(DailyStat.stat_date)
+                .having(func.sum(DailyStat.orders) > 0)
+                .order_by(DailyStat.stat_date)
             )
-            .where(
-                and_(
-                    cast(Order.created_at, Date) >= start_date,
-                    cast(Order.created_at, Date) <= end_date,
-                    Order.status != OrderStatus.CANCELLED.value
+            rows.extend(result.all())
+        if live:
+            day = self._local_day()
+            result = await self.session.execute(
+                select(
+                    day.label("day"),
+                    func.count(Order.id).label("orders"),
+                    func.sum(Order.total).label("revenue")
+                )
+                .where(
+                    and_(
+                        self._created_between(*live),
+                        Order.status != OrderStatus.CANCELLED.value
+                    )
                 )
+                .group_by(day)
+                .order_by(day)
             )
-            .group_by(cast(Order.created_at, Date))
-            .order_by(cast(Order.created_at, Date))
-        )
+            rows.extend(result.all())
         
         daily_stats = [
             {
-                "date": row.day.isoformat(),
-                "orders": row.orders,
+                "date": _as_date(row.day).isoformat(),
+                "orders": int(row.orders),
                 "revenue": float(row.revenue or 0)
             }
-            for row in daily_result.all()
+            for row in rows
         ]
         
-        # Overall totals
-        total_result = await self.session.execute(
-            select(
-                func.count(Order.id).label("total_orders"),
-                func.sum(Order.total).label("total_revenue")
-            )
-            .where(
-                and_(
-                    cast(Order.created_at, Date) >= start_date,
-                    cast(Order.created_at, Date) <= end_date,
-                    Order.status != OrderStatus.CANCELLED.value
-                )
-            )
-        )
-        totals = total_result.one()
-        
         return {
             "period": {
                 "start": start_date.isoformat(),
                 "end": end_date.isoformat()
             },
             "daily": daily_stats,
-            "total_orders": totals.total_orders or 0,
-            "total_revenue": float(totals.total_revenue or 0)
+            # Totals are the sum of the daily rows
+            "total_orders": sum(d["orders"] for d in daily_stats),
+            "total_revenue": sum(d["revenue"] for d in daily_stats)
         }
     
     async def get_top_products(
@@ -126,27 +167,59 @@ class StatsService:
     ) -> List[Dict]:
         """Get top selling products."""
         if end_date is None:
-            end_date = date.today()
+            end_date = self._today()
         if start_date is None:
             start_date = end_date - timedelta(days=30)
+        closed, live = self._split(start_date, end_date)
         
-        result = await self.session.execute(
-            select(
-                OrderItem.product_id,
-                OrderItem.product_name,
-                func.sum(OrderItem.quantity).label("total_quantity"),
-                func.sum(OrderItem.item_total).label("total_revenue")
+        parts = []
+        if closed:
+            parts.append(
+                select(
+                    DailyStat.product_id,
+                    func.max(DailyStat.product_name).label("product_name"),
+                    func.sum(DailyStat.quantity).label("total_quantity"),
+                    func.sum(DailyStat.revenue).label("total_revenue")
+                )
+                .where(
+                    self._rollup_between(*closed),
+                    DailyStat.product_id != ORDER_TOTALS,
+                    DailyStat.status != OrderStatus.CANCELLED.value
+                )
+                .group_by(DailyStat.product_id)
             )
-            .join(Order)
-            .where(
-                and_(
-                    cast(Order.created_at, Date) >= start_date,
-                    cast(Order.created_at, Date) <= end_date,
-                    Order.status != OrderStatus.CANCELLED.value
+        if live:
+            parts.append(
+                select(
+                    OrderItem.product_id,
+                    func.max(OrderItem.product_name).label("product_name"),
+                    func.sum(OrderItem.quantity).label("total_quantity"),
+                    func.sum(OrderItem.item_total).label("total_revenue")
                 )
+                .join(Order)
+                .where(
+                    and_(
+                        self._created_between(*live),
+                        Order.status != OrderStatus.CANCELLED.value
+                    )
+                )
+                .group_by(OrderItem.product_id)
+            )
+        if not parts:
+            return []
+        
+        combined = union_all(*parts).subquery() if len(parts) > 1 else parts[0].subquery()
+        total_quantity = func.sum(combined.c.total_quantity)
+        result = await self.session.execute(
+            select(
+                combined.c.product_id,
+                func.max(combined.c.product_name).label("product_name"),
+                total_quantity.label("total_quantity"),
+                func.sum(combined.c.total_revenue).label("total_revenue")
             )
-            .group_by(OrderItem.product_id, OrderItem.product_name)
-            .order_by(func.sum(OrderItem.quantity).desc())
+            .group_by(combined.c.product_id)
+            .having(total_quantity > 0)
+            .order_by(total_quantity.desc())
             .limit(limit)
         )
         
@@ -154,7 +227,7 @@ class StatsService:
             {
                 "product_id": row.product_id,
                 "product_name": row.product_name,
-                "total_quantity": row.total_quantity,
+                "total_quantity": int(row.total_quantity),
                 "total_revenue": float(row.total_revenue or 0)
             }
             for row in result.all()
@@ -167,22 +240,36 @@ class StatsService:
     ) -> Dict[str, int]:
         """Get distribution of orders by status."""
         if end_date is None:
-            end_date = date.today()
+            end_date = self._today()
         if start_date is None:
             start_date = end_date - timedelta(days=30)
+        closed, live = self._split(start_date, end_date)
         
-        result = await self.session.execute(
-            select(
-                Order.status,
-                func.count(Order.id).label("count")
+        parts = []
+        if closed:
+            parts.append(
+                select(DailyStat.status, func.sum(DailyStat.orders).label("count"))
+                .where(self._rollup_between(*closed), DailyStat.product_id == ORDER_TOTALS)
+                .group_by(DailyStat.status)
             )
-            .where(
-                and_(
-                    cast(Order.created_at, Date) >= start_date,
-                    cast(Order.created_at, Date) <= end_date
-                )
+        if live:
+            parts.append(
+                select(Order.status, func.count(Order.id).label("count"))
+                .where(self._created_between(*live))
+                .group_by(Order.status)
             )
-            .group_by(Order.status)
+        if not parts:
+            return {}
+        
+        combined = union_all(*parts).subquery() if len(parts) > 1 else parts[0].subquery()
+        result = await self.session.execute(
+            select(combined.c.status, func.sum(combined.c.count).label("count"))
+            .group_by(combined.c.status)
         )
         
-        return {row.status: row.count for row in result.all()}
+        return {row.status: int(row.count) for row in result.all() if row.count}
+
+
+def _as_date(value) -> date:
+    """date_trunc returns a timestamp; reports use the calendar day."""
+    return value.date() if isinstance(value, datetime) else value
@@ -0,0 +1,221 @@
+"""Short-lived cache of Telegram user identities used by AuthMiddleware."""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import update
+
+from app.config import settings
+from app.models.user import User
+from app.utils.enums import ADMIN_ROLES, CLIENT_ROLES, MANAGER_ROLES, STAFF_ROLES
+
+logger = logging.getLogger(__name__)
+
+USER_KEY_PREFIX = "user:identity:"
+
+# Profile fields Telegram sends with every update
+PROFILE_FIELDS = ("username", "first_name", "last_name")
+
+
+@dataclass(frozen=True)
+class UserIdentity:
+    """Read-only user as seen by bot handlers."""
+
+    id: int
+    telegram_id: int
+    role: str
+    is_active: bool
+    username: Optional[str] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserIdentity":
+        """Freeze a user row."""
+        return cls(
+            id=user.id,
+            telegram_id=user.telegram_id,
+            role=user.role,
+            is_active=user.is_active,
+            username=user.username,
+            first_name=user.first_name,
+            last_name=user.last_name
+        )
+
+    @property
+    def full_name(self) -> str:
+        """Get user's full name."""
+        parts = [self.first_name or "", self.last_name or ""]
+        name = " ".join(p for p in parts if p)
+        return name or self.username or f"User_{self.telegram_id}"
+
+    def is_admin(self) -> bool:
+        """Check if user is admin."""
+        return self.role in ADMIN_ROLES
+
+    def is_manager(self) -> bool:
+        """Check if user is manager."""
+        return self.role in MANAGER_ROLES
+
+    def is_staff(self) -> bool:
+        """Check if user is any staff member."""
+        return self.role in STAFF_ROLES
+
+    def is_client(self) -> bool:
+        """Check if user is a client."""
+        return self.role in CLIENT_ROLES
+
+    def profile_changes(self, **profile: Optional[str]) -> Dict[str, str]:
+        """Profile fields that differ from the given Telegram values (empty values are ignored)."""
+        return {
+            name: value
+            for name, value in profile.items()
+            if name in PROFILE_FIELDS and value and getattr(self, name) != value
+        }
+
+
+class UserCache:
+    """In-process LRU of identities keyed by telegram_id, backed by an optional Redis tier.
+
+    Profile changes are written back in batches by a background task.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: Optional[int] = None,
+        max_size: Optional[int] = None,
+        flush_interval: Optional[float] = None
+    ):
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.user_cache_ttl_seconds
+        self.max_size = max_size if max_size is not None else settings.user_cache_max_size
+        self.flush_interval = (
+            flush_interval if flush_interval is not None else settings.user_profile_flush_seconds
+        )
+        self._local: "OrderedDict[int, Tuple[float, UserIdentity]]" = OrderedDict()
+        # user id -> profile fields still to be written
+        self._pending: Dict[int, Dict[str, str]] = {}
+        self._redis = None
+        self._flusher: Optional[asyncio.Task] = None
+
+    async def get(self, telegram_id: int) -> Optional[UserIdentity]:
+        """Cached identity, or None when it has to be loaded from the database."""
+        entry = self._local.get(telegram_id)
+        if entry is not None:
+            expires_at, identity = entry
+            if expires_at > time.monotonic():
+                self._local.move_to_end(telegram_id)
+                return identity
+            del self._local[telegram_id]
+
+        if self._redis is None or not self.ttl_seconds:
+            return None
+        try:
+            raw = await self._redis.get(f"{USER_KEY_PREFIX}{telegram_id}")
+        except Exception as e:
+            logger.warning(f"Failed to read cached user identity: {e}")
+            return None
+        if raw is None:
+            return None
+        identity = UserIdentity(**json.loads(raw))
+        self._remember(identity)
+        return identity
+
+    async def put(self, identity: UserIdentity) -> None:
+        """Cache an identity in both tiers."""
+        self._remember(identity)
+        if self._redis is None or not self.ttl_seconds:
+            return
+        try:
+            await self._redis.set(
+                f"{USER_KEY_PREFIX}{identity.telegram_id}",
+                json.dumps(asdict(identity)),
+                ex=self.ttl_seconds
+            )
+        except Exception as e:
+            logger.warning(f"Failed to cache user identity: {e}")
+
+    async def invalidate(self, telegram_id: int) -> None:
+        """Forget an identity after its role or active flag changed."""
+        self._local.pop(telegram_id, None)
+        if self._redis is None:
+            return
+        try:
+            await self._redis.delete(f"{USER_KEY_PREFIX}{telegram_id}")
+        except Exception as e:
+            logger.warning(f"Failed to invalidate cached user identity: {e}")
+
+    async def update_profile(self, identity: UserIdentity, **profile: Optional[str]) -> UserIdentity:
+        """Apply Telegram profile values, queueing a database write only when they changed."""
+        changes = identity.profile_changes(**profile)
+        if not changes:
+            return identity
+        self._pending.setdefault(identity.id, {}).update(changes)
+        identity = replace(identity, **changes)
+        await self.put(identity)
+        return identity
+
+    def _remember(self, identity: UserIdentity) -> None:
+        if not self.ttl_seconds or self.max_size <= 0:
+            return
+        self._local[identity.telegram_id] = (time.monotonic() + self.ttl_seconds, identity)
+        self._local.move_to_end(identity.telegram_id)
+        while len(self._local) > self.max_size:
+            self._local.popitem(last=False)
+
+    async def flush(self) -> int:
+        """Write queued profile changes in one transaction; returns the number of users written."""
+        if not self._pending:
+            return 0
+        from app import database
+
+        pending, self._pending = self._pending, {}
+        if database.AsyncSessionLocal is None:
+            return 0
+        rows = [{"id": user_id, **changes} for user_id, changes in pending.items()]
+        try:
+            async with database.AsyncSessionLocal() as session:
+                # ORM bulk UPDATE by primary key (executemany)
+                await session.execute(update(User), rows)
+                await session.commit()
+        except Exception as e:
+            logger.warning(f"Failed to write user profile changes: {e}")
+            # Requeue, letting changes queued meanwhile win
+            for user_id, changes in pending.items():
+                self._pending[user_id] = {**changes, **self._pending.get(user_id, {})}
+            return 0
+        return len(rows)
+
+    def start(self, redis_client=None) -> None:
+        """Attach the optional Redis tier and start the write-behind task."""
+        self._redis = redis_client
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Stop the write-behind task and write what is still queued."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+        self._redis = None
+
+    def clear(self) -> None:
+        """Drop cached identities held by this process."""
+        self._local.clear()
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+
+user_cache = UserCache()
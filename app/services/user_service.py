@@ -6,6 +6,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user import User
+from app.services.user_cache import user_cache
 from app.utils.enums import UserRole
 from app.utils.exceptions import NotFoundException
 
@@ -46,20 +47,20 @@ class UserService:
         user = await self.get_user_by_telegram_id(telegram_id)
         
         if user:
-            # Update user info if changed
-            if username and user.username != username:
-                user.username = username
-            if first_name and user.first_name != first_name:
-                user.first_name = first_name
-            if last_name and user.last_name != last_name:
-                user.last_name = last_name
-            await self.session.flush()
-            await self.session.commit()
+            # Update user info only if changed
+            changed = False
+            for name, value in (("username", username), ("first_name", first_name), ("last_name", last_name)):
+                if value and getattr(user, name) != value:
+                    setattr(user, name, value)
+                    changed = True
+            if changed:
+                await self.session.flush()
+                await self.session.commit()
             return user
         
         # Check if this is the first admin
         admin_check = await self.session.execute(
-            select(User).where(User.role == UserRole.ADMIN.value)
+            select(User.id).where(User.role == UserRole.ADMIN.value).limit(1)
         )
         is_first_user = admin_check.scalar_one_or_none() is None
         
@@ -110,6 +111,7 @@ class UserService:
         user.role = role.value
         await self.session.flush()
         await self.session.commit()
+        await user_cache.invalidate(user.telegram_id)
         return user
     
     async def deactivate_user(self, user_id: int) -> User:
@@ -118,6 +120,7 @@ class UserService:
         user.is_active = False
         await self.session.flush()
         await self.session.commit()
+        await user_cache.invalidate(user.telegram_id)
         return user
     
     async def activate_user(self, user_id: int) -> User:
@@ -126,6 +129,7 @@ class UserService:
         user.is_active = True
         await self.session.flush()
         await self.session.commit()
+        await user_cache.invalidate(user.telegram_id)
         return user
     
     async def get_users_by_role(
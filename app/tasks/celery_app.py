@@ -1,6 +1,7 @@
 """Celery application configuration."""
 
 from celery import Celery
+from celery.schedules import crontab
 
 
 def _get_settings():
@@ -27,6 +28,24 @@ def configure_celery():
     celery_app.conf.task_time_limit = 30 * 60  # 30 minutes
     celery_app.conf.worker_prefetch_multiplier = 1
     celery_app.conf.worker_max_tasks_per_child = 1000
+    celery_app.conf.beat_schedule = BEAT_SCHEDULE
+
+
+# Crontabs run in settings.timezone; reports cover the day that just closed
+BEAT_SCHEDULE = {
+    "reconcile-daily-stats": {
+        "task": "app.tasks.reports.reconcile_daily_stats",
+        "schedule": crontab(hour=0, minute=10),
+    },
+    "generate-daily-stats": {
+        "task": "app.tasks.reports.generate_daily_stats",
+        "schedule": crontab(hour=0, minute=30),
+    },
+    "generate-weekly-report": {
+        "task": "app.tasks.reports.generate_weekly_report",
+        "schedule": crontab(hour=0, minute=45, day_of_week="mon"),
+    },
+}
 
 
 # Include task modules
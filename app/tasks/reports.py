@@ -1,40 +1,167 @@
 """Report generation tasks."""
 
+import asyncio
 import logging
 from datetime import date, timedelta
+from typing import List, Tuple
+
+from celery import group
 
 from app.tasks.celery_app import celery_app
 
 logger = logging.getLogger(__name__)
 
 
+def _yesterday() -> date:
+    from app.utils.time import today
+    return today() - timedelta(days=1)
+
+
+def _chunks(start: date, end: date, days: int) -> List[Tuple[date, date]]:
+    """Split start..end (inclusive) into consecutive ranges of at most days days."""
+    days = max(days, 1)
+    chunks = []
+    while start <= end:
+        chunk_end = min(start + timedelta(days=days - 1), end)
+        chunks.append((start, chunk_end))
+        start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+async def _with_session(work, read: bool = False):
+    """Run work(session, report_cache) on this event loop's own connections."""
+    from app import database
+    from app.config import settings
+    from app.services.report_cache import ReportCache
+
+    factory = database.ReadSessionLocal if read else database.AsyncSessionLocal
+    if factory is None:
+        raise RuntimeError("Database is not configured")
+    redis_client = None
+    if settings.redis_url:
+        import redis.asyncio as aioredis
+        redis_client = aioredis.from_url(settings.redis_url)
+    try:
+        async with factory() as session:
+            return await work(session, ReportCache(redis_client))
+    finally:
+        if redis_client is not None:
+            await redis_client.close()
+        # Pooled connections belong to this loop; the next asyncio.run gets a new one
+        await database.engine.dispose()
+        if database.read_engine is not database.engine:
+            await database.read_engine.dispose()
+
+
 @celery_app.task
 def generate_daily_stats(target_date: str = None):
-    """Generate daily statistics."""
+    """Render and cache the report of a closed day (defaults to yesterday) from the replica."""
+    from app.services.report_cache import DAILY, build_daily_report
+
     try:
-        if target_date:
-            target = date.fromisoformat(target_date)
-        else:
-            target = date.today()
-        
+        target = date.fromisoformat(target_date) if target_date else _yesterday()
+
+        async def render(session, cache):
+            report = await build_daily_report(session, target)
+            # Orders of the day may still be moving; /report builds it again until they settle
+            await cache.put_if_settled(session, DAILY, target, report)
+            return report
+
         logger.info(f"Generating daily stats for {target}")
-        # Implementation would generate stats
-        return {"success": True, "date": target.isoformat()}
+        report = asyncio.run(_with_session(render, read=True))
+        return {"success": True, "date": target.isoformat(), "total_orders": report["total_orders"]}
     except Exception as exc:
         logger.error(f"Failed to generate stats: {exc}")
         return {"success": False, "error": str(exc)}
 
 
 @celery_app.task
-def generate_weekly_report():
-    """Generate weekly report."""
+def generate_weekly_report(end_date: str = None):
+    """Render and cache the seven days ending with end_date (defaults to yesterday)."""
+    from app.services.report_cache import WEEKLY, build_weekly_report
+
     try:
-        end_date = date.today()
-        start_date = end_date - timedelta(days=7)
-        
-        logger.info(f"Generating weekly report: {start_date} to {end_date}")
-        # Implementation would generate report
-        return {"success": True}
+        end = date.fromisoformat(end_date) if end_date else _yesterday()
+
+        async def render(session, cache):
+            report = await build_weekly_report(session, end)
+            await cache.put_if_settled(session, WEEKLY, end, report)
+            return report
+
+        logger.info(f"Generating weekly report: {end - timedelta(days=6)} to {end}")
+        report = asyncio.run(_with_session(render, read=True))
+        return {"success": True, "end": end.isoformat(), "total_orders": report["total_orders"]}
     except Exception as exc:
         logger.error(f"Failed to generate weekly report: {exc}")
         return {"success": False, "error": str(exc)}
+
+
+@celery_app.task
+def reconcile_daily_stats(start_date: str = None, end_date: str = None):
+    """Rebuild daily_stats rows from orders (defaults to yesterday)."""
+    from app.services.stats_rollup import DailyStatsRollup
+
+    try:
+        start = date.fromisoformat(start_date) if start_date else _yesterday()
+        end = date.fromisoformat(end_date) if end_date else start
+
+        async def rebuild(session, cache):
+            await DailyStatsRollup(session).rebuild_days(start, end)
+            await session.commit()
+            await cache.invalidate(start, end)
+
+        logger.info(f"Reconciling daily stats: {start} to {end}")
+        asyncio.run(_with_session(rebuild))
+        return {"success": True, "start": start.isoformat(), "end": end.isoformat()}
+    except Exception as exc:
+        logger.error(f"Failed to reconcile daily stats: {exc}")
+        return {"success": False, "error": str(exc)}
+
+
+@celery_app.task
+def backfill_stats_chunk(start_date: str, end_date: str):
+    """Rebuild the rollup of one chunk and cache the daily report of each of its days."""
+    from app.services.report_cache import DAILY, build_daily_report
+    from app.services.stats_rollup import DailyStatsRollup
+
+    try:
+        start = date.fromisoformat(start_date)
+        end = date.fromisoformat(end_date)
+
+        async def backfill(session, cache):
+            await DailyStatsRollup(session).rebuild_days(start, end)
+            await session.commit()
+            await cache.invalidate(start, end)
+            # Read back on the primary: the replica may not have the rebuilt rows yet
+            day = start
+            while day <= end:
+                await cache.put_if_settled(session, DAILY, day, await build_daily_report(session, day))
+                day += timedelta(days=1)
+
+        logger.info(f"Backfilling stats: {start} to {end}")
+        asyncio.run(_with_session(backfill))
+        return {"success": True, "start": start.isoformat(), "end": end.isoformat()}
+    except Exception as exc:
+        logger.error(f"Failed to backfill stats {start_date} to {end_date}: {exc}")
+        return {"success": False, "error": str(exc)}
+
+
+@celery_app.task
+def backfill_stats(start_date: str, end_date: str = None, chunk_days: int = None):
+    """Fan a date range out to backfill_stats_chunk tasks running in parallel."""
+    from app.config import settings
+
+    try:
+        start = date.fromisoformat(start_date)
+        end = date.fromisoformat(end_date) if end_date else _yesterday()
+        chunks = _chunks(start, end, chunk_days or settings.report_backfill_chunk_days)
+
+        logger.info(f"Backfilling stats: {start} to {end} in {len(chunks)} chunks")
+        group(
+            backfill_stats_chunk.s(chunk_start.isoformat(), chunk_end.isoformat())
+            for chunk_start, chunk_end in chunks
+        ).apply_async()
+        return {"success": True, "chunks": len(chunks)}
+    except Exception as exc:
+        logger.error(f"Failed to schedule stats backfill: {exc}")
+        return {"success": False, "error": str(exc)}
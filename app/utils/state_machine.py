@@ -65,6 +65,13 @@ class OrderStateMachine:
         
         return list(self.transitions[status])
     
+    def get_source_statuses(self, to_status: OrderStatus) -> List[OrderStatus]:
+        """Get list of statuses that can transition to to_status."""
+        return [
+            status for status, targets in self.transitions.items()
+            if to_status in targets
+        ]
+    
     def get_all_statuses(self) -> List[OrderStatus]:
         """Get all order statuses."""
         return list(OrderStatus)
@@ -1,7 +1,7 @@
 """Time utilities."""
 
-from datetime import datetime, time, timezone as dt_timezone
-from typing import Optional
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from typing import Optional, Tuple
 
 from app.config import settings
 
@@ -20,6 +20,24 @@ def now() -> datetime:
     return datetime.now(get_timezone())
 
 
+def today() -> date:
+    """Get current date in configured timezone."""
+    return now().date()
+
+
+def local_day_range(start: date, end: Optional[date] = None, tz=None) -> Tuple[datetime, datetime]:
+    """Half-open UTC range [start 00:00, end + 1 day 00:00) of local calendar days.
+    
+    Days are taken in tz (configured timezone by default), so DST days are 23 or 25 hours long.
+    """
+    zone = tz or get_timezone()
+    if end is None:
+        end = start
+    lower = datetime.combine(start, time.min, tzinfo=zone)
+    upper = datetime.combine(end + timedelta(days=1), time.min, tzinfo=zone)
+    return lower.astimezone(dt_timezone.utc), upper.astimezone(dt_timezone.utc)
+
+
 def utc_now() -> datetime:
     """Get current UTC datetime."""
     return datetime.now(dt_timezone.utc)
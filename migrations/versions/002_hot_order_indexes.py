@@ -0,0 +1,52 @@
+"""Indexes for hot order, stats and menu queries."""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '002_hot_order_indexes'
+down_revision = '001_initial'
+branch_labels = None
+depends_on = None
+
+# name, table, columns, extra options
+INDEXES = [
+    # Staff queues: open orders of a status, oldest first
+    (
+        'ix_orders_active_status_created_at', 'orders', ['status', 'created_at'],
+        {'postgresql_where': sa.text("status NOT IN ('DELIVERED', 'CANCELLED')")}
+    ),
+    # Courier panels
+    (
+        'ix_orders_courier_id_status', 'orders', ['courier_id', 'status'],
+        {'postgresql_where': sa.text('courier_id IS NOT NULL')}
+    ),
+    # Date ranges in stats and newest-first listings
+    ('ix_orders_created_at', 'orders', ['created_at'], {}),
+    ('ix_order_status_logs_order_id', 'order_status_logs', ['order_id'], {}),
+    ('ix_order_items_order_id', 'order_items', ['order_id'], {}),
+    (
+        'ix_products_category_listing', 'products',
+        ['category_id', 'is_active', 'is_archived', 'sort_order'], {}
+    ),
+    ('ix_categories_parent_id', 'categories', ['parent_id'], {}),
+]
+
+
+def upgrade():
+    # CONCURRENTLY keeps orders writable while the indexes build; it cannot run in a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, options in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+                **options
+            )
+    op.execute('ANALYZE orders')
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,44 @@
+"""Transactional outbox for bot notifications."""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers
+revision = '004_notification_outbox'
+down_revision = '003_daily_stats'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'notification_outbox',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('event_type', sa.String(length=30), nullable=False),
+        sa.Column('order_id', sa.Integer(), nullable=True),
+        sa.Column('chat_id', sa.BigInteger(), nullable=False),
+        sa.Column('payload', postgresql.JSON(), nullable=True),
+        sa.Column('dedup_key', sa.String(length=100), nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('available_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('failed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('dedup_key')
+    )
+    op.create_index('ix_notification_outbox_id', 'notification_outbox', ['id'])
+    op.create_index(
+        'ix_notification_outbox_pending', 'notification_outbox', ['available_at'],
+        postgresql_where=sa.text('sent_at IS NULL AND failed_at IS NULL')
+    )
+
+
+def downgrade():
+    op.drop_index('ix_notification_outbox_pending', table_name='notification_outbox')
+    op.drop_index('ix_notification_outbox_id', table_name='notification_outbox')
+    op.drop_table('notification_outbox')
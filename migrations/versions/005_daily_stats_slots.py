@@ -0,0 +1,44 @@
+"""Split daily_stats rows into slots."""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = '005_daily_stats_slots'
+down_revision = '004_notification_outbox'
+branch_labels = None
+depends_on = None
+
+# Folds every slot back into slot 0 before the column is dropped
+MERGE_SLOTS = """
+WITH moved AS (
+    DELETE FROM daily_stats WHERE slot <> 0
+    RETURNING stat_date, status, product_id, product_name, orders, quantity, revenue
+)
+INSERT INTO daily_stats (stat_date, status, product_id, slot, product_name, orders, quantity, revenue)
+SELECT stat_date, status, product_id, 0, max(product_name), sum(orders), sum(quantity), sum(revenue)
+FROM moved
+GROUP BY stat_date, status, product_id
+ON CONFLICT (stat_date, status, product_id, slot) DO UPDATE SET
+    orders = daily_stats.orders + excluded.orders,
+    quantity = daily_stats.quantity + excluded.quantity,
+    revenue = daily_stats.revenue + excluded.revenue,
+    product_name = coalesce(excluded.product_name, daily_stats.product_name)
+"""
+
+
+def upgrade():
+    # Existing rows stay in slot 0; sums over the slots are unchanged
+    op.add_column(
+        'daily_stats',
+        sa.Column('slot', sa.Integer(), nullable=False, server_default='0')
+    )
+    op.drop_constraint('daily_stats_pkey', 'daily_stats', type_='primary')
+    op.create_primary_key('daily_stats_pkey', 'daily_stats', ['stat_date', 'status', 'product_id', 'slot'])
+
+
+def downgrade():
+    op.execute(MERGE_SLOTS)
+    op.drop_constraint('daily_stats_pkey', 'daily_stats', type_='primary')
+    op.drop_column('daily_stats', 'slot')
+    op.create_primary_key('daily_stats_pkey', 'daily_stats', ['stat_date', 'status', 'product_id'])
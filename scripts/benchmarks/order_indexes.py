@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""Benchmark: query plans of hot order queries with and without the 002 indexes.
+
+Seeds a large number of orders (one item and one status log each) for a
+benchmark user, prints EXPLAIN (ANALYZE, BUFFERS) for the staff queue,
+courier panel, stats range, order detail and menu listing queries with the
+indexes dropped, then recreates them and prints the plans again. Requires
+DATABASE_URL pointing to a scratch PostgreSQL database; all rows created by
+the benchmark are removed at the end.
+
+Usage:
+    python scripts/benchmarks/order_indexes.py --orders 1000000
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import delete, select, text
+
+from app.database import AsyncSessionLocal, Base, engine, init_db
+from app.models.category import Category
+from app.models.order import Order, OrderStatusLog
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.models.user import User
+from app.utils.enums import UserRole
+
+INDEX_NAMES = [
+    "ix_orders_active_status_created_at",
+    "ix_orders_courier_id_status",
+    "ix_orders_created_at",
+    "ix_order_status_logs_order_id",
+    "ix_order_items_order_id",
+    "ix_products_category_listing",
+    "ix_categories_parent_id",
+]
+
+QUERIES = {
+    "staff queue": """
+        SELECT id FROM orders
+        WHERE status = 'READY'
+        ORDER BY created_at ASC
+        LIMIT 50
+    """,
+    "courier panel": """
+        SELECT id FROM orders
+        WHERE courier_id = :courier_id AND status IN ('ASSIGNED', 'IN_DELIVERY')
+    """,
+    "stats day": """
+        SELECT count(*), sum(total) FROM orders
+        WHERE created_at >= now() - interval '1 day' AND created_at < now()
+          AND status <> 'CANCELLED'
+    """,
+    "order items": "SELECT * FROM order_items WHERE order_id = :order_id",
+    "status log": "SELECT * FROM order_status_logs WHERE order_id = :order_id",
+    "menu listing": """
+        SELECT id FROM products
+        WHERE category_id = :category_id AND is_active AND NOT is_archived
+        ORDER BY sort_order
+    """,
+}
+
+# Mostly closed orders with a thin tail of open ones, like a live shop
+SEED_ORDERS = """
+    INSERT INTO orders (
+        created_at, order_number, user_id, status, version, payment_method, payment_status,
+        subtotal, delivery_fee, discount_amount, total, delivery_address, delivery_phone, courier_id
+    )
+    SELECT
+        now() - (g * interval '1 minute') / :per_minute,
+        'BX' || g,
+        :user_id,
+        CASE
+            WHEN g % 100 = 0 THEN 'READY'
+            WHEN g % 100 = 1 THEN 'IN_DELIVERY'
+            WHEN g % 100 = 2 THEN 'NEW'
+            WHEN g % 20 = 3 THEN 'CANCELLED'
+            ELSE 'DELIVERED'
+        END,
+        1, 'cash', 'paid', 500, 0, 0, 500, 'Benchmark street 1', '+70000000000',
+        CASE WHEN g % 100 = 1 OR g % 3 = 0 THEN :user_id END
+    FROM generate_series(1, :orders) AS g
+"""
+
+SEED_CHILDREN = [
+    """
+    INSERT INTO order_items (
+        created_at, order_id, product_id, product_name, product_price, quantity, modifiers_price, item_total
+    )
+    SELECT created_at, id, :product_id, 'Bench product', 500, 1, 0, 500
+    FROM orders WHERE user_id = :user_id
+    """,
+    """
+    INSERT INTO order_status_logs (created_at, order_id, new_status, changed_by_id)
+    SELECT created_at, id, status, :user_id
+    FROM orders WHERE user_id = :user_id
+    """,
+]
+
+
+async def seed(orders: int):
+    async with AsyncSessionLocal() as session:
+        user = User(telegram_id=-int(time.time()), first_name="bench", role=UserRole.COURIER.value)
+        category = Category(name="Benchmark")
+        session.add_all([user, category])
+        await session.flush()
+        product = Product(name="Bench product", price=500, category_id=category.id)
+        session.add(product)
+        await session.flush()
+
+        params = {"user_id": user.id, "product_id": product.id}
+        # Spread the orders over roughly a year
+        await session.execute(
+            text(SEED_ORDERS),
+            {**params, "orders": orders, "per_minute": max(orders / 525600, 1)}
+        )
+        for statement in SEED_CHILDREN:
+            await session.execute(text(statement), params)
+        order_id = (await session.execute(
+            select(Order.id).where(Order.user_id == user.id).limit(1)
+        )).scalar_one()
+        await session.commit()
+        return user.id, category.id, product.id, order_id
+
+
+async def cleanup(user_id: int, category_id: int, product_id: int) -> None:
+    async with AsyncSessionLocal() as session:
+        order_ids = select(Order.id).where(Order.user_id == user_id)
+        await session.execute(delete(OrderStatusLog).where(OrderStatusLog.order_id.in_(order_ids)))
+        await session.execute(delete(OrderItem).where(OrderItem.order_id.in_(order_ids)))
+        await session.execute(delete(Order).where(Order.user_id == user_id))
+        await session.execute(delete(Product).where(Product.id == product_id))
+        await session.execute(delete(Category).where(Category.id == category_id))
+        await session.execute(delete(User).where(User.id == user_id))
+        await session.commit()
+
+
+def _indexes():
+    return [
+        index
+        for table in Base.metadata.sorted_tables
+        for index in table.indexes
+        if index.name in INDEX_NAMES
+    ]
+
+
+async def drop_indexes() -> None:
+    async with engine.begin() as conn:
+        for name in INDEX_NAMES:
+            await conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+
+
+async def create_indexes() -> None:
+    async with engine.begin() as conn:
+        for index in _indexes():
+            await conn.run_sync(lambda sync_conn: index.create(sync_conn, checkfirst=True))
+        await conn.execute(text("ANALYZE orders, order_items, order_status_logs, products, categories"))
+
+
+async def explain_all(label: str, params: dict) -> None:
+    print(f"===== {label} =====")
+    async with engine.connect() as conn:
+        for name, sql in QUERIES.items():
+            rows = (await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"), params)).all()
+            print(f"--- {name}")
+            for (line,) in rows:
+                print(line)
+    print()
+
+
+async def run(orders: int) -> None:
+    if engine is None:
+        raise SystemExit("DATABASE_URL is not configured")
+    await init_db()
+
+    started = time.perf_counter()
+    user_id, category_id, product_id, order_id = await seed(orders)
+    print(f"Seeded {orders} orders in {time.perf_counter() - started:.1f}s\n")
+    params = {"courier_id": user_id, "order_id": order_id, "category_id": category_id}
+
+    try:
+        await drop_indexes()
+        async with engine.begin() as conn:
+            await conn.execute(text("ANALYZE orders, order_items, order_status_logs, products, categories"))
+        await explain_all("before", params)
+
+        await create_indexes()
+        await explain_all("after", params)
+    finally:
+        await create_indexes()
+        await cleanup(user_id, category_id, product_id)
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare query plans with and without hot order indexes")
+    parser.add_argument("--orders", type=int, default=1_000_000, help="Orders to seed")
+    args = parser.parse_args()
+    asyncio.run(run(args.orders))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""Benchmark: database round trips per order in OrderService.create_order.
+
+Compares the legacy per-line lookup (one SELECT per cart line plus a separate
+commit for the order number) with the batched path used by
+``OrderService.create_order``. Requires DATABASE_URL pointing to a scratch
+PostgreSQL database; all rows created by the benchmark are removed at the end.
+
+Usage:
+    python scripts/benchmarks/order_round_trips.py --lines 20 --orders 50
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import date
+
+from sqlalchemy import delete, event, select
+
+from app.database import AsyncSessionLocal, engine, init_db
+from app.models.category import Category
+from app.models.daily_counter import DailyCounter
+from app.models.order import Order, OrderStatusLog
+from app.models.order_item import OrderItem
+from app.models.product import Product
+from app.models.user import User
+from app.services.order_service import OrderService
+from app.utils.enums import OrderStatus, PaymentStatus, UserRole
+
+
+class RoundTripCounter:
+    """Counts statements and commits sent to the server."""
+
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+        self.enabled = False
+
+    @property
+    def total(self) -> int:
+        return self.statements + self.commits
+
+    def reset(self) -> None:
+        self.statements = 0
+        self.commits = 0
+
+    def install(self, sync_engine) -> None:
+        @event.listens_for(sync_engine, "before_cursor_execute")
+        def _on_execute(conn, cursor, statement, parameters, context, executemany):
+            if self.enabled:
+                self.statements += 1
+
+        @event.listens_for(sync_engine, "commit")
+        def _on_commit(conn):
+            if self.enabled:
+                self.commits += 1
+
+
+async def legacy_create_order(session, user_id: int, items: list) -> Order:
+    """Reproduction of the pre-batching create_order flow."""
+    today = date.today()
+    counter = (await session.execute(
+        select(DailyCounter).where(DailyCounter.counter_date == today)
+    )).scalar_one_or_none()
+    if counter:
+        counter.counter += 1
+    else:
+        counter = DailyCounter(counter_date=today, counter=1)
+        session.add(counter)
+    await session.flush()
+    await session.commit()
+    order_number = f"{today.strftime('%Y%m%d')}-L{counter.counter:03d}"
+
+    subtotal = 0.0
+    order_items = []
+    for item in items:
+        product = (await session.execute(
+            select(Product).where(Product.id == item["product_id"])
+        )).scalar_one_or_none()
+        item_total = float(product.price) * item["quantity"]
+        subtotal += item_total
+        order_items.append(OrderItem(
+            product_id=product.id,
+            product_name=product.name,
+            product_price=float(product.price),
+            quantity=item["quantity"],
+            modifiers_price=0,
+            item_total=item_total,
+        ))
+
+    order = Order(
+        order_number=order_number,
+        user_id=user_id,
+        status=OrderStatus.NEW.value,
+        payment_method="cash",
+        payment_status=PaymentStatus.PENDING.value,
+        subtotal=subtotal,
+        delivery_fee=0,
+        discount_amount=0,
+        total=subtotal,
+        delivery_address="Benchmark street 1",
+        delivery_phone="+70000000000",
+        items=order_items,
+    )
+    session.add(order)
+    await session.flush()
+    await session.commit()
+    session.add(OrderStatusLog(order_id=order.id, new_status=OrderStatus.NEW.value, changed_by_id=user_id))
+    await session.commit()
+    return order
+
+
+async def seed(lines: int):
+    async with AsyncSessionLocal() as session:
+        user = User(telegram_id=-int(time.time()), first_name="bench", role=UserRole.CLIENT.value)
+        category = Category(name="Benchmark")
+        session.add_all([user, category])
+        await session.flush()
+        products = [
+            Product(name=f"Bench product {i}", price=100 + i, category_id=category.id)
+            for i in range(lines)
+        ]
+        session.add_all(products)
+        await session.commit()
+        return user.id, category.id, [p.id for p in products]
+
+
+async def cleanup(user_id: int, category_id: int, product_ids: list) -> None:
+    async with AsyncSessionLocal() as session:
+        order_ids = select(Order.id).where(Order.user_id == user_id)
+        await session.execute(delete(OrderStatusLog).where(OrderStatusLog.order_id.in_(order_ids)))
+        await session.execute(delete(OrderItem).where(OrderItem.order_id.in_(order_ids)))
+        await session.execute(delete(Order).where(Order.user_id == user_id))
+        await session.execute(delete(Product).where(Product.id.in_(product_ids)))
+        await session.execute(delete(Category).where(Category.id == category_id))
+        await session.execute(delete(User).where(User.id == user_id))
+        await session.commit()
+
+
+async def run(lines: int, orders: int) -> None:
+    if engine is None:
+        raise SystemExit("DATABASE_URL is not configured")
+    await init_db()
+    counter = RoundTripCounter()
+    counter.install(engine.sync_engine)
+
+    user_id, category_id, product_ids = await seed(lines)
+    items = [{"product_id": pid, "quantity": 1, "modifiers": []} for pid in product_ids]
+
+    async def measure(label, create):
+        counter.reset()
+        counter.enabled = True
+        started = time.perf_counter()
+        for _ in range(orders):
+            async with AsyncSessionLocal() as session:
+                await create(session)
+        elapsed = time.perf_counter() - started
+        counter.enabled = False
+        print(
+            f"{label:<8} statements/order={counter.statements / orders:6.1f} "
+            f"commits/order={counter.commits / orders:4.1f} "
+            f"round_trips/order={counter.total / orders:6.1f} "
+            f"ms/order={elapsed * 1000 / orders:7.2f}"
+        )
+
+    try:
+        await measure("legacy", lambda s: legacy_create_order(s, user_id, items))
+        await measure("batched", lambda s: OrderService(s).create_order(
+            user_id=user_id,
+            items=items,
+            delivery_address="Benchmark street 1",
+            delivery_phone="+70000000000",
+            payment_method="cash",
+        ))
+    finally:
+        await cleanup(user_id, category_id, product_ids)
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure round trips per order")
+    parser.add_argument("--lines", type=int, default=20, help="Cart lines per order")
+    parser.add_argument("--orders", type=int, default=50, help="Orders per scenario")
+    args = parser.parse_args()
+    asyncio.run(run(args.lines, args.orders))
+
+
+if __name__ == "__main__":
+    main()
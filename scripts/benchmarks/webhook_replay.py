@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""Benchmark: bot updates per second served by webhook replicas.
+
+Replays recorded Telegram updates against a webhook receiver (BOT_MODE=webhook)
+with as many parallel requests as Telegram would open (max_connections) and
+reports throughput and latency. Point --url at one replica's port to measure a
+single replica, or at nginx to measure the whole set.
+
+Start the measured replicas with WEBHOOK_HANDLE_IN_BACKGROUND=false: otherwise a
+replica answers before running the handlers and only request parsing is measured.
+Replies the handlers send go to the real Bot API, so record the updates from
+test accounts (chats that do not exist make the handlers fail, which shows up as
+HTTP 500 in the report).
+
+Updates are read from a JSON file holding a list of updates, a getUpdates
+response ({"ok": true, "result": [...]}) or one update per line. update_id is
+rewritten so every replay is new to the bot; --chats folds users onto that many
+chats to vary contention on the per-chat lock.
+
+Usage:
+    python scripts/benchmarks/webhook_replay.py --url http://localhost:8080/telegram/webhook \\
+        --updates updates.json --repeat 20 --concurrency 40
+    python scripts/benchmarks/webhook_replay.py --url http://localhost:8080/telegram/webhook \\
+        --synthetic 2000 --chats 50
+"""
+
+import argparse
+import asyncio
+import copy
+import json
+import statistics
+import time
+from collections import Counter
+
+import aiohttp
+
+from app.config import settings
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def load_updates(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        text = f.read().strip()
+    if text.startswith("{") and "\n{" in text:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    data = json.loads(text)
+    if isinstance(data, dict):
+        data = data.get("result", [data])
+    return data
+
+
+def synthetic_updates(count: int, chats: int) -> list:
+    """Text commands from `chats` private chats, round robin."""
+    texts = ["/start", "/menu", "/cart", "/orders"]
+    updates = []
+    for i in range(count):
+        user_id = 10_000_000 + i % chats
+        user = {"id": user_id, "is_bot": False, "first_name": "Bench", "language_code": "ru"}
+        updates.append({
+            "update_id": i,
+            "message": {
+                "message_id": i + 1,
+                "date": int(time.time()),
+                "chat": {"id": user_id, "type": "private", "first_name": "Bench"},
+                "from": user,
+                "text": texts[i % len(texts)],
+            },
+        })
+    return updates
+
+
+def prepare(updates: list, repeat: int, chats: int) -> list:
+    """Copies with fresh, increasing update_ids and (optionally) folded chats."""
+    first_id = int(time.time() * 1000)
+    prepared = []
+    for _ in range(repeat):
+        for update in updates:
+            update = copy.deepcopy(update)
+            update["update_id"] = first_id + len(prepared)
+            if chats:
+                fold_chat(update, chats)
+            prepared.append(update)
+    return prepared
+
+
+def fold_chat(update: dict, chats: int) -> None:
+    """Map the user and chat ids of the update onto `chats` ids."""
+    seen = set()
+    for event in update.values():
+        if not isinstance(event, dict):
+            continue
+        message = event.get("message") if isinstance(event.get("message"), dict) else {}
+        for obj in (event.get("from"), event.get("chat"), message.get("from"), message.get("chat")):
+            if isinstance(obj, dict) and "id" in obj and id(obj) not in seen:
+                seen.add(id(obj))
+                obj["id"] = 10_000_000 + obj["id"] % chats
+
+
+async def replay(url: str, secret: str, updates: list, concurrency: int) -> None:
+    queue: asyncio.Queue = asyncio.Queue()
+    for update in updates:
+        queue.put_nowait(update)
+    latencies = []
+    statuses = Counter()
+
+    async def worker(session):
+        while not queue.empty():
+            update = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                async with session.post(url, json=update, headers={SECRET_HEADER: secret}) as response:
+                    await response.read()
+                    statuses[response.status] += 1
+            except aiohttp.ClientError as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    print(f"updates={len(updates)} concurrency={concurrency} seconds={elapsed:.2f}")
+    print(f"updates/s={len(updates) / elapsed:8.1f}")
+    print(
+        f"latency ms: mean={statistics.mean(latencies) * 1000:7.2f} "
+        f"p50={percentile(0.5):7.2f} p95={percentile(0.95):7.2f} p99={percentile(0.99):7.2f}"
+    )
+    print("responses: " + ", ".join(f"{status}={count}" for status, count in sorted(statuses.items(), key=str)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay Telegram updates against the bot webhook")
+    parser.add_argument("--url", required=True, help="Webhook URL of one replica or of nginx")
+    parser.add_argument("--secret", default=settings.webhook_secret, help="Webhook secret token")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--updates", help="JSON file with recorded updates")
+    source.add_argument("--synthetic", type=int, help="Generate this many text commands instead")
+    parser.add_argument("--repeat", type=int, default=1, help="Times the recorded updates are replayed")
+    parser.add_argument("--chats", type=int, default=0, help="Fold users onto this many chats (0 keeps them)")
+    parser.add_argument("--concurrency", type=int, default=40, help="Parallel requests, like max_connections")
+    args = parser.parse_args()
+
+    if args.updates:
+        updates = prepare(load_updates(args.updates), args.repeat, args.chats)
+    else:
+        updates = prepare(synthetic_updates(args.synthetic, args.chats or 100), args.repeat, 0)
+    asyncio.run(replay(args.url, args.secret or "", updates, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
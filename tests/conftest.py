@@ -5,3 +5,14 @@ import os
 os.environ.setdefault("ADMIN_TELEGRAM_IDS", "[]")
 import os as _os
 _os.environ.setdefault("TESTING", "1")
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _reset_menu_cache():
+    """Keep the process-wide menu snapshot from leaking between tests."""
+    from app.services.menu_cache import menu_cache
+    menu_cache.invalidate_local()
+    yield
+    menu_cache.invalidate_local()
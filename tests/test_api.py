@@ -74,6 +74,11 @@ class TestOrdersEndpoints:
         response = client.get("/api/v1/orders/FAKE123/status")
         # Should return 422 (validation error) without phone parameter
         assert response.status_code in [404, 422, 503]
+    
+    def test_bulk_update_requires_auth(self, client):
+        """Test that bulk status update is routed and requires auth."""
+        response = client.patch("/api/v1/orders/bulk", json={"order_ids": [1, 2], "status": "ready"})
+        assert response.status_code in [401, 403]
 
 
 class TestSettingsEndpoints:
@@ -97,3 +97,74 @@ class TestArchiveVisibility:
         
         # Archived products should not be orderable
         assert archived_product.is_archived == True
+
+
+class _CascadeSession:
+    """Serves the root category, the CTE's descendant ids and UPDATE ... RETURNING ids."""
+
+    def __init__(self, root, descendant_ids, product_ids):
+        self.root = root
+        self.descendant_ids = descendant_ids
+        self.product_ids = product_ids
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, statement, params=None):
+        from types import SimpleNamespace
+
+        self.statements.append((statement, params))
+        if statement.is_insert:
+            values = []
+        elif statement.is_update:
+            table = statement.table.name
+            values = self.descendant_ids if table == "categories" else self.product_ids
+        elif len(self.statements) == 1:
+            root = self.root
+            return SimpleNamespace(scalar_one_or_none=lambda: root)
+        else:
+            values = self.descendant_ids
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: list(values)))
+
+    async def flush(self):
+        pass
+
+    async def commit(self):
+        self.commits += 1
+
+
+class TestSetBasedCascade:
+    """Cascades cost a fixed number of statements regardless of tree size."""
+
+    @pytest.mark.asyncio
+    async def test_archive_cascade_round_trips(self):
+        from sqlalchemy.dialects import postgresql
+        from app.models.category import Category
+
+        root = Category(id=1, name="Root", is_archived=False)
+        session = _CascadeSession(root, descendant_ids=list(range(2, 42)), product_ids=[7, 8])
+
+        await ArchiveService(session).archive_category(1, actor_user_id=5)
+
+        # root, descendants CTE, categories UPDATE, products UPDATE, audit INSERT
+        assert len(session.statements) == 5
+        cte_sql = str(session.statements[1][0].compile(dialect=postgresql.dialect()))
+        assert "WITH RECURSIVE" in cte_sql
+        audit_statement, audit_rows = session.statements[-1]
+        assert audit_statement.is_insert
+        assert len(audit_rows) == 1 + 40 + 2
+        assert {row["user_id"] for row in audit_rows} == {5}
+        assert root.is_archived is True
+        assert session.commits == 1
+
+    @pytest.mark.asyncio
+    async def test_unarchive_self_only_skips_cascade(self):
+        from app.models.category import Category
+
+        root = Category(id=1, name="Root", is_archived=True)
+        session = _CascadeSession(root, descendant_ids=[2], product_ids=[7])
+
+        await ArchiveService(session).unarchive_category(1, actor_user_id=5)
+
+        assert len(session.statements) == 2
+        assert len(session.statements[-1][1]) == 1
+        assert root.is_archived is False
@@ -0,0 +1,198 @@
+"""Tests for cart storage."""
+
+import asyncio
+import json
+import os
+
+import pytest
+
+from app.services.cart_service import CartItem, CartService
+from app.services.cart_store import MemoryCartStore, RedisCartStore, decode_line, get_memory_store, to_cents
+from app.utils.exceptions import ValidationException
+
+
+def _item(price=100.1, modifiers_price=0.2, quantity=1, name="Pizza"):
+    return CartItem(
+        product_id=1,
+        product_name=name,
+        product_price=price,
+        quantity=quantity,
+        modifiers=[],
+        modifiers_price=modifiers_price,
+        item_total=(price + modifiers_price) * quantity,
+    )
+
+
+class TestCartLines:
+    def test_line_totals_in_cents(self):
+        line = _item(price=0.1, modifiers_price=0.2, quantity=3).to_line()
+
+        assert line["unit_cents"] == 30
+        assert line["line_total_cents"] == 90
+        assert CartItem.from_line(line).item_total == 0.9
+
+    def test_to_cents_rounding(self):
+        assert to_cents(19.99) == 1999
+        assert to_cents(0.1 + 0.2) == 30
+
+    def test_decode_line_restores_empty_modifiers(self):
+        # cjson encodes an empty Lua table as an object
+        raw = json.dumps({"modifiers": {}, "quantity": 1, "line_total_cents": 100})
+        assert decode_line(raw)["modifiers"] == []
+
+
+def _service(store):
+    service = CartService(session=None)
+    service.store = store
+    return service
+
+
+class TestCartServiceOperations:
+    @pytest.mark.asyncio
+    async def test_update_quantity_and_summary(self):
+        store = MemoryCartStore()
+        await store.add_line(7, _item(price=150, modifiers_price=0).to_line())
+        await store.add_line(7, _item(price=99.9, modifiers_price=0.1).to_line())
+        service = _service(store)
+
+        item = await service.update_quantity(7, 1, 3)
+        summary = await service.get_cart_summary(7)
+
+        assert item.item_total == 300
+        assert summary["subtotal"] == 450
+        assert summary["total_items"] == 4
+        assert summary["item_count"] == 2
+
+    @pytest.mark.asyncio
+    async def test_invalid_index(self):
+        service = _service(MemoryCartStore())
+
+        with pytest.raises(ValidationException):
+            await service.remove_item(7, 0)
+        with pytest.raises(ValidationException):
+            await service.update_quantity(7, -1, 2)
+
+    @pytest.mark.asyncio
+    async def test_without_redis_uses_shared_memory_store(self):
+        service = CartService(session=None)
+        await service.save_cart(-7, [_item(price=10, modifiers_price=0)])
+
+        summary = await CartService(session=None).get_cart_summary(-7)
+        await service.clear_cart(-7)
+
+        assert service.store is get_memory_store()
+        assert summary["subtotal"] == 10
+        assert await service.get_cart(-7) == []
+
+
+class TestMemoryCartStore:
+    @pytest.mark.asyncio
+    async def test_totals_follow_line_changes(self):
+        store = MemoryCartStore()
+        for name in ("A", "B", "C"):
+            await store.add_line(1, _item(price=10, modifiers_price=0, name=name).to_line())
+
+        assert await store.remove_line(1, 1) is True
+        assert await store.remove_line(1, 5) is False
+        line = await store.set_quantity(1, 1, 4)
+        summary = await store.summary(1)
+
+        assert line["product_name"] == "C"
+        assert [l["product_name"] for l in summary["lines"]] == ["A", "C"]
+        assert summary["subtotal_cents"] == 1000 + 4000
+        assert summary["total_items"] == 5
+
+    @pytest.mark.asyncio
+    async def test_summary_is_a_copy(self):
+        store = MemoryCartStore()
+        await store.add_line(1, _item().to_line())
+
+        (await store.summary(1))["lines"][0]["quantity"] = 99
+
+        assert (await store.summary(1))["lines"][0]["quantity"] == 1
+
+    @pytest.mark.asyncio
+    async def test_least_recently_used_cart_is_evicted(self):
+        store = MemoryCartStore(max_users=2)
+        for user_id in (1, 2):
+            await store.add_line(user_id, _item().to_line())
+
+        await store.summary(1)
+        await store.add_line(3, _item().to_line())
+
+        assert len(store) == 2
+        assert (await store.summary(2))["lines"] == []
+        assert len((await store.summary(1))["lines"]) == 1
+
+    @pytest.mark.asyncio
+    async def test_cart_expires(self, monkeypatch):
+        clock = [1000.0]
+        monkeypatch.setattr("app.services.cart_store.time.monotonic", lambda: clock[0])
+        store = MemoryCartStore(ttl_seconds=60)
+        await store.add_line(1, _item().to_line())
+
+        clock[0] += 30
+        assert len((await store.summary(1))["lines"]) == 1
+        clock[0] += 61
+
+        assert (await store.summary(1))["lines"] == []
+        assert len(store) == 0
+
+
+TEST_REDIS_URL = os.getenv("TEST_REDIS_URL")
+
+
+@pytest.mark.skipif(not TEST_REDIS_URL, reason="TEST_REDIS_URL is not set")
+class TestRedisCartStore:
+    """Runs the Lua scripts against a real Redis server."""
+
+    @pytest.fixture
+    async def redis_client(self):
+        import redis.asyncio as aioredis
+
+        client = aioredis.from_url(TEST_REDIS_URL)
+        await client.delete("cart:-1")
+        yield client
+        await client.delete("cart:-1")
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_adds_are_not_lost(self, redis_client):
+        store = RedisCartStore(redis_client)
+
+        await asyncio.gather(*(
+            store.add_line(-1, _item(price=10, modifiers_price=0, name=f"P{i}").to_line())
+            for i in range(50)
+        ))
+        summary = await store.summary(-1)
+
+        assert len(summary["lines"]) == 50
+        assert summary["subtotal_cents"] == 50 * 1000
+        assert summary["total_items"] == 50
+
+    @pytest.mark.asyncio
+    async def test_remove_and_set_quantity(self, redis_client):
+        store = RedisCartStore(redis_client)
+        for name in ("A", "B", "C"):
+            await store.add_line(-1, _item(price=10, modifiers_price=0, name=name).to_line())
+
+        assert await store.remove_line(-1, 1) is True
+        assert await store.remove_line(-1, 5) is False
+        line = await store.set_quantity(-1, 1, 4)
+        summary = await store.summary(-1)
+
+        assert line["product_name"] == "C" and line["modifiers"] == []
+        assert [l["product_name"] for l in summary["lines"]] == ["A", "C"]
+        assert summary["subtotal_cents"] == 1000 + 4000
+
+    @pytest.mark.asyncio
+    async def test_legacy_json_cart_is_migrated(self, redis_client):
+        legacy = [_item(price=100, modifiers_price=20, quantity=2).to_dict()]
+        await redis_client.set("cart:-1", json.dumps(legacy), ex=3600)
+        store = RedisCartStore(redis_client)
+
+        summary = await store.summary(-1)
+
+        assert await redis_client.type("cart:-1") == b"hash"
+        assert summary["subtotal_cents"] == 24000
+        assert CartItem.from_line(summary["lines"][0]).quantity == 2
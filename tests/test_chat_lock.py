@@ -0,0 +1,107 @@
+"""Tests for per-chat ordering of bot updates."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.middlewares.ordering import ChatOrderingMiddleware
+from app.services.chat_lock import ChatLock
+
+
+class TestLocalChatLock:
+    @pytest.mark.asyncio
+    async def test_same_chat_runs_in_arrival_order(self):
+        lock = ChatLock(ttl_seconds=5, wait_seconds=5)
+        events = []
+
+        async def process(chat_id, update_id, delay):
+            async with lock.hold(chat_id, update_id):
+                events.append(("start", update_id))
+                await asyncio.sleep(delay)
+                events.append(("end", update_id))
+
+        await asyncio.gather(process(1, 1, 0.02), process(1, 2, 0), process(2, 3, 0))
+
+        # Chat 2 is not held up by chat 1; chat 1 never overlaps
+        assert events.index(("start", 3)) < events.index(("end", 1))
+        assert events.index(("end", 1)) < events.index(("start", 2))
+        assert lock._local == {}
+
+
+class _ScriptRedis:
+    """Acquire answers come from a list; every call is recorded."""
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.calls = []
+
+    def register_script(self, script):
+        async def run(keys, args):
+            self.calls.append((keys, args))
+            if "SET" in script:
+                return self.answers.pop(0)
+            return 1
+        return run
+
+
+class TestRedisChatLock:
+    @pytest.mark.asyncio
+    async def test_polls_until_acquired_then_releases(self):
+        redis = _ScriptRedis([0, 0, 1])
+        lock = ChatLock(redis, ttl_seconds=5, wait_seconds=5)
+
+        async with lock.hold(42, 1001):
+            pass
+
+        keys = ["chat:{42}:queue", "chat:{42}:lock", "chat:{42}:deadlines"]
+        assert [call[0] for call in redis.calls] == [keys] * 4
+        assert redis.calls[0][1][:3] == ["1001", 5000, 5000]
+        # Release passes the token the lock was taken with
+        assert redis.calls[-1][1] == ["1001", redis.calls[0][1][3]]
+
+    @pytest.mark.asyncio
+    async def test_gives_up_waiting_but_processes(self):
+        redis = _ScriptRedis([0] * 100)
+        lock = ChatLock(redis, ttl_seconds=5, wait_seconds=0.05)
+        processed = []
+
+        async with lock.hold(42, 1001):
+            processed.append(1001)
+
+        assert processed == [1001]
+
+    @pytest.mark.asyncio
+    async def test_falls_back_when_redis_fails(self):
+        class _BrokenRedis:
+            def register_script(self, script):
+                async def run(keys, args):
+                    raise ConnectionError("down")
+                return run
+
+        lock = ChatLock(_BrokenRedis(), ttl_seconds=5, wait_seconds=5)
+
+        async with lock.hold(42, 1001):
+            assert 42 in lock._local
+
+
+class TestChatOrderingMiddleware:
+    @pytest.mark.asyncio
+    async def test_locks_chat_or_user(self):
+        held = []
+
+        class _Lock:
+            def hold(self, chat_id, update_id):
+                held.append((chat_id, update_id))
+                return ChatLock(ttl_seconds=5, wait_seconds=5).hold(chat_id, update_id)
+
+        middleware = ChatOrderingMiddleware(_Lock())
+
+        async def handler(event, data):
+            return "ok"
+
+        update = SimpleNamespace(update_id=7)
+        assert await middleware(handler, update, {"event_chat": SimpleNamespace(id=5)}) == "ok"
+        assert await middleware(handler, update, {"event_from_user": SimpleNamespace(id=6)}) == "ok"
+        assert await middleware(handler, update, {}) == "ok"
+        assert held == [(5, 7), (6, 7)]
@@ -0,0 +1,94 @@
+"""Tests for the lazy database session middleware."""
+
+import pytest
+
+from app.middlewares.db import DBSessionMiddleware, DBSessionStats, LazySession
+
+
+class _FakeSession:
+    def __init__(self):
+        self.executed = 0
+        self.closed = False
+
+    async def execute(self, statement):
+        self.executed += 1
+
+    def add(self, obj):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+
+class _Factory:
+    def __init__(self):
+        self.sessions = []
+
+    def __call__(self):
+        session = _FakeSession()
+        self.sessions.append(session)
+        return session
+
+
+class TestLazySession:
+    @pytest.mark.asyncio
+    async def test_opened_on_first_use(self):
+        factory = _Factory()
+        session = LazySession(factory)
+
+        assert not session.opened
+        await session.execute("SELECT 1")
+        await session.execute("SELECT 1")
+        await session.close()
+
+        assert len(factory.sessions) == 1
+        assert factory.sessions[0].executed == 2
+        assert factory.sessions[0].closed
+
+
+    @pytest.mark.asyncio
+    async def test_counted_on_first_query(self):
+        stats = DBSessionStats()
+        session = LazySession(_Factory(), stats)
+
+        session.add(object())
+        assert stats.sessions_opened == 0
+        await session.execute("SELECT 1")
+        await session.execute("SELECT 1")
+
+        assert stats.sessions_opened == 1
+
+
+class TestDBSessionMiddleware:
+    @pytest.mark.asyncio
+    async def test_unused_session_is_never_opened(self):
+        factory = _Factory()
+        stats = DBSessionStats()
+        middleware = DBSessionMiddleware(factory, stats)
+
+        async def static_handler(event, data):
+            return "help"
+
+        async def db_handler(event, data):
+            await data["session"].execute("SELECT 1")
+
+        await middleware(static_handler, object(), {})
+        await middleware(db_handler, object(), {})
+
+        assert len(factory.sessions) == 1
+        assert factory.sessions[0].closed
+        assert stats.as_dict() == {"updates": 2, "sessions_opened": 1, "opted_out": 0, "db_ratio": 0.5}
+
+    @pytest.mark.asyncio
+    async def test_handler_opt_out(self):
+        stats = DBSessionStats()
+        middleware = DBSessionMiddleware(_Factory(), stats)
+
+        class _Handler:
+            flags = {"db": False}
+
+        async def handler(event, data):
+            return "session" in data
+
+        assert await middleware(handler, object(), {"handler": _Handler()}) is False
+        assert stats.opted_out == 1
@@ -0,0 +1,94 @@
+"""Tests for the streaming order export."""
+
+import csv
+import io
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.services.export_service import CSV, PARQUET, OrderExportService
+
+
+def _row(order_id):
+    return (
+        order_id, f"20240315-{order_id:04d}", datetime(2024, 3, 15, 12, 30), "DELIVERED", "cash", "paid",
+        Decimal("500.00"), Decimal("0.00"), Decimal("0.00"), Decimal("500.00"),
+        7, "Pizza", Decimal("500.00"), 1, Decimal("0.00"), Decimal("500.00"),
+    )
+
+
+class _StreamResult:
+    def __init__(self, rows):
+        self.rows = rows
+        self.closed = False
+        self.partition_sizes = []
+
+    async def partitions(self, size):
+        self.partition_sizes.append(size)
+        for i in range(0, len(self.rows), size):
+            yield self.rows[i:i + size]
+
+    async def close(self):
+        self.closed = True
+
+
+class _StreamingSession:
+    def __init__(self, rows):
+        self.result = _StreamResult(rows)
+        self.statements = []
+
+    async def stream(self, statement):
+        self.statements.append(statement)
+        return self.result
+
+    async def execute(self, *args, **kwargs):
+        raise AssertionError("export must not buffer results with execute()")
+
+
+async def _collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+class TestOrderExport:
+    def test_statement_streams_sargable_range(self):
+        statement = OrderExportService(None, batch_size=100).statement(date(2024, 3, 1), date(2024, 3, 31))
+
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+        assert statement.get_execution_options()["yield_per"] == 100
+        assert "orders.created_at >=" in sql and "orders.created_at <" in sql
+        assert "JOIN order_items" in sql
+
+    @pytest.mark.asyncio
+    async def test_csv_is_chunked_per_batch(self):
+        session = _StreamingSession([_row(i) for i in range(1, 6)])
+        service = OrderExportService(session, batch_size=2)
+
+        chunks = await _collect(service.iter_export(date(2024, 3, 15), date(2024, 3, 15), CSV))
+
+        # Header, then one chunk per partition of two rows
+        assert len(chunks) == 4
+        assert session.result.partition_sizes == [2]
+        assert session.result.closed
+        rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+        assert rows[0] == service.header
+        assert len(rows) == 6
+        assert rows[1][1] == "20240315-0001" and rows[1][-1] == "500.00"
+
+    @pytest.mark.asyncio
+    async def test_parquet_round_trip(self):
+        pq = pytest.importorskip("pyarrow.parquet")
+        session = _StreamingSession([_row(i) for i in range(1, 6)])
+        service = OrderExportService(session, batch_size=2)
+
+        data = b"".join(await _collect(service.iter_export(date(2024, 3, 15), date(2024, 3, 15), PARQUET)))
+
+        table = pq.read_table(io.BytesIO(data))
+        assert table.num_rows == 5
+        assert table.column_names == service.header
+        assert pq.ParquetFile(io.BytesIO(data)).num_row_groups == 3
+
+    def test_unknown_format(self):
+        with pytest.raises(ValueError):
+            OrderExportService(None).iter_export(date(2024, 3, 15), date(2024, 3, 15), "xlsx")
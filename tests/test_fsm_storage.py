@@ -0,0 +1,55 @@
+"""Tests for the bot dialog (FSM) storage."""
+
+import json
+
+import pytest
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from app.services.fsm_storage import FallbackStorage, create_fsm_storage, dumps
+from app.states.client import ClientStates
+
+KEY = StorageKey(bot_id=1, chat_id=10, user_id=10)
+
+
+class _BrokenStorage(MemoryStorage):
+    async def get_state(self, key):
+        raise ConnectionError("down")
+
+    async def set_state(self, key, state=None):
+        raise ConnectionError("down")
+
+
+def test_compact_serialization():
+    data = {"phone": "+79990000000", "address": "ул. Ленина, 1"}
+
+    raw = dumps(data)
+
+    assert raw == '{"phone":"+79990000000","address":"ул. Ленина, 1"}'
+    assert len(raw.encode()) < len(json.dumps(data).encode())
+
+
+def test_memory_storage_without_redis():
+    assert isinstance(create_fsm_storage(None), MemoryStorage)
+
+
+class TestFallbackStorage:
+    @pytest.mark.asyncio
+    async def test_uses_primary(self):
+        primary = MemoryStorage()
+        storage = FallbackStorage(primary)
+
+        await storage.set_state(KEY, ClientStates.checkout_entering_phone)
+        await storage.update_data(KEY, {"phone": "+79990000000"})
+
+        assert await primary.get_state(KEY) == ClientStates.checkout_entering_phone.state
+        assert await storage.get_data(KEY) == {"phone": "+79990000000"}
+
+    @pytest.mark.asyncio
+    async def test_falls_back_when_primary_fails(self):
+        storage = FallbackStorage(_BrokenStorage())
+
+        await storage.set_state(KEY, ClientStates.checkout_entering_address)
+
+        assert await storage.get_state(KEY) == ClientStates.checkout_entering_address.state
+        assert await storage.fallback.get_state(KEY) == ClientStates.checkout_entering_address.state
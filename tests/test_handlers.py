@@ -21,3 +21,116 @@ class TestHandlers:
         routers = get_all_routers()
         for router in routers:
             assert isinstance(router, Router)
+
+
+class _Callback:
+    def __init__(self, data):
+        self.data = data
+        self.answers = []
+        self.edits = []
+        self.message = self
+
+    async def answer(self, text=None, **kwargs):
+        self.answers.append(text)
+
+    async def edit_text(self, text, reply_markup=None, **kwargs):
+        self.edits.append((text, reply_markup))
+
+
+class TestAddToCart:
+    """Products with required modifiers ask for an option before adding."""
+
+    @pytest.fixture
+    def added(self, monkeypatch):
+        from decimal import Decimal
+        from types import SimpleNamespace
+
+        from app.handlers import client
+        from app.services.menu_cache import ModifierOptionView, ModifierView
+
+        size = ModifierView(
+            id=5, name="Размер", description=None, is_required=True, is_multiple=False, sort_order=0,
+            options=(
+                ModifierOptionView(id=50, modifier_id=5, name="M", price_adjustment=Decimal("0"), sort_order=0),
+                ModifierOptionView(id=51, modifier_id=5, name="L", price_adjustment=Decimal("100"), sort_order=1),
+            )
+        )
+        added = []
+
+        class _MenuService:
+            def __init__(self, session):
+                pass
+
+            async def get_menu_product_modifiers(self, product_id):
+                return [size]
+
+            async def get_menu_product(self, product_id):
+                return SimpleNamespace(id=product_id, name="Маргарита")
+
+        class _CartService:
+            def __init__(self, session, redis=None):
+                pass
+
+            async def add_item(self, user_id, product_id, modifier_option_ids=None):
+                added.append((product_id, modifier_option_ids))
+
+        monkeypatch.setattr(client, "MenuService", _MenuService)
+        monkeypatch.setattr(client, "CartService", _CartService)
+        return added
+
+    @staticmethod
+    def _state():
+        from aiogram.fsm.context import FSMContext
+        from aiogram.fsm.storage.base import StorageKey
+        from aiogram.fsm.storage.memory import MemoryStorage
+
+        return FSMContext(storage=MemoryStorage(), key=StorageKey(bot_id=1, chat_id=1, user_id=1))
+
+    @pytest.mark.asyncio
+    async def test_asks_for_required_modifier(self, added):
+        from types import SimpleNamespace
+
+        from app.handlers.client import add_to_cart
+
+        callback = _Callback("add_to_cart:10")
+        await add_to_cart(callback, self._state(), session=None, user=SimpleNamespace(id=1))
+
+        assert added == []
+        text, markup = callback.edits[0]
+        assert "Выберите: Размер" in text
+        buttons = [row[0] for row in markup.inline_keyboard]
+        assert [b.callback_data for b in buttons[:2]] == ["modifier_option:10:50", "modifier_option:10:51"]
+        assert buttons[1].text == "L (+100 ₽)"
+
+    @pytest.mark.asyncio
+    async def test_adds_with_chosen_option(self, added):
+        from types import SimpleNamespace
+
+        from app.handlers.client import add_to_cart, choose_modifier_option
+
+        state = self._state()
+        await add_to_cart(_Callback("add_to_cart:10"), state, session=None, user=SimpleNamespace(id=1))
+        callback = _Callback("modifier_option:10:51")
+        await choose_modifier_option(callback, state, session=None, user=SimpleNamespace(id=1))
+
+        assert added == [(10, [51])]
+        assert callback.answers == ["✅ Добавлено в корзину!"]
+        assert (await state.get_data())["modifier_selection"] is None
+
+    def test_callback_data_fits_telegram_limit(self):
+        from types import SimpleNamespace
+
+        from app.keyboards.client import get_modifier_options_keyboard
+        from app.services.menu_cache import ModifierOptionView, ModifierView
+
+        modifier = ModifierView(
+            id=5, name="Размер", description=None, is_required=True, is_multiple=False, sort_order=0,
+            options=(
+                ModifierOptionView(
+                    id=2**31 - 1, modifier_id=5, name="XL", price_adjustment=0, sort_order=0
+                ),
+            )
+        )
+        markup = get_modifier_options_keyboard(SimpleNamespace(id=2**31 - 1), modifier)
+
+        assert len(markup.inline_keyboard[0][0].callback_data.encode()) <= 64
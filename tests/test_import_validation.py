@@ -1,8 +1,11 @@
 """Tests for import validation."""
 
+import json
+from types import SimpleNamespace
+
 import pytest
 
-from app.services.import_service import ImportService
+from app.services.import_service import ImportService, iter_csv_records
 
 
 class TestImportValidation:
@@ -41,3 +44,167 @@ class TestImportService:
     def test_import_service_exists(self):
         """Test that ImportService class exists."""
         assert ImportService is not None
+
+
+class _Nested:
+    def __init__(self, session):
+        self.session = session
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def rollback(self):
+        self.session.rollbacks += 1
+
+
+class _ImportSession:
+    """Records statements; inserts hand out sequential ids, selects return existing ids."""
+
+    def __init__(self, existing_ids=()):
+        self.existing_ids = list(existing_ids)
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.next_id = 100
+
+    def begin_nested(self):
+        return _Nested(self)
+
+    async def scalars(self, statement, rows=None):
+        self.statements.append((statement, rows))
+        ids = list(range(self.next_id, self.next_id + len(rows)))
+        self.next_id += len(rows)
+        return SimpleNamespace(all=lambda: ids)
+
+    async def execute(self, statement, rows=None):
+        self.statements.append((statement, rows))
+        existing = self.existing_ids
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: existing))
+
+    async def commit(self):
+        self.commits += 1
+
+
+CSV_HEADER = "name,price,category_id,sort_order,stock_quantity\n"
+
+
+class TestBulkImport:
+    """Imports parse first and write set-based, a few statements per table."""
+
+    @pytest.mark.asyncio
+    async def test_csv_products_inserted_in_one_statement(self):
+        session = _ImportSession(existing_ids=[1])
+        content = CSV_HEADER + "".join(f"Product {i},100,1,{i},\n" for i in range(500))
+
+        result = await ImportService(session).import_products_from_csv(content, actor_user_id=1)
+
+        assert result == {"success": True, "imported": 500, "errors": []}
+        # Category id lookup + one bulk INSERT ... RETURNING
+        assert len(session.statements) == 2
+        statement, rows = session.statements[1]
+        assert statement.is_insert and len(rows) == 500
+        assert rows[3]["sort_order"] == 3 and rows[3]["stock_quantity"] is None
+        assert session.commits == 1
+
+    @pytest.mark.asyncio
+    async def test_parse_errors_are_reported_per_row_without_writes(self):
+        session = _ImportSession(existing_ids=[1])
+        content = CSV_HEADER + "Good,100,1,0,\n,100,1,0,\nBad price,abc,1,0,\n"
+
+        result = await ImportService(session).import_products_from_csv(content, actor_user_id=1)
+
+        assert result["success"] is False and result["imported"] == 0
+        assert result["errors"] == ["Row 2: Product name is required", "Row 3: Invalid price: abc"]
+        assert session.statements == [] and session.commits == 0
+
+    @pytest.mark.asyncio
+    async def test_unknown_references_roll_back(self):
+        session = _ImportSession(existing_ids=[1])
+        data = {"products": [
+            {"name": "Pizza", "price": 500, "category_id": 1},
+            {"name": "Soup", "price": 300, "category_id": 2},
+        ]}
+
+        result = await ImportService(session).import_menu_full(data, actor_user_id=1)
+
+        assert result["success"] is False
+        assert result["stats"]["products"]["errors"] == ["Product 2: Unknown category_id: 2"]
+        assert result["stats"]["products"]["imported"] == 0
+        assert session.rollbacks == 1 and session.commits == 0
+
+    @pytest.mark.asyncio
+    async def test_categories_inserted_level_by_level(self):
+        session = _ImportSession()
+        payload = json.dumps([
+            {"name": "Food", "children": [{"name": "Pizza"}, {"name": "Soup"}]},
+            {"name": "Drinks", "children": [{"name": "Cola"}]},
+        ])
+
+        result = await ImportService(session).import_categories_from_json(payload, actor_user_id=1)
+
+        assert result["success"] is True and result["imported"] == 2
+        assert len(session.statements) == 2
+        (_, roots), (_, children) = session.statements
+        assert [row["parent_id"] for row in roots] == [None, None]
+        # Roots got ids 100 and 101
+        assert [(row["name"], row["parent_id"]) for row in children] == [
+            ("Pizza", 100), ("Soup", 100), ("Cola", 101)
+        ]
+
+
+async def _chunks(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+class TestStreamingImport:
+    """Streaming CSV imports parse incrementally and write batch by batch."""
+
+    @pytest.mark.asyncio
+    async def test_records_split_across_chunks(self):
+        data = 'name,description\n"Pizza","Thin, crispy\nand hot"\nSoup,Пряный\n'.encode()
+
+        records = [r async for r in iter_csv_records(_chunks(data, 5))]
+
+        assert records == [
+            ["name", "description"],
+            ["Pizza", "Thin, crispy\nand hot"],
+            ["Soup", "Пряный"],
+        ]
+
+    @pytest.mark.asyncio
+    async def test_batches_and_progress(self):
+        session = _ImportSession(existing_ids=[1])
+        content = (CSV_HEADER + "".join(f"Product {i},100,1,0,\n" for i in range(25))).encode()
+        reported = []
+
+        async def on_progress(progress):
+            reported.append((progress.rows, progress.done))
+
+        progress = await ImportService(session).import_products_from_stream(
+            _chunks(content, 64), actor_user_id=1, batch_size=10, on_progress=on_progress
+        )
+
+        assert progress.success and progress.imported == 25
+        inserts = [rows for statement, rows in session.statements if statement.is_insert]
+        assert [len(rows) for rows in inserts] == [10, 10, 5]
+        assert reported == [(10, False), (20, False), (25, True)]
+        assert session.commits == 1
+
+    @pytest.mark.asyncio
+    async def test_dry_run_validates_without_writing(self):
+        session = _ImportSession(existing_ids=[1])
+        content = (CSV_HEADER + "Pizza,500,1,0,\nSoup,300,2,0,\n").encode()
+
+        progress = await ImportService(session).import_products_from_stream(
+            _chunks(content, 1024), actor_user_id=1, dry_run=True
+        )
+
+        assert not progress.success and progress.imported == 0
+        assert progress.valid == 1
+        assert progress.errors == ["Row 2: Unknown category_id: 2"]
+        assert not any(statement.is_insert for statement, _ in session.statements)
+        assert session.commits == 0 and session.rollbacks == 1
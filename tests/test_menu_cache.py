@@ -0,0 +1,270 @@
+"""Tests for the process-wide menu snapshot cache."""
+
+from datetime import datetime
+
+import pytest
+
+from app.models.category import Category
+from app.models.modifier import Modifier, ModifierOption, ProductModifier
+from app.models.product import Product
+from app.services.menu_cache import MENU_CHANNEL, MENU_VERSION_KEY, MenuCache, menu_cache
+from app.services.menu_service import MenuService
+from app.utils.exceptions import ValidationException
+
+CREATED = datetime(2024, 1, 1)
+
+
+class _FakeScalars:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return list(self._rows)
+
+
+class _FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def scalars(self):
+        return _FakeScalars(self._rows)
+
+    def scalar_one_or_none(self):
+        return self._rows[0] if self._rows else None
+
+
+class _MenuSession:
+    """Serves menu rows per selected entity and counts queries."""
+
+    def __init__(self, rows_by_entity):
+        self.rows_by_entity = rows_by_entity
+        self.queries = 0
+
+    async def execute(self, statement, *args, **kwargs):
+        self.queries += 1
+        entity = statement.column_descriptions[0].get("entity")
+        return _FakeResult(self.rows_by_entity.get(entity, []))
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.published = []
+
+    async def incr(self, key):
+        self.values[key] = self.values.get(key, 0) + 1
+        return self.values[key]
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+def _menu_rows():
+    categories = [
+        Category(id=1, name="Pizza", sort_order=2, parent_id=None, level=1, is_active=True, is_archived=False, created_at=CREATED),
+        Category(id=2, name="Drinks", sort_order=1, parent_id=None, level=1, is_active=True, is_archived=False, created_at=CREATED),
+        Category(id=3, name="Hot", sort_order=0, parent_id=2, level=2, is_active=True, is_archived=False, created_at=CREATED),
+    ]
+    products = [
+        Product(id=10, name="Margherita", price=500, category_id=1, sort_order=1, track_stock=False, created_at=CREATED),
+        Product(id=11, name="Diavola", price=600, category_id=1, sort_order=0, track_stock=False, created_at=CREATED),
+        Product(id=12, name="Tea", price=100, category_id=3, sort_order=0, track_stock=False, created_at=CREATED),
+        # Category 99 is hidden, so the product is not available for clients
+        Product(id=13, name="Orphan", price=1, category_id=99, sort_order=0, track_stock=False, created_at=CREATED),
+    ]
+    modifiers = [Modifier(id=5, name="Size", is_required=True, is_multiple=False, sort_order=0)]
+    options = [
+        ModifierOption(id=51, modifier_id=5, name="L", price_adjustment=100, sort_order=1),
+        ModifierOption(id=50, modifier_id=5, name="M", price_adjustment=0, sort_order=0),
+    ]
+    links = [ProductModifier(product_id=10, modifier_id=5, sort_order=0)]
+    return {
+        Category: categories,
+        Product: products,
+        Modifier: modifiers,
+        ModifierOption: options,
+        ProductModifier: links,
+    }
+
+
+class TestMenuSnapshot:
+    @pytest.mark.asyncio
+    async def test_indexes(self):
+        snapshot = await MenuCache(ttl_seconds=0).get(_MenuSession(_menu_rows()))
+
+        assert [c.name for c in snapshot.get_children(None)] == ["Drinks", "Pizza"]
+        assert [c.id for c in snapshot.get_children(2)] == [3]
+        assert [p.name for p in snapshot.get_products(1)] == ["Diavola", "Margherita"]
+        assert 13 not in [p.id for p in snapshot.available_products]
+        assert 13 not in snapshot.products
+        modifiers = snapshot.get_product_modifiers(10)
+        assert [o.name for o in modifiers[0].options] == ["M", "L"]
+
+    @pytest.mark.asyncio
+    async def test_snapshot_is_immutable(self):
+        snapshot = await MenuCache(ttl_seconds=0).get(_MenuSession(_menu_rows()))
+
+        with pytest.raises(TypeError):
+            snapshot.products[99] = None
+        with pytest.raises(AttributeError):
+            snapshot.products[10].price = 0
+
+
+class TestMenuCache:
+    @pytest.mark.asyncio
+    async def test_built_once_until_invalidated(self):
+        cache = MenuCache(ttl_seconds=0)
+        session = _MenuSession(_menu_rows())
+
+        first = await cache.get(session)
+        queries = session.queries
+        assert await cache.get(session) is first
+        assert session.queries == queries
+
+        await cache.invalidate()
+        assert await cache.get(session) is not first
+        assert session.queries == queries * 2
+
+    @pytest.mark.asyncio
+    async def test_snapshot_built_during_write_is_not_kept(self):
+        cache = MenuCache(ttl_seconds=0)
+
+        class _RacingSession(_MenuSession):
+            async def execute(self, statement, *args, **kwargs):
+                # A write lands while the snapshot is being built
+                if self.queries == 0:
+                    cache.invalidate_local()
+                return await super().execute(statement, *args, **kwargs)
+
+        await cache.get(_RacingSession(_menu_rows()))
+        assert cache.peek() is None
+
+    @pytest.mark.asyncio
+    async def test_invalidate_bumps_shared_version(self):
+        cache = MenuCache(ttl_seconds=0)
+        redis = _FakeRedis()
+        cache._redis = redis
+
+        await cache.invalidate()
+
+        assert redis.values[MENU_VERSION_KEY] == 1
+        assert redis.published == [(MENU_CHANNEL, 1)]
+        snapshot = await cache.get(_MenuSession(_menu_rows()))
+        assert snapshot.version == 1
+
+    @pytest.mark.asyncio
+    async def test_rebuilt_from_primary_when_reading_replica(self, monkeypatch):
+        from app import database
+
+        primary_engine, replica_engine = object(), object()
+        primary = _MenuSession(_menu_rows())
+        replica = _MenuSession({})
+        replica.bind = replica_engine
+
+        class _PrimaryFactory:
+            async def __aenter__(self):
+                return primary
+
+            async def __aexit__(self, *exc):
+                return False
+
+        monkeypatch.setattr(database, "engine", primary_engine)
+        monkeypatch.setattr(database, "read_engine", replica_engine)
+        monkeypatch.setattr(database, "AsyncSessionLocal", _PrimaryFactory)
+
+        snapshot = await MenuCache(ttl_seconds=0).get(replica)
+
+        assert replica.queries == 0
+        assert primary.queries > 0
+        assert 10 in snapshot.products
+
+    @pytest.mark.asyncio
+    async def test_remote_version_drops_older_snapshot(self):
+        cache = MenuCache(ttl_seconds=0)
+        cache._redis = _FakeRedis()
+        await cache.get(_MenuSession(_menu_rows()))
+
+        cache._on_version(0)
+        assert cache.peek() is not None
+        cache._on_version(1)
+        assert cache.peek() is None
+
+
+class TestMenuServiceReads:
+    @pytest.mark.asyncio
+    async def test_client_reads_use_snapshot(self):
+        session = _MenuSession(_menu_rows())
+        service = MenuService(session)
+
+        await service.get_category_tree()
+        queries = session.queries
+        categories = await service.get_category_tree(parent_id=2)
+        products = await service.get_products_by_category(1)
+
+        assert session.queries == queries
+        assert [c.id for c in categories] == [3]
+        assert [p.id for p in products] == [11, 10]
+        assert (await service.get_menu_product(12)).name == "Tea"
+
+    @pytest.mark.asyncio
+    async def test_admin_reads_bypass_snapshot(self):
+        session = _MenuSession(_menu_rows())
+
+        await MenuService(session).get_category_tree(include_inactive=True)
+
+        assert session.queries == 1
+        assert menu_cache.peek() is None
+
+    @pytest.mark.asyncio
+    async def test_resolve_options_from_warm_snapshot(self):
+        session = _MenuSession(_menu_rows())
+        service = MenuService(session)
+        await service.get_category_tree()
+        queries = session.queries
+
+        product, options = await service.resolve_product_options(10, [51])
+
+        assert session.queries == queries
+        assert product.name == "Margherita"
+        assert [o.name for o in options] == ["L"]
+
+    @pytest.mark.asyncio
+    async def test_resolve_options_validates_selection(self):
+        service = MenuService(_MenuSession(_menu_rows()))
+        await service.get_category_tree()
+
+        with pytest.raises(ValidationException):
+            await service.resolve_product_options(10, [])
+        with pytest.raises(ValidationException):
+            await service.resolve_product_options(10, [50, 51])
+        with pytest.raises(ValidationException):
+            await service.resolve_product_options(11, [50])
+
+
+class TestMenuServiceWrites:
+    @pytest.mark.asyncio
+    async def test_remove_modifier_invalidates_after_commit(self, monkeypatch):
+        calls = []
+        link = ProductModifier(product_id=10, modifier_id=5, sort_order=0)
+
+        class _WriteSession(_MenuSession):
+            async def delete(self, obj):
+                calls.append("delete")
+
+            async def flush(self):
+                calls.append("flush")
+
+            async def commit(self):
+                calls.append("commit")
+
+        async def invalidate():
+            calls.append("invalidate")
+
+        monkeypatch.setattr(menu_cache, "invalidate", invalidate)
+
+        await MenuService(_WriteSession({ProductModifier: [link]})).remove_modifier_from_product(10, 5)
+
+        assert calls == ["delete", "flush", "commit", "invalidate"]
@@ -0,0 +1,63 @@
+"""Tests for conditional GET on menu endpoints."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.v1.dependencies import get_db_session
+from app.main import app
+from app.services.menu_cache import menu_cache
+
+
+class _NoDatabaseSession:
+    async def execute(self, *args, **kwargs):
+        raise AssertionError("database must not be queried")
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+    app.dependency_overrides.clear()
+
+
+def _warm(client, url):
+    """First request builds the snapshot, second one gets the ETag."""
+    client.get(url)
+    response = client.get(url)
+    assert response.status_code == 200
+    return response
+
+
+class TestMenuEtag:
+    def test_etag_and_cache_control(self, client):
+        response = _warm(client, "/api/v1/menu/categories")
+
+        assert response.headers["ETag"].startswith('"menu-')
+        assert "max-age" in response.headers["Cache-Control"]
+
+    def test_if_none_match_returns_304_without_database(self, client):
+        etag = _warm(client, "/api/v1/menu/products?limit=5").headers["ETag"]
+
+        async def no_db():
+            yield _NoDatabaseSession()
+
+        app.dependency_overrides[get_db_session] = no_db
+        response = client.get("/api/v1/menu/products?limit=5", headers={"If-None-Match": etag})
+
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+
+    def test_etag_depends_on_query(self, client):
+        first = _warm(client, "/api/v1/menu/products?limit=5").headers["ETag"]
+        second = client.get("/api/v1/menu/products?limit=6").headers["ETag"]
+
+        assert first != second
+
+    def test_menu_write_changes_etag(self, client):
+        etag = _warm(client, "/api/v1/menu/categories").headers["ETag"]
+
+        menu_cache.invalidate_local()
+        response = client.get("/api/v1/menu/categories", headers={"If-None-Match": etag})
+
+        assert response.status_code == 200
+        assert response.headers.get("ETag") != etag
@@ -0,0 +1,122 @@
+"""Tests for SQL-side product pagination."""
+
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+from app.main import app
+from app.models.product import Product
+from app.services.menu_service import MenuService, _decode_cursor, _encode_cursor
+from app.utils.exceptions import NotFoundException, ValidationException
+
+CREATED = datetime(2024, 1, 1)
+
+
+class _Row:
+    def __init__(self, **values):
+        self._mapping = values
+
+
+class _Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return list(self._rows)
+
+
+class _PageSession:
+    """Returns preset rows and records the SQL of each statement."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.sql = []
+
+    async def execute(self, statement, *args, **kwargs):
+        compiled = statement.compile(dialect=postgresql.dialect())
+        self.sql.append((str(compiled), compiled.params))
+        return _Result(self.rows)
+
+
+def _products(count):
+    return [
+        Product(id=i, name=f"Product {i}", price=100, category_id=1, sort_order=0, created_at=CREATED)
+        for i in range(1, count + 1)
+    ]
+
+
+class TestCursor:
+    def test_round_trip(self):
+        cursor = _encode_cursor(3, "Пицца", 42)
+        assert _decode_cursor(cursor) == (3, "Пицца", 42)
+
+    def test_invalid(self):
+        with pytest.raises(ValidationException):
+            _decode_cursor("not-a-cursor")
+
+
+class TestListProducts:
+    @pytest.mark.asyncio
+    async def test_offset_page_in_sql(self):
+        session = _PageSession(_products(3))
+
+        products, next_cursor = await MenuService(session).list_products(skip=40, limit=2)
+
+        sql, params = session.sql[0]
+        assert "LIMIT" in sql and "OFFSET" in sql
+        assert params["param_1"] == 3
+        assert "JOIN categories" in sql
+        assert [p.id for p in products] == [1, 2]
+        assert _decode_cursor(next_cursor) == (0, "Product 2", 2)
+
+    @pytest.mark.asyncio
+    async def test_keyset_page(self):
+        session = _PageSession(_products(1))
+        cursor = _encode_cursor(0, "Product 2", 2)
+
+        products, next_cursor = await MenuService(session).list_products(category_id=1, cursor=cursor, limit=2)
+
+        sql, _ = session.sql[0]
+        assert "(products.sort_order, products.name, products.id) >" in sql
+        assert "OFFSET" not in sql
+        assert "JOIN categories" in sql
+        assert next_cursor is None
+
+    @pytest.mark.asyncio
+    async def test_field_projection(self):
+        rows = [_Row(id=i, name=f"P{i}", price=10, sort_order=0) for i in (1, 2)]
+        session = _PageSession(rows)
+
+        products, _ = await MenuService(session).list_products(fields=["name", "price"], limit=5)
+
+        sql, _ = session.sql[0]
+        assert "description" not in sql
+        assert products == [{"id": 1, "name": "P1", "price": 10}, {"id": 2, "name": "P2", "price": 10}]
+
+    @pytest.mark.asyncio
+    async def test_product_options_hide_products_of_hidden_categories(self):
+        session = _PageSession([])
+
+        with pytest.raises(NotFoundException):
+            await MenuService(session)._load_product_options(10, [51])
+
+        sql, _ = session.sql[0]
+        assert "JOIN categories ON products.category_id = categories.id AND categories.is_active" in sql
+
+
+class TestProductsEndpoint:
+    def test_unknown_field_rejected(self):
+        with TestClient(app) as client:
+            response = client.get("/api/v1/menu/products", params={"fields": "name,secret"})
+        assert response.status_code == 400
+
+    def test_total_header(self):
+        with TestClient(app) as client:
+            response = client.get("/api/v1/menu/products", params={"fields": "name"})
+        assert response.status_code == 200
+        assert response.headers["X-Total-Count"] == "0"
@@ -11,3 +11,26 @@ def test_patch_10a_has_upgrade_and_downgrade():
         content = f.read()
     assert 'def upgrade()' in content
     assert 'def downgrade()' in content
+
+
+
+def test_hot_order_indexes_match_models():
+    from app.database import Base
+    import app.models  # noqa: F401
+
+    path = os.path.join('migrations', 'versions', '002_hot_order_indexes.py')
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    assert "down_revision = '001_initial'" in content
+    model_indexes = {index.name for table in Base.metadata.tables.values() for index in table.indexes}
+    for name in (
+        'ix_orders_active_status_created_at',
+        'ix_orders_courier_id_status',
+        'ix_orders_created_at',
+        'ix_order_status_logs_order_id',
+        'ix_order_items_order_id',
+        'ix_products_category_listing',
+        'ix_categories_parent_id',
+    ):
+        assert name in model_indexes
+        assert f"'{name}'" in content
@@ -0,0 +1,206 @@
+"""Tests for order number allocators."""
+
+import asyncio
+import os
+import re
+from datetime import date
+
+import pytest
+
+from app.services.order_number_allocator import (
+    OrderNumberAllocator,
+    RedisCounterAllocator,
+    SequenceAllocator,
+    UpsertCounterAllocator,
+    format_order_number,
+    get_order_number_allocator,
+)
+
+ORDER_NUMBER_RE = re.compile(r"^\d{8}-\d{4,}$")
+DAY = date(2024, 3, 15)
+
+
+class _Result:
+    def __init__(self, value):
+        self._value = value
+
+    def scalar_one(self):
+        return self._value
+
+    def scalar_one_or_none(self):
+        return self._value
+
+
+class _DatabaseState:
+    """Shared state standing in for daily_counters and orders."""
+
+    def __init__(self, counter=0, last_order_number=None):
+        self.counter = counter
+        self.last_order_number = last_order_number
+
+
+class _FakeSession:
+    """Answers the allocator's floor queries and the counter upsert."""
+
+    def __init__(self, state):
+        self.state = state
+        self.upserts = 0
+
+    async def execute(self, statement, *args, **kwargs):
+        if statement.is_insert:
+            self.upserts += 1
+            floor = statement.compile().params.get("greatest_1", 0)
+            self.state.counter = max(self.state.counter, floor) + 1
+            return _Result(self.state.counter)
+        if "max(" in str(statement):
+            last = self.state.last_order_number
+            return _Result(int(last.split("-", 1)[1]) if last else None)
+        return _Result(self.state.counter or None)
+
+
+class _FakeRedis:
+    """In-memory emulation of the allocation script; yields between steps."""
+
+    def __init__(self):
+        self.values = {}
+        self.calls = 0
+
+    async def eval(self, script, numkeys, key, floor, seed, ttl):
+        self.calls += 1
+        await asyncio.sleep(0)
+        # A script runs atomically in Redis, so no awaits below this point
+        current = self.values.get(key)
+        if current is None:
+            if seed < 0:
+                return -1
+            self.values[key] = seed
+        elif floor > current:
+            self.values[key] = floor
+        self.values[key] += 1
+        return self.values[key]
+
+
+class _BrokenRedis:
+    async def eval(self, *args, **kwargs):
+        raise ConnectionError("redis is down")
+
+
+class TestFormat:
+    def test_keeps_yyyymmdd_xxxx(self):
+        assert format_order_number(DAY, 7) == "20240315-0007"
+        assert ORDER_NUMBER_RE.match(format_order_number(DAY, 12345))
+
+
+class TestFactory:
+    def test_backends(self):
+        session = _FakeSession(_DatabaseState())
+        assert isinstance(get_order_number_allocator(session, backend="upsert"), UpsertCounterAllocator)
+        assert isinstance(get_order_number_allocator(session, backend="sequence"), SequenceAllocator)
+        assert isinstance(get_order_number_allocator(session, _FakeRedis(), backend="redis"), RedisCounterAllocator)
+
+    def test_redis_without_client_uses_upsert(self):
+        session = _FakeSession(_DatabaseState())
+        assert isinstance(get_order_number_allocator(session, None, backend="redis"), UpsertCounterAllocator)
+
+    def test_base_class_is_abstract(self):
+        with pytest.raises(TypeError):
+            OrderNumberAllocator(_FakeSession(_DatabaseState()))
+
+
+class TestRedisAllocator:
+    @pytest.mark.asyncio
+    async def test_200_parallel_checkouts_get_unique_numbers(self):
+        redis = _FakeRedis()
+        state = _DatabaseState()
+
+        async def checkout():
+            return await RedisCounterAllocator(_FakeSession(state), redis).allocate(DAY)
+
+        numbers = await asyncio.gather(*(checkout() for _ in range(200)))
+
+        assert len(set(numbers)) == 200
+        assert all(ORDER_NUMBER_RE.match(n) for n in numbers)
+        assert sorted(numbers)[-1] == "20240315-0200"
+
+    @pytest.mark.asyncio
+    async def test_missing_key_seeded_from_database(self):
+        # Redis lost its data after 41 orders were placed today
+        state = _DatabaseState(counter=0, last_order_number="20240315-0041")
+        redis = _FakeRedis()
+
+        number = await RedisCounterAllocator(_FakeSession(state), redis).allocate(DAY)
+
+        assert number == "20240315-0042"
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_database_and_reseeds(self):
+        state = _DatabaseState(last_order_number="20240315-0010")
+        session = _FakeSession(state)
+
+        number = await RedisCounterAllocator(session, _BrokenRedis()).allocate(DAY)
+        assert number == "20240315-0011"
+        assert session.upserts == 1
+
+        # Redis is back but its counter is behind the numbers issued meanwhile; another
+        # process that never fell back learns that from daily_counters
+        redis = _FakeRedis()
+        redis.values[RedisCounterAllocator.counter_key(DAY)] = 10
+        number = await RedisCounterAllocator(_FakeSession(state), redis).allocate(DAY)
+        assert number == "20240315-0012"
+
+
+class TestIssuedFloor:
+    @pytest.mark.asyncio
+    async def test_compares_counters_as_numbers(self):
+        state = _DatabaseState(counter=9999, last_order_number="20240315-10000")
+        statements = []
+
+        class _RecordingSession(_FakeSession):
+            async def execute(self, statement, *args, **kwargs):
+                statements.append(str(statement))
+                return await super().execute(statement, *args, **kwargs)
+
+        floor = await UpsertCounterAllocator(_RecordingSession(state))._issued_floor(DAY)
+
+        assert floor == 10000
+        assert "max(CAST(split_part(orders.order_number" in statements[-1]
+
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+class TestPostgresAllocators:
+    """Runs 200 concurrent allocations against a real PostgreSQL database."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("backend", ["upsert", "sequence"])
+    async def test_200_parallel_checkouts(self, backend):
+        from sqlalchemy import delete, text
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        from app.database import Base
+        from app.models import DailyCounter
+
+        day = date(2099, 1, 1)
+        engine = create_async_engine(TEST_DATABASE_URL, pool_size=20, max_overflow=0)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        async def checkout():
+            async with session_factory() as session:
+                number = await get_order_number_allocator(session, backend=backend).allocate(day)
+                await session.commit()
+                return number
+
+        try:
+            numbers = await asyncio.gather(*(checkout() for _ in range(200)))
+            assert len(set(numbers)) == 200
+            assert all(ORDER_NUMBER_RE.match(n) for n in numbers)
+        finally:
+            async with session_factory() as session:
+                await session.execute(delete(DailyCounter).where(DailyCounter.counter_date == day))
+                await session.execute(text(f"DROP SEQUENCE IF EXISTS {SequenceAllocator.sequence_name(day)}"))
+                await session.commit()
+            await engine.dispose()
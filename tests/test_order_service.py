@@ -0,0 +1,342 @@
+"""Tests for OrderService query patterns."""
+
+import pytest
+
+from app.models.modifier import ModifierOption
+from app.models.product import Product
+from app.services.order_service import OrderService
+from app.utils.enums import OrderStatus
+from app.utils.exceptions import NotFoundException, ValidationException
+
+
+class _FakeScalars:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return list(self._rows)
+
+
+class _FakeResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def scalars(self):
+        return _FakeScalars(self._rows)
+
+    def scalar_one_or_none(self):
+        return self._rows[0] if self._rows else None
+
+    def scalar_one(self):
+        return self._rows[0]
+
+
+class _FakeSession:
+    """Records executed statements and serves rows per selected entity."""
+
+    def __init__(self, rows_by_entity):
+        self.rows_by_entity = rows_by_entity
+        self.statements = []
+        self.added = []
+        self.commits = 0
+        self.counter = 0
+
+    async def execute(self, statement, *args, **kwargs):
+        self.statements.append(statement)
+        if statement.is_insert:
+            # Daily counter upsert issued by the order number allocator
+            self.counter += 1
+            return _FakeResult([self.counter])
+        entity = statement.column_descriptions[0].get("entity")
+        return _FakeResult(self.rows_by_entity.get(entity, []))
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    async def flush(self):
+        # The database assigns primary keys on flush
+        for number, obj in enumerate(self.added, 1):
+            if getattr(obj, "id", None) is None:
+                obj.id = number
+
+    async def commit(self):
+        self.commits += 1
+
+
+def _products(count):
+    return [
+        Product(id=i, name=f"Product {i}", price=100 + i, is_active=True, is_archived=False, track_stock=False)
+        for i in range(1, count + 1)
+    ]
+
+
+def _entity_selects(session, entity):
+    return [
+        s for s in session.statements
+        if s.is_select and s.column_descriptions[0].get("entity") is entity
+    ]
+
+
+class TestCreateOrderBatching:
+    """create_order loads the whole cart with one query per entity."""
+
+    @pytest.mark.asyncio
+    async def test_single_product_query_for_large_order(self):
+        products = _products(18)
+        session = _FakeSession({Product: products})
+        items = [{"product_id": p.id, "quantity": 2} for p in products]
+
+        order = await OrderService(session).create_order(
+            user_id=7,
+            items=items,
+            delivery_address="Street 1",
+            delivery_phone="+79123456789",
+            payment_method="cash",
+        )
+
+        assert len(_entity_selects(session, Product)) == 1
+        assert len(_entity_selects(session, ModifierOption)) == 0
+        assert session.commits == 1
+        assert len(order.items) == 18
+        assert order.subtotal == sum((100 + i) * 2 for i in range(1, 19))
+        assert [log.new_status for log in order.status_logs] == [OrderStatus.NEW.value]
+        # Manager notifications are queued in the order's transaction
+        assert any(
+            s.is_insert and s.table.name == "notification_outbox" for s in session.statements
+        )
+
+    @pytest.mark.asyncio
+    async def test_modifiers_priced_from_database(self):
+        products = _products(2)
+        options = [
+            ModifierOption(id=10, modifier_id=1, name="Cheese", price_adjustment=50, is_active=True),
+            ModifierOption(id=11, modifier_id=1, name="Bacon", price_adjustment=70, is_active=True),
+        ]
+        session = _FakeSession({Product: products, ModifierOption: options})
+        items = [
+            {"product_id": 1, "quantity": 1, "modifiers": [{"id": 10, "price_adjustment": 0}]},
+            {"product_id": 2, "quantity": 2, "modifiers": [{"id": 10}, {"id": 11}]},
+        ]
+
+        order = await OrderService(session).create_order(
+            user_id=7,
+            items=items,
+            delivery_address="Street 1",
+            delivery_phone="+79123456789",
+            payment_method="cash",
+        )
+
+        assert len(_entity_selects(session, ModifierOption)) == 1
+        assert order.items[0].modifiers_price == 50
+        assert order.items[1].item_total == (102 + 120) * 2
+
+    @pytest.mark.asyncio
+    async def test_missing_product_raises(self):
+        session = _FakeSession({Product: _products(1)})
+        with pytest.raises(NotFoundException):
+            await OrderService(session).create_order(
+                user_id=7,
+                items=[{"product_id": 1}, {"product_id": 99}],
+                delivery_address="Street 1",
+                delivery_phone="+79123456789",
+                payment_method="cash",
+            )
+        assert session.commits == 0
+
+    @pytest.mark.asyncio
+    async def test_empty_order_rejected(self):
+        session = _FakeSession({})
+        with pytest.raises(ValidationException):
+            await OrderService(session).create_order(
+                user_id=7,
+                items=[],
+                delivery_address="Street 1",
+                delivery_phone="+79123456789",
+                payment_method="cash",
+            )
+
+
+class _Row:
+    def __init__(self, **values):
+        self._mapping = values
+
+
+class _TransitionSession:
+    """Serves the transition statement and the follow-up status lookup."""
+
+    def __init__(self, row=None, current_status=None):
+        self.row = row
+        self.current_status = current_status
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, statement, *args, **kwargs):
+        self.statements.append(statement)
+        if len(self.statements) == 1:
+            return _TransitionResult(self.row)
+        return _FakeResult([self.current_status] if self.current_status else [])
+
+    async def commit(self):
+        self.commits += 1
+
+
+class _TransitionResult:
+    def __init__(self, row):
+        self._row = row
+
+    def first(self):
+        return self._row
+
+
+class TestAdvanceStatus:
+    """advance_status updates, logs and returns in one statement."""
+
+    def test_statement_is_single_round_trip(self):
+        from sqlalchemy.dialects import postgresql
+
+        service = OrderService(_TransitionSession())
+        statement = service._transition_statement([5], OrderStatus.READY, 3, None)
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+
+        assert "FOR UPDATE" in sql
+        assert "UPDATE orders SET" in sql
+        assert "RETURNING" in sql
+        assert "INSERT INTO order_status_logs" in sql
+        assert "INSERT INTO daily_stats" in sql
+        assert "INSERT INTO notification_outbox" in sql
+        assert "ready_at" in sql
+
+    @pytest.mark.asyncio
+    async def test_returns_transition_and_commits(self):
+        row = _Row(
+            order_id=5, order_number="20240101-0001", user_id=7, courier_id=None,
+            old_status="in_progress", new_status="ready", version=4,
+        )
+        session = _TransitionSession(row=row)
+
+        transition = await OrderService(session).advance_status(5, OrderStatus.READY, changed_by_id=3)
+
+        assert len(session.statements) == 1
+        assert session.commits == 1
+        assert transition.old_status == "in_progress"
+        assert transition.version == 4
+
+    @pytest.mark.asyncio
+    async def test_invalid_transition(self):
+        from app.utils.exceptions import InvalidStateTransitionException
+
+        session = _TransitionSession(current_status="delivered")
+        with pytest.raises(InvalidStateTransitionException):
+            await OrderService(session).advance_status(5, OrderStatus.READY)
+        assert session.commits == 0
+
+    @pytest.mark.asyncio
+    async def test_missing_order(self):
+        session = _TransitionSession()
+        with pytest.raises(NotFoundException):
+            await OrderService(session).advance_status(5, OrderStatus.READY)
+
+
+class TestCancelOrder:
+    """cancel_order uses the locked transition statement."""
+
+    def test_statement_locks_cancellable_orders(self):
+        from sqlalchemy.dialects import postgresql
+
+        service = OrderService(_TransitionSession())
+        statement = service._transition_statement(
+            [5], OrderStatus.CANCELLED, 3, "no answer",
+            source_statuses=["NEW", "READY"],
+            extra_values={"cancelled_by_id": 3, "cancellation_reason": "no answer"}
+        )
+        compiled = statement.compile(dialect=postgresql.dialect())
+        sql = str(compiled)
+
+        assert "FOR UPDATE" in sql
+        assert "cancellation_reason" in sql
+        assert "version" in sql
+        assert ["NEW", "READY"] in compiled.params.values()
+
+    @pytest.mark.asyncio
+    async def test_not_cancellable(self):
+        session = _TransitionSession(current_status="IN_DELIVERY")
+        with pytest.raises(ValidationException):
+            await OrderService(session).cancel_order(5, cancelled_by_id=3, reason="late")
+        assert session.commits == 0
+
+    @pytest.mark.asyncio
+    async def test_missing_order(self):
+        session = _TransitionSession()
+        with pytest.raises(NotFoundException):
+            await OrderService(session).cancel_order(5, cancelled_by_id=3, reason="late")
+
+
+class _BulkResult:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def all(self):
+        return list(self._rows)
+
+
+class _BulkSession:
+    """Returns transitioned rows first, then current statuses of the rest."""
+
+    def __init__(self, transitioned, current_statuses):
+        self.transitioned = transitioned
+        self.current_statuses = current_statuses
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, statement, *args, **kwargs):
+        self.statements.append(statement)
+        if len(self.statements) == 1:
+            return _BulkResult(self.transitioned)
+        return _BulkResult([
+            _StatusRow(order_id, status) for order_id, status in self.current_statuses.items()
+        ])
+
+    async def commit(self):
+        self.commits += 1
+
+
+class _StatusRow:
+    def __init__(self, order_id, status):
+        self.id = order_id
+        self.status = status
+
+
+class _TransitionedRow(_Row):
+    def __init__(self, order_id):
+        super().__init__(
+            order_id=order_id, order_number=f"20240101-{order_id:04d}", user_id=7, courier_id=None,
+            old_status="in_progress", new_status="ready", version=2,
+        )
+        self.order_id = order_id
+
+
+class TestTransitionMany:
+    """transition_many applies valid transitions in one statement."""
+
+    @pytest.mark.asyncio
+    async def test_mixed_results(self):
+        session = _BulkSession(
+            transitioned=[_TransitionedRow(1), _TransitionedRow(3)],
+            current_statuses={2: "delivered"},
+        )
+
+        results = await OrderService(session).transition_many([1, 2, 3, 4, 1], OrderStatus.READY, changed_by_id=5)
+
+        assert [r.order_id for r in results] == [1, 2, 3, 4]
+        assert [r.success for r in results] == [True, False, True, False]
+        assert results[0].transition.new_status == "ready"
+        assert "Cannot transition" in results[1].error
+        assert "not found" in results[3].error
+        assert len(session.statements) == 2
+        assert session.commits == 1
+
+    @pytest.mark.asyncio
+    async def test_nothing_to_do(self):
+        session = _BulkSession(transitioned=[], current_statuses={})
+        assert await OrderService(session).transition_many([], OrderStatus.READY) == []
+        assert session.statements == []
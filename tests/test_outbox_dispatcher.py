@@ -0,0 +1,98 @@
+"""Tests for delivery of the notification outbox."""
+
+import pytest
+
+from app.models.order import Order
+from app.models.user import User
+from app.services.notification_outbox import ORDER_CREATED, ORDER_STATUS_CHANGED
+from app.services.outbox_dispatcher import OutboxDispatcher, OutboxEntry
+from app.utils.enums import OrderStatus
+
+
+class _Bot:
+    """Fails the chats listed in failures, records the rest."""
+
+    def __init__(self, failures=()):
+        self.failures = set(failures)
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if chat_id in self.failures:
+            raise ConnectionError("timeout")
+        self.sent.append((chat_id, text))
+
+
+def _order(order_id=1):
+    return Order(
+        id=order_id,
+        order_number=f"20260101-000{order_id}",
+        total=500,
+        delivery_phone="+79990000000",
+        delivery_address="ул. Ленина, 1",
+        payment_method="cash",
+        user=User(id=7, telegram_id=700, first_name="Анна")
+    )
+
+
+def _entry(entry_id, chat_id, attempts=1, event_type=ORDER_STATUS_CHANGED, order_id=1):
+    payload = {"old_status": "NEW", "new_status": OrderStatus.CONFIRMED.value}
+    return OutboxEntry(
+        id=entry_id,
+        event_type=event_type,
+        order_id=order_id,
+        chat_id=chat_id,
+        payload=payload if event_type == ORDER_STATUS_CHANGED else None,
+        attempts=attempts
+    )
+
+
+def _dispatcher(bot):
+    dispatcher = OutboxDispatcher(
+        batch_size=10, max_attempts=3, retry_base_seconds=5, retry_max_seconds=60, lease_seconds=30
+    )
+    dispatcher._bot = bot
+    return dispatcher
+
+
+class TestDeliver:
+    @pytest.mark.asyncio
+    async def test_sends_rendered_messages(self):
+        bot = _Bot()
+        entries = [_entry(1, 100, event_type=ORDER_CREATED), _entry(2, 700)]
+
+        results = await _dispatcher(bot)._deliver(entries, {1: _order()})
+
+        assert [chat_id for chat_id, _ in bot.sent] == [100, 700]
+        assert "Новый заказ #20260101-0001" in bot.sent[0][1]
+        assert "подтвержден" in bot.sent[1][1]
+        assert all(r["sent_at"] is not None and r["failed_at"] is None for r in results)
+
+    @pytest.mark.asyncio
+    async def test_retry_backoff_holds_later_messages_of_the_chat(self):
+        bot = _Bot(failures={700})
+        entries = [_entry(1, 700, attempts=2), _entry(2, 700, attempts=1), _entry(3, 100)]
+
+        first, held, other = await _dispatcher(bot)._deliver(entries, {1: _order()})
+
+        assert first["sent_at"] is None and first["failed_at"] is None
+        assert first["last_error"] == "timeout"
+        # Second attempt waits twice the base delay
+        assert 9 < (first["available_at"] - other["sent_at"]).total_seconds() <= 10
+        # Not attempted: waits for the failed message and keeps its attempt count
+        assert held["available_at"] == first["available_at"]
+        assert held["attempts"] == 0
+        assert other["sent_at"] is not None
+        assert [chat_id for chat_id, _ in bot.sent] == [100]
+
+    @pytest.mark.asyncio
+    async def test_gives_up(self):
+        bot = _Bot(failures={700})
+        entries = [_entry(1, 700, attempts=3), _entry(2, 100, order_id=404)]
+
+        exhausted, orphan = await _dispatcher(bot)._deliver(entries, {1: _order()})
+
+        assert exhausted["failed_at"] is not None
+        # A missing order is never retried
+        assert orphan["failed_at"] is not None
+        assert orphan["attempts"] == 1
+        assert bot.sent == []
@@ -0,0 +1,191 @@
+"""Tests for precomputed stats reports."""
+
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+from app.handlers.admin import stats_report
+from app.services.report_cache import DAILY, WEEKLY, ReportCache, build_daily_report
+from app.tasks.celery_app import BEAT_SCHEDULE
+from app.tasks.reports import _chunks
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.values = {}
+        self.expiry = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+        self.expiry[key] = ex
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+
+
+class _RecordingSession:
+    """Serves report rows; pending makes the day's orders look still in progress."""
+
+    def __init__(self, pending=False):
+        self.statements = []
+        self.pending = pending
+
+    async def execute(self, statement, *args, **kwargs):
+        self.statements.append(statement)
+        row = SimpleNamespace(total_orders=2, total_revenue=900, cancelled_orders=1)
+        first = (1,) if self.pending else None
+        return SimpleNamespace(one=lambda: row, all=lambda: [], first=lambda: first)
+
+
+class TestReportCache:
+    @pytest.mark.asyncio
+    async def test_round_trip(self):
+        redis = _FakeRedis()
+        cache = ReportCache(redis, ttl_seconds=60)
+
+        await cache.put(DAILY, date(2024, 3, 15), {"total_orders": 2})
+
+        assert await cache.get(DAILY, date(2024, 3, 15)) == {"total_orders": 2}
+        assert redis.expiry["report:daily:2024-03-15"] == 60
+        assert await cache.get(DAILY, date(2024, 3, 16)) is None
+
+    @pytest.mark.asyncio
+    async def test_without_redis(self):
+        cache = ReportCache(None)
+
+        await cache.put(DAILY, date(2024, 3, 15), {"total_orders": 2})
+
+        assert await cache.get(DAILY, date(2024, 3, 15)) is None
+
+
+    @pytest.mark.asyncio
+    async def test_get_or_build_caches_closed_days(self):
+        redis = _FakeRedis()
+        cache = ReportCache(redis, ttl_seconds=60)
+        session = _RecordingSession()
+
+        report = await cache.get_or_build(session, DAILY, date(2024, 3, 15))
+        queries = len(session.statements)
+        assert await cache.get_or_build(session, DAILY, date(2024, 3, 15)) == report
+        assert len(session.statements) == queries
+        assert "report:daily:2024-03-15" in redis.values
+
+    @pytest.mark.asyncio
+    async def test_day_with_orders_in_progress_is_not_cached(self):
+        redis = _FakeRedis()
+
+        await ReportCache(redis).get_or_build(_RecordingSession(pending=True), DAILY, date(2024, 3, 15))
+
+        assert redis.values == {}
+
+    @pytest.mark.asyncio
+    async def test_invalidate_drops_reports_covering_the_days(self):
+        redis = _FakeRedis()
+        cache = ReportCache(redis)
+        for day in (date(2024, 3, 14), date(2024, 3, 15), date(2024, 3, 16)):
+            await cache.put(DAILY, day, {})
+        for end in (date(2024, 3, 14), date(2024, 3, 21), date(2024, 3, 22)):
+            await cache.put(WEEKLY, end, {})
+
+        await cache.invalidate(date(2024, 3, 15), date(2024, 3, 15))
+
+        assert sorted(redis.values) == [
+            "report:daily:2024-03-14",
+            "report:daily:2024-03-16",
+            "report:weekly:2024-03-14",
+            "report:weekly:2024-03-22",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_get_or_build_does_not_cache_today(self, monkeypatch):
+        monkeypatch.setattr("app.services.report_cache.today", lambda: date(2024, 3, 15))
+        redis = _FakeRedis()
+
+        await ReportCache(redis).get_or_build(_RecordingSession(), DAILY, date(2024, 3, 15))
+
+        assert redis.values == {}
+
+
+class _Message:
+    def __init__(self):
+        self.answers = []
+
+    async def answer(self, text, **kwargs):
+        self.answers.append(text)
+
+
+class TestReportCommand:
+    @pytest.mark.asyncio
+    async def test_serves_cached_report(self):
+        redis = _FakeRedis()
+        await ReportCache(redis).put(DAILY, date(2024, 3, 15), {
+            "total_orders": 3,
+            "total_revenue": 1500.0,
+            "average_order_value": 500.0,
+            "cancelled_orders": 1,
+            "top_products": [{"product_name": "Маргарита", "total_quantity": 4}],
+            "statuses": {}
+        })
+        session = _RecordingSession()
+        message = _Message()
+
+        await stats_report(
+            message, SimpleNamespace(args="daily 2024-03-15"), session, redis=redis, is_admin=True
+        )
+
+        assert session.statements == []
+        assert "Заказов: 3" in message.answers[0]
+        assert "1. Маргарита — 4 шт." in message.answers[0]
+
+    @pytest.mark.asyncio
+    async def test_builds_on_miss(self):
+        redis = _FakeRedis()
+        message = _Message()
+
+        await stats_report(
+            message, SimpleNamespace(args="daily 2024-03-15"), _RecordingSession(), redis=redis, is_admin=True
+        )
+
+        assert "Заказов: 2" in message.answers[0]
+        assert "report:daily:2024-03-15" in redis.values
+
+    @pytest.mark.asyncio
+    async def test_admins_only(self):
+        message = _Message()
+
+        await stats_report(message, SimpleNamespace(args=None), _RecordingSession(), is_admin=False)
+
+        assert message.answers == ["Недостаточно прав"]
+
+
+class TestReports:
+    @pytest.mark.asyncio
+    async def test_daily_report_of_closed_day_reads_rollup(self):
+        session = _RecordingSession()
+
+        report = await build_daily_report(session, date(2024, 3, 15))
+
+        assert report["total_orders"] == 2
+        assert report["top_products"] == [] and report["statuses"] == {}
+        assert all("daily_stats" in str(statement) for statement in session.statements)
+
+    def test_backfill_chunks_cover_range(self):
+        chunks = _chunks(date(2024, 3, 1), date(2024, 3, 17), 7)
+
+        assert chunks == [
+            (date(2024, 3, 1), date(2024, 3, 7)),
+            (date(2024, 3, 8), date(2024, 3, 14)),
+            (date(2024, 3, 15), date(2024, 3, 17)),
+        ]
+        assert _chunks(date(2024, 3, 2), date(2024, 3, 1), 7) == []
+
+    def test_beat_schedule_targets_report_tasks(self):
+        tasks = {entry["task"] for entry in BEAT_SCHEDULE.values()}
+
+        assert "app.tasks.reports.generate_daily_stats" in tasks
+        assert "app.tasks.reports.generate_weekly_report" in tasks
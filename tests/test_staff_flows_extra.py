@@ -15,3 +15,45 @@ def test_staff_guard_allows_when_admin_in_settings():
 def test_staff_guard_denies_when_not_admin():
     settings.admin_telegram_ids = [1234]
     assert is_admin_callback(_cb(9999)) is False
+
+
+class _Message:
+    def __init__(self, reply_markup):
+        self.reply_markup = reply_markup
+
+    async def edit_text(self, text, **kwargs):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_pack_all_packs_only_displayed_orders(monkeypatch):
+    from app.handlers import packer
+    from app.services.order_service import BulkTransitionResult
+
+    requested = []
+
+    class _OrderService:
+        def __init__(self, session):
+            pass
+
+        async def transition_many(self, order_ids, new_status, changed_by_id=None):
+            requested.append(list(order_ids))
+            return [BulkTransitionResult(order_id=i, success=True) for i in order_ids]
+
+    monkeypatch.setattr(packer, "OrderService", _OrderService)
+    answers = []
+
+    async def answer(text, **kwargs):
+        answers.append(text)
+
+    # Order 3 became ready after this list was sent
+    markup = packer.get_packer_orders_keyboard([
+        SimpleNamespace(id=1, order_number="A-1"),
+        SimpleNamespace(id=2, order_number="A-2"),
+    ])
+    callback = SimpleNamespace(data="packer:pack_all", message=_Message(markup), answer=answer)
+
+    await packer.mark_all_packed(callback, session=None, user=SimpleNamespace(id=7))
+
+    assert requested == [[1, 2]]
+    assert answers == ["✅ Упаковано заказов: 2 из 2"]
@@ -103,3 +103,11 @@ class TestInvalidTransitions:
         assert state_machine.can_transition(OrderStatus.NEW, OrderStatus.IN_PROGRESS) is False
         assert state_machine.can_transition(OrderStatus.CONFIRMED, OrderStatus.READY) is False
         assert state_machine.can_transition(OrderStatus.PAID, OrderStatus.DELIVERED) is False
+    
+    def test_source_statuses(self, state_machine):
+        """Test reverse lookup of statuses leading to a target status."""
+        assert state_machine.get_source_statuses(OrderStatus.READY) == [OrderStatus.IN_PROGRESS]
+        assert state_machine.get_source_statuses(OrderStatus.NEW) == []
+        cancel_sources = state_machine.get_source_statuses(OrderStatus.CANCELLED)
+        assert OrderStatus.DELIVERED not in cancel_sources
+        assert OrderStatus.IN_DELIVERY in cancel_sources
@@ -0,0 +1,317 @@
+"""Tests for timezone-aware, index-friendly stats queries."""
+
+import os
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.models.daily_stats import ORDER_TOTALS, ROLLUP_SLOTS
+from app.services.stats_rollup import DailyStatsRollup
+from app.services.stats_service import StatsService
+from app.utils.time import local_day_range
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+BERLIN = ZoneInfo("Europe/Berlin")
+MOSCOW = ZoneInfo("Europe/Moscow")
+
+
+class TestLocalDayRange:
+    def test_midnight_in_business_timezone(self):
+        lower, upper = local_day_range(date(2024, 3, 15), tz=MOSCOW)
+
+        assert lower == datetime(2024, 3, 14, 21, tzinfo=timezone.utc)
+        assert upper == datetime(2024, 3, 15, 21, tzinfo=timezone.utc)
+
+    def test_dst_days(self):
+        spring = local_day_range(date(2024, 3, 31), tz=BERLIN)
+        autumn = local_day_range(date(2024, 10, 27), tz=BERLIN)
+
+        assert spring[1] - spring[0] == timedelta(hours=23)
+        assert autumn[1] - autumn[0] == timedelta(hours=25)
+
+    def test_period_is_half_open(self):
+        lower, upper = local_day_range(date(2024, 3, 30), date(2024, 4, 1), tz=BERLIN)
+
+        assert lower == datetime(2024, 3, 29, 23, tzinfo=timezone.utc)
+        assert upper == datetime(2024, 4, 1, 22, tzinfo=timezone.utc)
+
+
+class _RecordingSession:
+    def __init__(self, row):
+        self.row = row
+        self.statements = []
+
+    async def execute(self, statement, *args, **kwargs):
+        self.statements.append(statement)
+        row = self.row
+        return SimpleNamespace(one=lambda: row, all=lambda: [])
+
+
+def _sql(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+class TestStatsQueries:
+    @pytest.mark.asyncio
+    async def test_daily_stats_single_sargable_query(self):
+        row = SimpleNamespace(total_orders=3, total_revenue=1500, avg_order_value=500, cancelled_orders=1)
+        session = _RecordingSession(row)
+        service = StatsService(session)
+
+        stats = await service.get_daily_stats(service._today())
+
+        assert len(session.statements) == 1
+        sql = _sql(session.statements[0])
+        assert "CAST" not in sql
+        assert "orders.created_at >=" in sql and "orders.created_at <" in sql
+        assert "FILTER (WHERE" in sql
+        assert stats["total_orders"] == 3
+        assert stats["cancelled_orders"] == 1
+        assert stats["average_order_value"] == 500
+
+    @pytest.mark.asyncio
+    async def test_closed_day_reads_rollup(self):
+        row = SimpleNamespace(total_orders=2, total_revenue=900, cancelled_orders=0)
+        session = _RecordingSession(row)
+
+        stats = await StatsService(session).get_daily_stats(date(2024, 3, 15))
+
+        sql = _sql(session.statements[0])
+        assert "FROM daily_stats" in sql and "FROM orders" not in sql
+        assert stats["average_order_value"] == 450
+
+    @pytest.mark.asyncio
+    async def test_period_splits_rollup_and_today(self):
+        session = _RecordingSession(None)
+        service = StatsService(session)
+        today = service._today()
+
+        await service.get_period_stats(today - timedelta(days=30), today)
+
+        assert len(session.statements) == 2
+        closed, live = (_sql(statement) for statement in session.statements)
+        assert "FROM daily_stats" in closed
+        assert "date_trunc" in live and "timezone(" in live
+        assert "CAST" not in live
+
+    @pytest.mark.asyncio
+    async def test_closed_period_skips_live_tables(self):
+        session = _RecordingSession(None)
+
+        await StatsService(session).get_period_stats(date(2024, 3, 1), date(2024, 3, 31))
+
+        assert len(session.statements) == 1
+        assert "FROM orders" not in _sql(session.statements[0])
+
+
+class TestRollupDeltas:
+    def _order(self, status="NEW"):
+        items = [
+            SimpleNamespace(product_id=7, product_name="Pizza", quantity=2, item_total=800),
+            SimpleNamespace(product_id=9, product_name="Cola", quantity=1, item_total=100),
+        ]
+        return SimpleNamespace(
+            id=35, status=status, total=900, items=items,
+            # 23:30 UTC is already the next day in Berlin
+            created_at=datetime(2024, 3, 15, 23, 30)
+        )
+
+    def test_order_rows_count_totals_and_products(self):
+        rows = DailyStatsRollup(None, BERLIN).order_rows(self._order(), "NEW")
+
+        by_product = {row["product_id"]: row for row in rows}
+        assert {row["stat_date"] for row in rows} == {date(2024, 3, 16)}
+        assert by_product[ORDER_TOTALS]["orders"] == 1
+        assert by_product[ORDER_TOTALS]["quantity"] == 3
+        assert by_product[ORDER_TOTALS]["revenue"] == 900
+        assert by_product[7]["quantity"] == 2 and by_product[7]["revenue"] == 800
+        # Order 35 always lands in the same slot, spread from other orders of the day
+        assert {row["slot"] for row in rows} == {35 % ROLLUP_SLOTS}
+
+    @pytest.mark.asyncio
+    async def test_move_order_is_one_upsert(self):
+        session = _RecordingSession(None)
+        rollup = DailyStatsRollup(session, BERLIN)
+
+        await rollup.move_order(self._order(), "NEW", "CANCELLED")
+        await rollup.move_order(self._order(), "NEW", "NEW")
+
+        assert len(session.statements) == 1
+        sql = _sql(session.statements[0])
+        assert "INSERT INTO daily_stats" in sql and "ON CONFLICT" in sql
+
+
+    def test_transition_counts_each_order_once_per_product(self):
+        from sqlalchemy import Integer, String, column, select, table
+
+        orders = table(
+            "orders",
+            column("id", Integer), column("status", String), column("created_at"), column("total")
+        )
+        updated = select(
+            orders.c.id.label("order_id"),
+            orders.c.status.label("old_status"),
+            orders.c.status.label("new_status"),
+            orders.c.created_at,
+            orders.c.total
+        ).cte("updated")
+
+        sql = _sql(DailyStatsRollup(None, BERLIN).transition_statement(updated))
+
+        # Lines of a product are summed per order before the sign is applied
+        assert "GROUP BY order_items.order_id, order_items.product_id" in sql
+
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+class TestPostgresStatsBoundaries:
+    """Pins stats around midnight and DST switches against a real PostgreSQL database."""
+
+    @pytest.mark.asyncio
+    async def test_orders_counted_on_local_days(self):
+        from sqlalchemy import delete
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        from app.database import Base
+        from app.models import DailyStat, Order, User
+
+        engine = create_async_engine(TEST_DATABASE_URL)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        # Local Berlin times: last second before midnight, midnight, and inside the DST gap day
+        moments = [
+            datetime(2024, 3, 30, 23, 59, 59, tzinfo=BERLIN),
+            datetime(2024, 3, 31, 0, 0, 0, tzinfo=BERLIN),
+            datetime(2024, 3, 31, 23, 59, 59, tzinfo=BERLIN),
+            datetime(2024, 10, 27, 2, 30, tzinfo=BERLIN),
+            datetime(2024, 10, 27, 2, 30, fold=1, tzinfo=BERLIN),
+        ]
+        async with session_factory() as session:
+            user = User(telegram_id=-987654321, first_name="stats", role="client")
+            session.add(user)
+            await session.flush()
+            session.add_all([
+                Order(
+                    order_number=f"ST-{i}", user_id=user.id, status="DELIVERED",
+                    payment_method="cash", subtotal=100, total=100,
+                    delivery_address="x", delivery_phone="+70000000000",
+                    created_at=moment.astimezone(timezone.utc)
+                )
+                for i, moment in enumerate(moments)
+            ])
+            await session.commit()
+            user_id = user.id
+
+        try:
+            async with session_factory() as session:
+                await DailyStatsRollup(session, BERLIN).rebuild_days(date(2024, 3, 30), date(2024, 10, 27))
+                await session.commit()
+
+            async with session_factory() as session:
+                service = StatsService(session)
+                service.tz = BERLIN
+                assert (await service.get_daily_stats(date(2024, 3, 30)))["total_orders"] == 1
+                assert (await service.get_daily_stats(date(2024, 3, 31)))["total_orders"] == 2
+                assert (await service.get_daily_stats(date(2024, 10, 27)))["total_orders"] == 2
+
+                period = await service.get_period_stats(date(2024, 3, 30), date(2024, 3, 31))
+                assert [(d["date"], d["orders"]) for d in period["daily"]] == [
+                    ("2024-03-30", 1),
+                    ("2024-03-31", 2),
+                ]
+        finally:
+            async with session_factory() as session:
+                await session.execute(
+                    delete(DailyStat).where(DailyStat.stat_date.between(date(2024, 3, 30), date(2024, 10, 27)))
+                )
+                await session.execute(delete(Order).where(Order.user_id == user_id))
+                await session.execute(delete(User).where(User.id == user_id))
+                await session.commit()
+            await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_transitions_match_rebuild_for_repeated_product(self):
+        from sqlalchemy import delete, func, select
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        from app.database import Base
+        from app.models import Category, DailyStat, Order, OrderItem, OrderStatusLog, Product, User
+        from app.services.order_service import OrderService
+        from app.utils.enums import OrderStatus
+
+        engine = create_async_engine(TEST_DATABASE_URL)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        async def rollup_rows(session, day):
+            result = await session.execute(
+                select(
+                    DailyStat.status,
+                    DailyStat.product_id,
+                    func.sum(DailyStat.orders),
+                    func.sum(DailyStat.quantity),
+                    func.sum(DailyStat.revenue)
+                )
+                .where(DailyStat.stat_date == day)
+                .group_by(DailyStat.status, DailyStat.product_id)
+                .having(func.sum(DailyStat.orders) != 0)
+            )
+            return sorted(tuple(row) for row in result.all())
+
+        async with session_factory() as session:
+            user = User(telegram_id=-987654322, first_name="rollup", role="client")
+            category = Category(name="rollup test")
+            session.add_all([user, category])
+            await session.flush()
+            product = Product(name="Pizza", price=500, category_id=category.id)
+            session.add(product)
+            await session.flush()
+            # Same product twice, e.g. with different modifiers
+            order = Order(
+                order_number="RL-1", user_id=user.id, status=OrderStatus.NEW.value,
+                payment_method="cash", subtotal=1100, total=1100,
+                delivery_address="x", delivery_phone="+70000000000",
+                items=[
+                    OrderItem(product_id=product.id, product_name="Pizza", product_price=500,
+                              quantity=1, item_total=500),
+                    OrderItem(product_id=product.id, product_name="Pizza", product_price=600,
+                              quantity=1, item_total=600),
+                ]
+            )
+            session.add(order)
+            await session.commit()
+            ids = (user.id, category.id, product.id, order.id)
+            day = DailyStatsRollup(session).local_day(order.created_at)
+
+        try:
+            async with session_factory() as session:
+                await DailyStatsRollup(session).rebuild_days(day)
+                await session.commit()
+                service = OrderService(session)
+                await service.transition_many([ids[3]], OrderStatus.CONFIRMED, changed_by_id=ids[0])
+                await service.cancel_order(ids[3], cancelled_by_id=ids[0], reason="test")
+
+            async with session_factory() as session:
+                incremental = await rollup_rows(session, day)
+                await DailyStatsRollup(session).rebuild_days(day)
+                rebuilt = await rollup_rows(session, day)
+                await session.rollback()
+
+            assert incremental == rebuilt
+            assert (OrderStatus.CANCELLED.value, ids[2], 1, 2, 1100) in incremental
+        finally:
+            async with session_factory() as session:
+                await session.execute(delete(DailyStat).where(DailyStat.stat_date == day))
+                await session.execute(delete(OrderItem).where(OrderItem.order_id == ids[3]))
+                await session.execute(delete(OrderStatusLog).where(OrderStatusLog.order_id == ids[3]))
+                await session.execute(delete(Order).where(Order.id == ids[3]))
+                await session.execute(delete(Product).where(Product.id == ids[2]))
+                await session.execute(delete(Category).where(Category.id == ids[1]))
+                await session.execute(delete(User).where(User.id == ids[0]))
+                await session.commit()
+            await engine.dispose()
@@ -0,0 +1,121 @@
+"""Tests for token-bucket throttling of bot updates."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.middlewares.throttling import ThrottlingMiddleware
+from app.services import rate_limiter
+from app.services.rate_limiter import RateLimit, RateLimits, TokenBucketLimiter
+
+LIMITS = {"default": "1/2", "checkout": "0.1/1", "courier": "off", "client:refresh": "off"}
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    return clock
+
+
+class TestRateLimits:
+    def test_lookup_order(self):
+        limits = RateLimits(LIMITS)
+
+        assert limits.get("client", "browse") == RateLimit(rate=1.0, burst=2)
+        assert limits.get("client", "checkout") == RateLimit(rate=0.1, burst=1)
+        assert limits.get("client", "refresh") is None
+        # Staff role limits win over action limits
+        assert limits.get("courier", "checkout") is None
+
+
+class TestLocalBuckets:
+    @pytest.mark.asyncio
+    async def test_burst_then_refill(self, clock):
+        limiter = TokenBucketLimiter(max_local_keys=10)
+        limit = RateLimit(rate=1.0, burst=2)
+
+        assert [await limiter.allow("u1", limit) for _ in range(3)] == [True, True, False]
+        clock.now += 1.0
+        assert await limiter.allow("u1", limit) is True
+        assert await limiter.allow("u1", limit) is False
+
+    @pytest.mark.asyncio
+    async def test_buckets_are_bounded(self, clock):
+        limiter = TokenBucketLimiter(max_local_keys=3)
+        limit = RateLimit(rate=1.0, burst=1)
+
+        for user_id in range(10):
+            await limiter.allow(str(user_id), limit)
+
+        assert list(limiter._local) == ["7", "8", "9"]
+
+    @pytest.mark.asyncio
+    async def test_falls_back_when_redis_fails(self, clock):
+        class _BrokenRedis:
+            def register_script(self, script):
+                async def run(keys, args):
+                    raise ConnectionError("down")
+                return run
+
+        limiter = TokenBucketLimiter(_BrokenRedis(), max_local_keys=10)
+
+        assert await limiter.allow("u1", RateLimit(rate=1.0, burst=1)) is True
+        assert await limiter.allow("u1", RateLimit(rate=1.0, burst=1)) is False
+
+    @pytest.mark.asyncio
+    async def test_redis_script_decides(self):
+        calls = []
+
+        class _Redis:
+            def register_script(self, script):
+                async def run(keys, args):
+                    calls.append((keys, args))
+                    return 0
+                return run
+
+        limiter = TokenBucketLimiter(_Redis(), max_local_keys=10)
+
+        assert await limiter.allow("7:browse", RateLimit(rate=2.0, burst=10)) is False
+        assert calls == [(["throttle:7:browse"], [2.0, 10, 5000])]
+
+
+class _Event:
+    def __init__(self):
+        self.answers = []
+
+    async def answer(self, text, **kwargs):
+        self.answers.append(text)
+
+
+class TestThrottlingMiddleware:
+    @pytest.mark.asyncio
+    async def test_per_action_and_role(self, clock):
+        middleware = ThrottlingMiddleware(TokenBucketLimiter(max_local_keys=10), RateLimits(LIMITS))
+        handled = []
+
+        async def handler(event, data):
+            handled.append(data["handler"].flags.get("throttle"))
+            return True
+
+        def data(role, throttle=None):
+            flags = {"throttle": throttle} if throttle else {}
+            return {"user": SimpleNamespace(id=1, role=role), "handler": SimpleNamespace(flags=flags)}
+
+        event = _Event()
+        # Checkout allows one request, browsing keeps its own bucket
+        assert await middleware(handler, event, data("client", "checkout")) is True
+        assert await middleware(handler, event, data("client", "checkout")) is None
+        assert await middleware(handler, event, data("client")) is True
+        # Staff bursts are never throttled
+        for _ in range(20):
+            assert await middleware(handler, event, data("courier", "checkout")) is True
+        assert len(handled) == 22
@@ -0,0 +1,109 @@
+"""Tests for the cached user identity used by AuthMiddleware."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from app.middlewares.auth import AuthMiddleware
+from app.services.user_cache import UserCache, UserIdentity, user_cache
+from app.utils.enums import UserRole
+
+
+def _identity(**overrides):
+    values = dict(id=1, telegram_id=100, role=UserRole.CLIENT.value, is_active=True, first_name="Ann")
+    values.update(overrides)
+    return UserIdentity(**values)
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.values = {}
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    async def delete(self, key):
+        self.values.pop(key, None)
+
+
+class TestUserCache:
+    @pytest.mark.asyncio
+    async def test_lru_evicts_oldest(self):
+        cache = UserCache(ttl_seconds=60, max_size=1)
+        await cache.put(_identity())
+        await cache.put(_identity(id=2, telegram_id=200))
+
+        assert await cache.get(100) is None
+        assert (await cache.get(200)).id == 2
+
+    @pytest.mark.asyncio
+    async def test_redis_tier_and_invalidate(self):
+        cache = UserCache(ttl_seconds=60)
+        cache._redis = _FakeRedis()
+        await cache.put(_identity(role=UserRole.ADMIN.value))
+
+        cache.clear()
+        identity = await cache.get(100)
+        assert identity.is_admin()
+
+        await cache.invalidate(100)
+        assert await cache.get(100) is None
+
+    @pytest.mark.asyncio
+    async def test_profile_written_back_only_when_changed(self):
+        cache = UserCache(ttl_seconds=60)
+        identity = _identity()
+
+        assert await cache.update_profile(identity, first_name="Ann", username=None) is identity
+        assert cache._pending == {}
+
+        updated = await cache.update_profile(identity, first_name="Anna", last_name="Lee")
+        assert updated.full_name == "Anna Lee"
+        assert cache._pending == {1: {"first_name": "Anna", "last_name": "Lee"}}
+        assert (await cache.get(100)).first_name == "Anna"
+
+
+class _UserSession:
+    """Returns one user row per query and counts queries and commits."""
+
+    def __init__(self, user):
+        self.user = user
+        self.queries = 0
+        self.commits = 0
+
+    async def execute(self, statement, *args, **kwargs):
+        self.queries += 1
+        user = self.user
+        return SimpleNamespace(scalar_one_or_none=lambda: user)
+
+    async def flush(self):
+        pass
+
+    async def commit(self):
+        self.commits += 1
+
+
+class TestAuthMiddleware:
+    @pytest.mark.asyncio
+    async def test_identity_served_from_cache(self):
+        user_cache.clear()
+        row = SimpleNamespace(
+            id=1, telegram_id=100, role=UserRole.KITCHEN.value, is_active=True,
+            username="ann", first_name="Ann", last_name=None
+        )
+        session = _UserSession(row)
+        sender = SimpleNamespace(id=100, username="ann", first_name="Ann", last_name=None)
+
+        async def handler(event, data):
+            return data["user"]
+
+        for _ in range(3):
+            user = await AuthMiddleware()(handler, object(), {"session": session, "event_from_user": sender})
+
+        assert session.queries == 1
+        assert session.commits == 0
+        assert user.is_staff()
+        user_cache.clear()